@@ -0,0 +1,234 @@
+"""
+Bulk loading helpers that write DataFrames straight into a table without
+building an ORM object per row.
+"""
+import io
+
+import pandas as pd
+from sqlalchemy import Column, MetaData, Table, exists, inspect, select
+
+from dormouse.extras.metrics import count, timed
+from dormouse.extras.partitions import partition_info
+from dormouse.extras.utils import clean_db_col_names
+
+
+def frame_to_table(df: pd.DataFrame, tbl, replace_set=None) -> pd.DataFrame:
+    """
+    Rename the DataFrame columns the same way the ORM constructors do and drop
+    any column that does not exist on the table
+    :param df: The raw DataFrame
+    :type class: 'pd.DataFrame', required
+    :param tbl: The declarative table class
+    :type class: 'sqlalchemy.ext.declarative.declarative_base', required
+    :param replace_set: WHOLE column names to be replaced, see clean_db_col_names
+    :type dict, optional
+    """
+    df = df.rename(
+        columns={
+            x: clean_db_col_names(x, replace_set=replace_set)
+            for x in df.columns
+        }
+    )
+    # Duplicate names can show up after cleaning, keep the first one
+    df = df.loc[:, ~df.columns.duplicated()]
+    table_cols = [c.name for c in tbl.__table__.columns]
+    return df[[x for x in table_cols if x in df.columns]]
+
+
+def bulk_load_df(session, tbl, df: pd.DataFrame, batch_size=10000) -> int:
+    """
+    Loads a DataFrame whose columns already match the table into the database.
+    PostgreSQL connections stream the frame through COPY FROM STDIN, every other
+    backend falls back to batched executemany INSERTs.
+    Returns the number of rows written.
+    :param session: Sqlalchemy session
+    :type class: 'sqlalchemy.orm.Session', required
+    :param tbl: The declarative table class, or a Table e.g. a staging table
+    :type class: 'sqlalchemy.ext.declarative.declarative_base', required
+    :param df: Data to be loaded, see frame_to_table
+    :type class: 'pd.DataFrame', required
+    :param batch_size: Rows per executemany batch
+    :type int, optional
+    """
+    if len(df) == 0:
+        return 0
+
+    table = getattr(tbl, "__table__", tbl)
+    with timed("flush"):
+        connection = session.connection()
+        if connection.dialect.name == "postgresql":
+            _copy_df(connection, table, df)
+        else:
+            _executemany_df(connection, table, df, batch_size)
+
+    count(rows_inserted=len(df))
+    return len(df)
+
+
+def merge_df(session, tbl, df: pd.DataFrame, key="UID", batch_size=10000) -> int:
+    """
+    Inserts only the rows whose key is not already in the table. The frame is
+    loaded into a temporary staging table and merged with a set-based anti-join,
+    so deduplication happens inside the database instead of in Python.
+    Returns the number of new rows.
+    :param session: Sqlalchemy session
+    :type class: 'sqlalchemy.orm.Session', required
+    :param tbl: The declarative table class
+    :type class: 'sqlalchemy.ext.declarative.declarative_base', required
+    :param df: Data to be merged, see frame_to_table
+    :type class: 'pd.DataFrame', required
+    :param key: The unique column used to detect rows that already exist
+    :type str, optional
+    :param batch_size: Rows per executemany batch when loading the staging table
+    :type int, optional
+    """
+    if len(df) == 0:
+        return 0
+
+    n_given = len(df)
+    df = df.drop_duplicates(key)
+    table = tbl.__table__
+    cols = [x for x in df.columns if x in table.columns]
+    staging = Table(
+        "stage_{}".format(table.name),
+        MetaData(),
+        *[Column(x, table.columns[x].type) for x in cols],
+        prefixes=["TEMPORARY"],
+    )
+
+    with timed("flush"):
+        connection = session.connection()
+        staging.drop(connection, checkfirst=True)
+        staging.create(connection)
+        if connection.dialect.name == "postgresql":
+            _copy_df(connection, staging, df[cols])
+        else:
+            _executemany_df(connection, staging, df[cols], batch_size)
+
+        new_rows = select(*[staging.c[x] for x in cols]).where(
+            ~exists().where(table.c[key] == staging.c[key])
+        )
+        res = connection.execute(table.insert().from_select(cols, new_rows))
+        n_rows = res.rowcount
+        # Only dropped on success. After an error PostgreSQL rejects every statement
+        # until the rollback, which also removes the staging table
+        staging.drop(connection)
+
+    count(rows_inserted=n_rows, rows_skipped=n_given - n_rows)
+    return n_rows
+
+
+def _copy_df(connection, table, df: pd.DataFrame):
+    """
+    COPY the frame into the table using the raw DBAPI cursor
+    """
+    preparer = connection.dialect.identifier_preparer
+    sql = "COPY {} ({}) FROM STDIN WITH (FORMAT csv)".format(
+        preparer.format_table(table),
+        ", ".join(preparer.quote(x) for x in df.columns),
+    )
+
+    buf = io.StringIO()
+    df.to_csv(buf, header=False, index=False)
+    buf.seek(0)
+
+    cursor = connection.connection.cursor()
+    try:
+        if hasattr(cursor, "copy_expert"):
+            # psycopg2
+            cursor.copy_expert(sql, buf)
+        else:
+            # psycopg 3
+            with cursor.copy(sql) as copy:
+                copy.write(buf.getvalue())
+    finally:
+        cursor.close()
+
+
+def _executemany_df(connection, table, df: pd.DataFrame, batch_size):
+    """
+    Batched Core INSERT for backends without a COPY equivalent
+    """
+    records = df.astype(object).where(df.notna(), None).to_dict("records")
+    stmt = table.insert()
+    for i in range(0, len(records), batch_size):
+        connection.execute(stmt, records[i : i + batch_size])
+
+
+def add_missing_columns(connection, tables) -> list:
+    """
+    Adds the columns declared on tables that an existing table does not have yet,
+    e.g. on a database built before the column was declared. The new columns are
+    NULL for the rows already loaded. Returns the "table.column" names added
+    """
+    inspector = inspect(connection)
+    preparer = connection.dialect.identifier_preparer
+    added = []
+    for tbl in tables:
+        table = tbl.__table__
+        if not inspector.has_table(table.name):
+            continue
+        existing = {x["name"] for x in inspector.get_columns(table.name)}
+        for col in table.columns:
+            if col.name in existing:
+                continue
+            connection.exec_driver_sql(
+                "ALTER TABLE {} ADD COLUMN {} {}".format(
+                    preparer.format_table(table),
+                    preparer.quote(col.name),
+                    col.type.compile(dialect=connection.dialect),
+                )
+            )
+            added.append(f"{table.name}.{col.name}")
+    return added
+
+
+def drop_indexes(connection, tables) -> list:
+    """
+    Drops the secondary indexes of tables before a large load, so rows are not
+    indexed one at a time. Primary keys, unique constraints and unique indexes are
+    kept, the anti-join of merge_df relies on them. Returns the dropped indexes
+    :param connection: Sqlalchemy connection or engine
+    :type class: 'sqlalchemy.engine.Connection', required
+    :param tables: The declarative table classes
+    :type list, required
+    """
+    dropped = []
+    for tbl in tables:
+        for index in tbl.__table__.indexes:
+            # Unique indexes enforce the UIDs just like a constraint
+            if index.unique:
+                continue
+            index.drop(bind=connection, checkfirst=True)
+            dropped.append(index)
+    return dropped
+
+
+def create_indexes(connection, tables):
+    """
+    Creates every index declared on tables that does not exist yet, e.g. after
+    drop_indexes or on a database built before the index was declared. Indexes
+    created on a partitioned table cascade to its partitions
+    """
+    for tbl in tables:
+        # Unique indexes of a partitioned table would need the partition column
+        partitioned = partition_info(connection, tbl) is not None
+        for index in tbl.__table__.indexes:
+            if partitioned and index.unique:
+                continue
+            with timed("flush"):
+                index.create(bind=connection, checkfirst=True)
+
+
+def analyze(connection, tables):
+    """
+    Refreshes the planner statistics of tables after a load
+    """
+    name = connection.dialect.name
+    preparer = connection.dialect.identifier_preparer
+    for tbl in tables:
+        table = preparer.format_table(tbl.__table__)
+        if name in ["postgresql", "sqlite"]:
+            connection.exec_driver_sql("ANALYZE {}".format(table))
+        elif name == "mysql":
+            connection.exec_driver_sql("ANALYZE TABLE {}".format(table))
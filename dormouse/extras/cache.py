@@ -0,0 +1,228 @@
+"""
+Local cache for the raw source files (Retrosheet archives, retrosplits csvs,
+the Chadwick register and statcast days) so rebuilding a database does not
+download everything again.
+"""
+import hashlib
+import os
+import sqlite3
+import tempfile
+import time
+
+import pandas as pd
+import requests
+
+from dormouse.extras.metrics import count, timed
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "DORMOUSE_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "dormouse")
+)
+DEFAULT_MAX_BYTES = 10 * 1024 ** 3
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+class SourceCache:
+    """
+    Content addressed on-disk cache. Every payload is stored once under the sha256
+    of its content, and a small sqlite index maps source keys (usually URLs) to
+    payloads. The index also tracks size and last access so the least recently used
+    entries can be evicted once the cache grows beyond max_bytes.
+    :param directory: Where the cache lives
+    :type str, required
+    :param max_bytes: Size limit of the cache
+    :type int, optional
+    :param offline: Only serve from the cache, never touch the network
+    :type bool, optional
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES, offline=False):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.offline = offline
+        os.makedirs(os.path.join(directory, "blobs"), exist_ok=True)
+        with self._index() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS entries "
+                "(key TEXT PRIMARY KEY, blob TEXT, size INTEGER, last_access REAL)"
+            )
+
+    def _index(self):
+        return sqlite3.connect(
+            os.path.join(self.directory, "index.sqlite"), timeout=60
+        )
+
+    def _blob_path(self, digest):
+        return os.path.join(self.directory, "blobs", digest[:2], digest)
+
+    def get(self, key):
+        """
+        Returns the local path of a cached key, or None when it is not cached
+        """
+        with self._index() as db:
+            row = db.execute(
+                "SELECT blob FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or not os.path.exists(self._blob_path(row[0])):
+                return None
+            db.execute(
+                "UPDATE entries SET last_access = ? WHERE key = ?",
+                (time.time(), key),
+            )
+        return self._blob_path(row[0])
+
+    def put_file(self, key, src_path) -> str:
+        """
+        Moves a file into the cache under key and returns its new path
+        """
+        sha = hashlib.sha256()
+        with open(src_path, "rb") as f:
+            for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        path = self._blob_path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(src_path, path)
+
+        with self._index() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                (key, digest, os.path.getsize(path), time.time()),
+            )
+        self.evict(keep=key)
+        return path
+
+    def put_bytes(self, key, data: bytes) -> str:
+        """
+        Stores raw bytes under key and returns their path
+        """
+        fd, tmp = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        return self.put_file(key, tmp)
+
+    def fetch(self, url, refresh=False) -> str:
+        """
+        Returns the local path of url, streaming it to disk first if it is not cached
+        :param url: The source to download
+        :type str, required
+        :param refresh: Download again even if the url is cached
+        :type bool, optional
+        """
+        path = None if refresh and not self.offline else self.get(url)
+        if path is not None:
+            return path
+        if self.offline:
+            raise FileNotFoundError(f"{url} is not cached and offline mode is on")
+
+        fd, tmp = tempfile.mkstemp(dir=self.directory)
+        try:
+            with timed("fetch"), os.fdopen(fd, "wb") as f, requests.get(
+                url, stream=True
+            ) as res:
+                res.raise_for_status()
+                for chunk in res.iter_content(_CHUNK_SIZE):
+                    f.write(chunk)
+                    count(bytes_downloaded=len(chunk))
+        except Exception:
+            os.remove(tmp)
+            raise
+        return self.put_file(url, tmp)
+
+    def size(self) -> int:
+        """
+        Total size of the cached payloads in bytes
+        """
+        with self._index() as db:
+            row = db.execute(
+                "SELECT SUM(size) FROM "
+                "(SELECT blob, MAX(size) AS size FROM entries GROUP BY blob)"
+            ).fetchone()
+        return row[0] or 0
+
+    def evict(self, keep=None):
+        """
+        Drops least recently used entries until the cache fits in max_bytes
+        :param keep: A key that must never be evicted, e.g. the one just written
+        :type str, optional
+        """
+        if self.max_bytes is None:
+            return
+
+        with self._index() as db:
+            total = self.size()
+            lru = db.execute(
+                "SELECT key, blob FROM entries WHERE key != ? ORDER BY last_access",
+                (keep or "",),
+            ).fetchall()
+            for key, blob in lru:
+                if total <= self.max_bytes:
+                    break
+                db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                shared = db.execute(
+                    "SELECT COUNT(*) FROM entries WHERE blob = ?", (blob,)
+                ).fetchone()[0]
+                if shared == 0:
+                    path = self._blob_path(blob)
+                    if os.path.exists(path):
+                        total -= os.path.getsize(path)
+                        os.remove(path)
+
+
+_CACHE = None
+
+
+def configure_cache(
+    directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, offline=False
+):
+    """
+    Sets the cache used by every populate_* function and returns it
+    :param directory: Where the cache lives
+    :type str, optional
+    :param max_bytes: Size limit of the cache
+    :type int, optional
+    :param offline: Only serve from the cache, never touch the network
+    :type bool, optional
+    """
+    global _CACHE
+    _CACHE = SourceCache(directory, max_bytes=max_bytes, offline=offline)
+    return _CACHE
+
+
+def get_cache() -> SourceCache:
+    """
+    Returns the configured cache, creating the default one on first use
+    """
+    if _CACHE is None:
+        return configure_cache()
+    return _CACHE
+
+
+def cached_frame(key, func, refresh=False, **read_kwargs) -> pd.DataFrame:
+    """
+    Caches a DataFrame produced by func as csv. The frame is always read back from
+    the cached file so cached and fresh fetches return identical frames
+    :param key: Cache key
+    :type str, required
+    :param func: Called without arguments to produce the frame on a cache miss
+    :type function, required
+    :param refresh: Call func even if key is cached
+    :type bool, optional
+    :param read_kwargs: Passed to pd.read_csv
+    """
+    cache = get_cache()
+    path = None if refresh and not cache.offline else cache.get(key)
+    if path is None:
+        if cache.offline:
+            raise FileNotFoundError(f"{key} is not cached and offline mode is on")
+        with timed("fetch"):
+            payload = func().to_csv(index=False).encode("utf-8")
+        count(bytes_downloaded=len(payload))
+        path = cache.put_bytes(key, payload)
+
+    try:
+        with timed("transform"):
+            return pd.read_csv(path, low_memory=False, **read_kwargs)
+    except pd.errors.EmptyDataError:
+        # Days without any games
+        return pd.DataFrame()
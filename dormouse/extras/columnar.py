@@ -0,0 +1,162 @@
+"""
+Columnar reads of database tables. Query results are collected straight into Arrow
+columns and handed out as contiguous NumPy arrays, instead of building an ORM
+object (or a pandas cell) per row. Requires pyarrow, install dormouse[parquet].
+"""
+import io
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+
+from dormouse.extras.metrics import count, timed
+from dormouse.extras.parquet import _pyarrow, arrow_schema
+
+
+def select_arrow(session, tbl, columns=None, where=(), order_by=(), batch_size=50000):
+    """
+    Runs a SELECT of some columns of a table and returns the result as an Arrow
+    table. PostgreSQL streams the result through COPY TO STDOUT, which is parsed
+    by the multithreaded Arrow csv reader without building a Python object per
+    row. Other backends are fetched as row tuples in DataFrames of batch_size rows,
+    which are converted to Arrow a whole column at a time
+    :param session: Sqlalchemy session
+    :type class: 'sqlalchemy.orm.Session', required
+    :param tbl: The declarative table class
+    :type class: 'sqlalchemy.ext.declarative.declarative_base', required
+    :param columns: Columns to read, all by default
+    :type list, optional
+    :param where: Conditions on the table columns, combined with AND
+    :type list, optional
+    :param order_by: Columns to sort the result by
+    :type list, optional
+    :param batch_size: Rows per fetch on backends without COPY
+    :type int, optional
+    """
+    pa = _pyarrow()
+    table = tbl.__table__
+    schema = arrow_schema(tbl)
+    columns = list(columns or schema.names)
+    schema = pa.schema([schema.field(x) for x in columns])
+    stmt = select(*[table.c[x] for x in columns])
+    for condition in where:
+        stmt = stmt.where(condition)
+    if order_by:
+        stmt = stmt.order_by(*[table.c[x] for x in order_by])
+
+    with timed("fetch"):
+        connection = session.connection()
+        if connection.dialect.name == "postgresql":
+            result = _copy_to_arrow(connection, stmt, schema)
+        else:
+            result = _fetch_to_arrow(connection, stmt, schema, batch_size)
+    count(rows_parsed=result.num_rows)
+    return result
+
+
+def _copy_to_arrow(connection, stmt, schema):
+    """
+    COPY (query) TO STDOUT into an in-memory buffer and parse it with pyarrow.csv
+    """
+    _pyarrow()
+    from pyarrow import csv as pacsv
+
+    compiled = stmt.compile(
+        dialect=connection.dialect, compile_kwargs={"render_postcompile": True}
+    )
+    sql = "COPY ({}) TO STDOUT WITH (FORMAT csv)".format(compiled)
+
+    buf = io.BytesIO()
+    cursor = connection.connection.cursor()
+    try:
+        if hasattr(cursor, "copy_expert"):
+            # psycopg2
+            cursor.copy_expert(cursor.mogrify(sql, compiled.params).decode(), buf)
+        else:
+            # psycopg 3
+            with cursor.copy(sql, compiled.params) as copy:
+                for block in copy:
+                    buf.write(block)
+    finally:
+        cursor.close()
+
+    buf.seek(0)
+    return pacsv.read_csv(
+        buf,
+        read_options=pacsv.ReadOptions(column_names=schema.names),
+        convert_options=pacsv.ConvertOptions(
+            column_types=schema,
+            true_values=["t"],
+            false_values=["f"],
+            # COPY writes NULL unquoted and empty strings quoted
+            strings_can_be_null=True,
+            quoted_strings_can_be_null=False,
+        ),
+    )
+
+
+def _fetch_to_arrow(connection, stmt, schema, batch_size):
+    """
+    Reads the result into DataFrames of batch_size rows, every DataFrame becomes
+    one chunk of each column. The driver still returns a Python tuple per row, so
+    this only bounds the memory of the fetch
+    """
+    pa = _pyarrow()
+    # SQLite hands out timestamps as text
+    dates = [x.name for x in schema if pa.types.is_timestamp(x.type)]
+    batches = [
+        pa.RecordBatch.from_pandas(df, schema=schema, preserve_index=False)
+        for df in pd.read_sql(
+            stmt, connection, parse_dates=dates, chunksize=batch_size
+        )
+    ]
+    return pa.Table.from_batches(batches, schema=schema)
+
+
+def to_numpy(table) -> dict:
+    """
+    {column: ndarray} of an Arrow table. Numeric columns without nulls are returned
+    without copying when they are stored in a single chunk. Integer columns with
+    nulls become float64 with NaN, and text columns become fixed width unicode
+    arrays that are built from their distinct values, so no Python object is
+    created per row
+    :param table: An Arrow table, e.g. from select_arrow or mirror_table
+    :type class: 'pyarrow.Table', required
+    """
+    pa = _pyarrow()
+    import pyarrow.compute as pc
+
+    arrays = {}
+    for name in table.column_names:
+        col = table.column(name)
+        if pa.types.is_string(col.type) or pa.types.is_large_string(col.type):
+            encoded = pc.dictionary_encode(col.combine_chunks())
+            # The trailing "" is the category of nulls
+            categories = np.array(encoded.dictionary.to_pylist() + [""], dtype=str)
+            codes = encoded.indices.fill_null(len(categories) - 1).to_numpy()
+            arrays[name] = categories[codes]
+        elif pa.types.is_integer(col.type) and col.null_count:
+            arrays[name] = col.cast(pa.float64()).to_numpy()
+        else:
+            arrays[name] = np.ascontiguousarray(col.to_numpy())
+    return arrays
+
+
+def group_slices(arrays: dict, key) -> dict:
+    """
+    Splits arrays that are sorted by key into {key value: {column: view}}. The
+    views share memory with the input, nothing is copied
+    :param arrays: Output of to_numpy, sorted by key
+    :type dict, required
+    :param key: The column the arrays are sorted by, e.g. "pitcher"
+    :type str, required
+    """
+    values = arrays[key]
+    if len(values) == 0:
+        return {}
+    starts = np.flatnonzero(np.r_[True, values[1:] != values[:-1]])
+    ends = np.r_[starts[1:], len(values)]
+    return {
+        values[i].item(): {k: v[i:j] for k, v in arrays.items()}
+        for i, j in zip(starts, ends)
+    }
@@ -0,0 +1,127 @@
+"""
+Translation between player id systems, e.g. the MLBAM ids of statcast and the
+Retrosheet ids of the game logs. Every id system is one array with a row per
+player, and each gets a sorted index on first use, so a whole array of ids is
+translated with a single vectorized binary search.
+"""
+import numpy as np
+import pandas as pd
+
+from dormouse.extras.pitchstore import smallest_int
+
+
+class IdCrosswalk:
+    """
+    One row per player, one array per id system. Missing ids are -1 in integer
+    systems and "" in text systems, and never match anything.
+    :param keys: {id system: ndarray}, every array with the same length
+    :type dict, required
+    """
+
+    def __init__(self, keys: dict):
+        lengths = set(len(x) for x in keys.values())
+        if len(lengths) > 1:
+            raise ValueError("Every id system of a crosswalk needs the same length")
+        self.keys = dict(keys)
+        self._indexes = {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame):
+        """
+        Builds a crosswalk from a frame with one column per id system. Integer ids
+        are narrowed to the smallest dtype that holds them, text ids become fixed
+        width unicode arrays
+        """
+        keys = {}
+        for name in df.columns:
+            values = df[name]
+            if pd.api.types.is_numeric_dtype(values):
+                values = values.fillna(-1).to_numpy().astype(np.int64)
+                keys[name] = values.astype(smallest_int(values))
+            else:
+                keys[name] = values.fillna("").to_numpy().astype(str)
+        return cls(keys)
+
+    def __len__(self):
+        return len(next(iter(self.keys.values()), []))
+
+    def __getitem__(self, name) -> np.ndarray:
+        return self.keys[name]
+
+    @property
+    def columns(self) -> list:
+        return list(self.keys)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(x.nbytes for x in self.keys.values())
+
+    def _missing(self, name):
+        return "" if self.keys[name].dtype.kind == "U" else -1
+
+    def _index(self, name):
+        """
+        (rows, values) of every known id of a system, sorted by id. The first row
+        wins when an id occurs twice
+        """
+        if name not in self._indexes:
+            values = self.keys[name]
+            rows = np.flatnonzero(values != self._missing(name))
+            order = rows[np.argsort(values[rows], kind="stable")]
+            values = values[order]
+            first = np.r_[True, values[1:] != values[:-1]][: len(values)]
+            self._indexes[name] = (order[first], values[first])
+        return self._indexes[name]
+
+    def rows(self, ids, source) -> np.ndarray:
+        """
+        Row of every id in the crosswalk, -1 for unknown ids
+        :param ids: Ids of the source system, any array-like
+        :type list, required
+        :param source: The id system of ids, e.g. "key_mlbam"
+        :type str, required
+        """
+        rows, values = self._index(source)
+        ids = np.asarray(ids)
+        if values.dtype.kind == "U":
+            ids = ids.astype(str)
+        elif ids.dtype.kind == "f":
+            # Ids that went through a float column, NaN never matches
+            ids = np.where(np.isnan(ids), -1, ids).astype(np.int64)
+        if len(values) == 0:
+            return np.full(ids.shape, -1)
+        i = np.minimum(np.searchsorted(values, ids), len(values) - 1)
+        return np.where(values[i] == ids, rows[i], -1)
+
+    def translate(self, ids, source, target) -> np.ndarray:
+        """
+        Translates an array of ids from one system to another, e.g.
+        crosswalk.translate(pitches["pitcher"], "key_mlbam", "key_retro").
+        Unknown ids become -1 or "", see IdCrosswalk
+        :param ids: Ids of the source system, any array-like
+        :type list, required
+        :param source: The id system of ids
+        :type str, required
+        :param target: The id system to translate to
+        :type str, required
+        """
+        rows = self.rows(ids, source)
+        values = self.keys[target]
+        out = np.full(rows.shape, self._missing(target), dtype=values.dtype)
+        out[rows >= 0] = values[rows[rows >= 0]]
+        return out
+
+    def save(self, path):
+        """
+        Writes the crosswalk to a single uncompressed .npz file
+        """
+        with open(path, "wb") as f:
+            np.savez(f, **self.keys)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a crosswalk written by save
+        """
+        with np.load(path, allow_pickle=False) as data:
+            return cls({x: data[x] for x in data.files})
@@ -0,0 +1,118 @@
+"""
+The one place dormouse creates SQLAlchemy engines, so scripts and build workers
+share the same pooling and executemany options. Builds additionally run with
+backend specific bulk load settings, see BUILD_SETTINGS.
+"""
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+
+POOL_SIZE = 5
+MAX_OVERFLOW = 10
+# Applied to every connection of a build engine, in order. SQLite pragmas are per
+# connection except journal_mode, which is stored in the database file and is put
+# back by restore_settings. The PostgreSQL settings only last for the session
+BUILD_SETTINGS = {
+    "sqlite": [
+        ("journal_mode", "WAL"),
+        ("synchronous", "OFF"),
+        # Negative sizes are in KiB, i.e. 256 MB
+        ("cache_size", "-262144"),
+        ("temp_store", "MEMORY"),
+    ],
+    "postgresql": [
+        ("synchronous_commit", "off"),
+        ("work_mem", "'256MB'"),
+        ("maintenance_work_mem", "'512MB'"),
+    ],
+}
+# Settings that outlive the connection, saved before a build and restored after it
+_PERSISTENT = {"sqlite": ["journal_mode"]}
+
+
+def _setting_sql(backend, name, value) -> str:
+    if backend == "sqlite":
+        return f"PRAGMA {name}={value}"
+    return f"SET {name} = {value}"
+
+
+def get_engine(
+    connection, build=False, pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW, **kwargs
+):
+    """
+    Creates an engine for a connection string. Server backends get a pool of
+    pool_size connections plus max_overflow extra ones, checked before use, and
+    psycopg2 batches executemany INSERTs into multi-row statements.
+    :param connection: The sqlalchemy connection string
+    :type str, required
+    :param build: Apply BUILD_SETTINGS to every connection. Faster bulk loads at the
+        cost of durability, a crash during the build can leave a SQLite database
+        corrupt
+    :type bool, optional
+    :param kwargs: Passed on to sqlalchemy.create_engine
+    :type dict, optional
+    """
+    url = make_url(connection)
+    backend = url.get_backend_name()
+    options = {}
+    # SQLite pools are picked by the dialect, in memory databases live in a
+    # single connection
+    if backend != "sqlite":
+        options.update(
+            pool_size=pool_size, max_overflow=max_overflow, pool_pre_ping=True
+        )
+    if url.get_driver_name() == "psycopg2":
+        options["executemany_mode"] = "values_plus_batch"
+    options.update(kwargs)
+    engine = create_engine(url, **options)
+
+    if build and backend in BUILD_SETTINGS:
+        statements = [_setting_sql(backend, *x) for x in BUILD_SETTINGS[backend]]
+
+        @event.listens_for(engine, "connect")
+        def _build_settings(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for sql in statements:
+                cursor.execute(sql)
+            cursor.close()
+            if backend == "postgresql":
+                dbapi_connection.commit()
+
+    return engine
+
+
+def saved_settings(connection) -> dict:
+    """
+    Current values of the settings a build changes for good, to be passed to
+    restore_settings once the build is done
+    :param connection: The sqlalchemy connection string
+    :type str, required
+    """
+    engine = get_engine(connection)
+    names = _PERSISTENT.get(engine.dialect.name, [])
+    try:
+        with engine.connect() as conn:
+            return {
+                x: conn.exec_driver_sql(f"PRAGMA {x}").scalar() for x in names
+            }
+    finally:
+        engine.dispose()
+
+
+def restore_settings(connection, settings: dict):
+    """
+    Puts back settings saved by saved_settings. Every build engine, including the
+    ones of the worker threads, has to be disposed first
+    :param connection: The sqlalchemy connection string
+    :type str, required
+    :param settings: Output of saved_settings
+    :type dict, required
+    """
+    if not settings:
+        return
+    engine = get_engine(connection)
+    try:
+        with engine.connect() as conn:
+            for name, value in settings.items():
+                conn.exec_driver_sql(_setting_sql(engine.dialect.name, name, value))
+    finally:
+        engine.dispose()
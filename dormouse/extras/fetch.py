@@ -0,0 +1,138 @@
+"""
+Helpers for fetching many partitions from outside sources concurrently without
+making any admins angry.
+"""
+import collections
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TokenBucket:
+    """
+    Thread safe token bucket rate limiter. One instance is shared by every worker
+    that talks to the same site.
+    :param rate: Requests per second. None disables the limit
+    :type float, optional
+    :param capacity: Number of requests that can be made in a single burst
+    :type int, optional
+    """
+
+    def __init__(self, rate=2.0, capacity=1):
+        self.rate = rate
+        self.capacity = float(capacity)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """
+        Block until the requested number of tokens is available
+        """
+        if not self.rate:
+            return
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._last) * self.rate
+                )
+                self._last = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def fetch_ordered(func, items, workers=1, limiter=None):
+    """
+    Calls func on every item with a bounded pool of worker threads and yields
+    (item, future) pairs in the same order as items, so a single consumer can
+    write the results in order. Exceptions are raised by future.result().
+    The workers run in a copy of the caller's context, so their work is counted
+    in the caller's build stage.
+    At most 2 * workers results are held in memory at once.
+    :param func: The function making the outside request
+    :type function, required
+    :param items: The arguments to call func with
+    :type iterable, required
+    :param workers: Number of concurrent requests
+    :type int, optional
+    :param limiter: Rate limiter shared by all the workers
+    :type class: 'TokenBucket', optional
+    """
+
+    def _call(item):
+        if limiter is not None:
+            limiter.acquire()
+        return func(item)
+
+    items = iter(items)
+    pending = collections.deque()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+
+        def _submit(item):
+            return pool.submit(contextvars.copy_context().run, _call, item)
+
+        try:
+            for item in items:
+                pending.append((item, _submit(item)))
+                if len(pending) >= 2 * max(1, workers):
+                    break
+
+            while pending:
+                item, future = pending.popleft()
+                for nxt in items:
+                    pending.append((nxt, _submit(nxt)))
+                    break
+                yield item, future
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+
+class PartialFetchError(Exception):
+    """
+    Raised once everything that could be fetched has been loaded, listing the
+    partitions that still failed after being retried
+    """
+
+    def __init__(self, source, partitions):
+        self.source = source
+        self.partitions = list(partitions)
+        super().__init__(
+            "{} partitions of {} could not be fetched: {}".format(
+                len(self.partitions), source, ", ".join(self.partitions)
+            )
+        )
+
+
+def retry_call(func, item, retries=3, backoff=2.0, limiter=None):
+    """
+    Calls func(item), retrying failed calls after backoff * 2 ** attempt seconds.
+    Files missing from an offline cache are never retried
+    :param func: The function making the outside request
+    :type function, required
+    :param item: The argument to call func with
+    :type any, required
+    :param retries: Number of retries after the first failure
+    :type int, optional
+    :param backoff: Seconds to wait before the first retry
+    :type float, optional
+    :param limiter: Rate limiter shared with the other requests to the same site
+    :type class: 'TokenBucket', optional
+    """
+    for attempt in range(retries + 1):
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            return func(item)
+        except FileNotFoundError:
+            raise
+        except Exception:
+            if attempt == retries:
+                raise
+        time.sleep(backoff * 2 ** attempt)
@@ -0,0 +1,184 @@
+"""
+Build instrumentation. Every populate_* call runs inside a stage that collects
+counters (bytes downloaded, rows parsed/inserted/skipped) and the time spent
+fetching, transforming, hashing and flushing to the database. The helpers below
+do nothing when no stage is active, so the populate functions can be used on
+their own as before.
+"""
+import contextvars
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+PHASES = ["fetch", "transform", "hash", "flush"]
+COUNTERS = [
+    "bytes_downloaded",
+    "rows_parsed",
+    "rows_inserted",
+    "rows_skipped",
+    "partitions_loaded",
+    "partitions_skipped",
+    "partitions_failed",
+]
+
+_CURRENT = contextvars.ContextVar("dormouse_stage", default=None)
+_LOCK = threading.Lock()
+_STAGES = []
+
+
+class StageMetrics:
+    """
+    Counters and phase timings of a single build stage. Safe to update from the
+    fetch threads of the stage.
+    :param name: Name of the stage, e.g. "gamelog:2019"
+    :type str, required
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.time()
+        self.finished = None
+        self.counters = {x: 0 for x in COUNTERS}
+        self.seconds = {x: 0.0 for x in PHASES}
+        self._lock = threading.Lock()
+
+    def add(self, **counters):
+        with self._lock:
+            for key, value in counters.items():
+                self.counters[key] = self.counters.get(key, 0) + value
+
+    def add_time(self, phase, seconds):
+        with self._lock:
+            self.seconds[phase] = self.seconds.get(phase, 0.0) + seconds
+
+    @property
+    def wall_time(self) -> float:
+        return (self.finished or time.time()) - self.started
+
+    def to_dict(self) -> dict:
+        """
+        JSON serializable summary of the stage. Phase times are summed over every
+        thread of the stage, so with concurrent fetches they can exceed wall_time
+        """
+        with self._lock:
+            return {
+                "name": self.name,
+                "wall_time": round(self.wall_time, 3),
+                **self.counters,
+                "seconds": {k: round(v, 3) for k, v in self.seconds.items()},
+            }
+
+
+@contextmanager
+def stage(name):
+    """
+    Runs the body inside a new stage and yields its StageMetrics
+    """
+    metrics = StageMetrics(name)
+    with _LOCK:
+        _STAGES.append(metrics)
+    token = _CURRENT.set(metrics)
+    try:
+        yield metrics
+    finally:
+        metrics.finished = time.time()
+        _CURRENT.reset(token)
+
+
+def current_stage():
+    """
+    The active StageMetrics, or None outside of a stage
+    """
+    return _CURRENT.get()
+
+
+def count(**counters):
+    """
+    Adds to the counters of the active stage
+    """
+    metrics = _CURRENT.get()
+    if metrics is not None:
+        metrics.add(**counters)
+
+
+@contextmanager
+def timed(phase):
+    """
+    Adds the time spent in the body to a phase of the active stage
+    """
+    t_start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics = _CURRENT.get()
+        if metrics is not None:
+            metrics.add_time(phase, time.perf_counter() - t_start)
+
+
+def timed_iter(iterable, phase):
+    """
+    Yields from iterable, charging the time spent producing every item to phase.
+    Used for lazily parsed csv chunks
+    """
+    items = iter(iterable)
+    while True:
+        with timed(phase):
+            try:
+                item = next(items)
+            except StopIteration:
+                return
+        yield item
+
+
+def stages() -> list:
+    """
+    Every stage started in this process
+    """
+    with _LOCK:
+        return list(_STAGES)
+
+
+def summarize(stage_dicts) -> dict:
+    """
+    Totals of a list of StageMetrics.to_dict summaries
+    """
+    totals = {x: 0 for x in COUNTERS}
+    seconds = {x: 0.0 for x in PHASES}
+    for x in stage_dicts:
+        for key in COUNTERS:
+            totals[key] += x.get(key, 0)
+        for key in PHASES:
+            seconds[key] += x.get("seconds", {}).get(key, 0.0)
+    totals["seconds"] = {k: round(v, 3) for k, v in seconds.items()}
+    return totals
+
+
+def progress_line(stage_dicts, n_done, n_total, elapsed) -> str:
+    """
+    One line summary of a running build
+    """
+    totals = summarize(stage_dicts)
+    rate = totals["rows_inserted"] / elapsed if elapsed > 0 else 0.0
+    return (
+        f"[{n_done}/{n_total} units] {elapsed:.0f}s "
+        f"{totals['bytes_downloaded'] / 1024 ** 2:.1f} MB "
+        f"{totals['rows_parsed']} parsed "
+        f"{totals['rows_inserted']} inserted "
+        f"{totals['rows_skipped']} skipped "
+        f"({rate:.0f} rows/s)"
+    )
+
+
+def write_summary(path, stage_dicts, wall_time):
+    """
+    Writes the JSON build summary
+    """
+    summary = {
+        "wall_time": round(wall_time, 3),
+        "totals": summarize(stage_dicts),
+        "stages": list(stage_dicts),
+    }
+    with open(path, "w") as f:
+        json.dump(summary, f, indent=2)
+    return summary
@@ -0,0 +1,169 @@
+"""
+Columnar Parquet mirrors of database tables for analytical reads. Mirrors are
+hive partitioned directories (e.g. game_year=2019/month=4/) holding one file per
+ingested unit, so a unit can be rewritten without touching the others.
+Requires pyarrow, install dormouse[parquet].
+"""
+import os
+import tempfile
+
+import pandas as pd
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, String
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError(
+            "Parquet mirrors need pyarrow, install it with pip install dormouse[parquet]"
+        )
+    return pyarrow
+
+
+def arrow_schema(tbl, drop=()):
+    """
+    Arrow schema of a table, so every file of a mirror has the same types even when
+    a column is empty in one of them
+    :param tbl: The declarative table class
+    :type class: 'sqlalchemy.ext.declarative.declarative_base', required
+    :param drop: Columns to leave out, e.g. the partition columns
+    :type list, optional
+    """
+    pa = _pyarrow()
+    types = [
+        (Integer, pa.int64()),
+        (Float, pa.float64()),
+        (Boolean, pa.bool_()),
+        (DateTime, pa.timestamp("us")),
+        (Date, pa.timestamp("us")),
+        (String, pa.string()),
+    ]
+    fields = []
+    for col in tbl.__table__.columns:
+        if col.name in drop:
+            continue
+        arrow_type = next(
+            (t for sa_type, t in types if isinstance(col.type, sa_type)), pa.string()
+        )
+        fields.append(pa.field(col.name, arrow_type))
+    return pa.schema(fields)
+
+
+def partition_path(root, partition: dict) -> str:
+    """
+    Directory of a partition, e.g. root/game_year=2019/month=4
+    """
+    return os.path.join(root, *["{}={}".format(k, v) for k, v in partition.items()])
+
+
+def write_partition_file(root, tbl, df: pd.DataFrame, partition: dict, name) -> str:
+    """
+    Writes a frame whose columns match the table as root/<partition>/<name>.parquet,
+    replacing the file atomically if it exists. Returns the file path
+    :param root: Root directory of the mirror
+    :type str, required
+    :param tbl: The declarative table class
+    :type class: 'sqlalchemy.ext.declarative.declarative_base', required
+    :param df: The rows of the unit, see frame_to_table
+    :type class: 'pd.DataFrame', required
+    :param partition: {column: value} of the partition, in directory order
+    :type dict, required
+    :param name: File name of the unit inside the partition
+    :type str, required
+    """
+    pa = _pyarrow()
+    schema = arrow_schema(tbl, drop=partition.keys())
+    df = df.reindex(columns=schema.names)
+    for field in schema:
+        # Ingest fills missing values with 0, even in text columns
+        if pa.types.is_string(field.type):
+            values = df[field.name]
+            df[field.name] = values.where(values.isna(), values.astype(str))
+    table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+    directory = partition_path(root, partition)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, "{}.parquet".format(name))
+    # Hidden files are ignored by dataset readers until they are complete
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    os.close(fd)
+    try:
+        pa.parquet.write_table(table, tmp)
+        os.replace(tmp, path)
+    except Exception:
+        os.remove(tmp)
+        raise
+    return path
+
+
+def mirror_filter(isin=None, ranges=None):
+    """
+    pyarrow.dataset filter expression for read_mirror, or None without conditions
+    :param isin: {column: value or list of values}
+    :type dict, optional
+    :param ranges: {column: (low, high)} inclusive bounds, either can be None
+    :type dict, optional
+    """
+    ds = _pyarrow().dataset
+    conditions = []
+    for col, values in (isin or {}).items():
+        if values is None:
+            continue
+        if not isinstance(values, (list, tuple, set)):
+            values = [values]
+        conditions.append(ds.field(col).isin(list(values)))
+    for col, (low, high) in (ranges or {}).items():
+        if low is not None:
+            conditions.append(ds.field(col) >= low)
+        if high is not None:
+            conditions.append(ds.field(col) <= high)
+
+    if len(conditions) == 0:
+        return None
+    expr = conditions[0]
+    for x in conditions[1:]:
+        expr = expr & x
+    return expr
+
+
+def mirror_table(root, tbl, partitioning, columns=None, filter=None):
+    """
+    Reads a mirror into an Arrow table. Only the requested columns are read and the
+    filter is pushed down to the partition directories and parquet row groups
+    :param root: Root directory of the mirror
+    :type str, required
+    :param tbl: The declarative table class
+    :type class: 'sqlalchemy.ext.declarative.declarative_base', required
+    :param partitioning: The integer partition columns, in directory order
+    :type list, required
+    :param columns: Columns to read, all by default
+    :type list, optional
+    :param filter: See mirror_filter
+    :type class: 'pyarrow.dataset.Expression', optional
+    """
+    pa = _pyarrow()
+    schema = arrow_schema(tbl, drop=partitioning)
+    part_schema = pa.schema([(x, pa.int64()) for x in partitioning])
+    for field in part_schema:
+        schema = schema.append(field)
+
+    if not os.path.isdir(root):
+        return schema.empty_table().select(columns or schema.names)
+
+    dataset = pa.dataset.dataset(
+        root,
+        schema=schema,
+        format="parquet",
+        partitioning=pa.dataset.partitioning(part_schema, flavor="hive"),
+    )
+    return dataset.to_table(columns=columns, filter=filter)
+
+
+def read_mirror(root, tbl, partitioning, columns=None, filter=None):
+    """
+    mirror_table as a DataFrame
+    """
+    return mirror_table(root, tbl, partitioning, columns, filter).to_pandas()
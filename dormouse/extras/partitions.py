@@ -0,0 +1,222 @@
+"""
+Declarative range partitioning of large tables on PostgreSQL. A partitioned table
+is split into one partition per season (or per month of a season) on a date
+column, so date range queries only scan the partitions they need and a season can
+be replaced by swapping its partitions instead of deleting its rows.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import Column, MetaData, PrimaryKeyConstraint, Table, text
+
+GRANULARITIES = ["year", "month"]
+# Stored as the comment of a partitioned table
+_COMMENT = "dormouse:partition={}:{}"
+
+
+def _check_postgresql(connection):
+    if connection.dialect.name != "postgresql":
+        raise ValueError("Partitioned tables need PostgreSQL")
+
+
+def partition_info(connection, tbl):
+    """
+    (column, granularity) of a table created by create_partitioned_table, None
+    when the table is not partitioned or the backend is not PostgreSQL
+    :param connection: Sqlalchemy connection
+    :type class: 'sqlalchemy.engine.Connection', required
+    :param tbl: The declarative table class
+    :type class: 'sqlalchemy.ext.declarative.declarative_base', required
+    """
+    if connection.dialect.name != "postgresql":
+        return None
+    comment = connection.execute(
+        text("SELECT obj_description(to_regclass(:name), 'pg_class')"),
+        {"name": tbl.__table__.name},
+    ).scalar()
+    if comment is None or not comment.startswith("dormouse:partition="):
+        return None
+    column, granularity = comment.split("=", 1)[1].split(":")
+    return column, granularity
+
+
+def create_partitioned_table(connection, tbl, column, granularity="year"):
+    """
+    Creates a table as PARTITION BY RANGE (column). PostgreSQL requires the
+    partition column in every unique constraint, so it is added to the primary key.
+    Partitions are added by ensure_partitions
+    :param connection: Sqlalchemy connection
+    :type class: 'sqlalchemy.engine.Connection', required
+    :param tbl: The declarative table class
+    :type class: 'sqlalchemy.ext.declarative.declarative_base', required
+    :param column: The date column to partition on, e.g. "game_date"
+    :type str, required
+    :param granularity: One partition per "year" or per "month"
+    :type str, optional
+    """
+    _check_postgresql(connection)
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {GRANULARITIES}")
+
+    source = tbl.__table__
+    key = [x.name for x in source.primary_key.columns] + [column]
+    table = Table(
+        source.name,
+        MetaData(),
+        *[Column(x.name, x.type) for x in source.columns],
+        PrimaryKeyConstraint(*key),
+        postgresql_partition_by="RANGE ({})".format(
+            connection.dialect.identifier_preparer.quote(column)
+        ),
+    )
+    table.create(connection)
+    connection.exec_driver_sql(
+        "COMMENT ON TABLE {} IS '{}'".format(
+            connection.dialect.identifier_preparer.format_table(table),
+            _COMMENT.format(column, granularity),
+        )
+    )
+
+
+def partition_bounds(day, granularity):
+    """
+    [start, end) of the partition holding day
+    """
+    if granularity == "year":
+        return datetime(day.year, 1, 1), datetime(day.year + 1, 1, 1)
+    start = datetime(day.year, day.month, 1)
+    if day.month == 12:
+        return start, datetime(day.year + 1, 1, 1)
+    return start, datetime(day.year, day.month + 1, 1)
+
+
+def partition_ranges(start_dt, end_date, granularity) -> list:
+    """
+    Bounds of every partition between two days, inclusively
+    """
+    ranges = []
+    day = start_dt
+    while day <= end_date:
+        bounds = partition_bounds(day, granularity)
+        ranges.append(bounds)
+        day = bounds[1]
+    return ranges
+
+
+def _range_sql(start, end) -> str:
+    return "FROM ('{:%Y-%m-%d}') TO ('{:%Y-%m-%d}')".format(start, end)
+
+
+def partition_name(tbl, start, granularity) -> str:
+    """
+    e.g. statcast_pitching_y2019 or statcast_pitching_y2019m04
+    """
+    if granularity == "year":
+        return "{}_y{}".format(tbl.__table__.name, start.year)
+    return "{}_y{}m{:02d}".format(tbl.__table__.name, start.year, start.month)
+
+
+def ensure_partitions(connection, tbl, start_dt, end_date, info=None) -> list:
+    """
+    Creates the partitions of a partitioned table that cover two days, inclusively.
+    Does nothing for tables that are not partitioned. Returns the partition names
+    :param info: Output of partition_info, looked up when not given
+    :type tuple, optional
+    """
+    info = info or partition_info(connection, tbl)
+    if info is None:
+        return []
+    preparer = connection.dialect.identifier_preparer
+    names = []
+    for start, end in partition_ranges(start_dt, end_date, info[1]):
+        name = partition_name(tbl, start, info[1])
+        connection.exec_driver_sql(
+            "CREATE TABLE IF NOT EXISTS {} PARTITION OF {} FOR VALUES {}".format(
+                preparer.quote(name),
+                preparer.format_table(tbl.__table__),
+                _range_sql(start, end),
+            )
+        )
+        names.append(name)
+    return names
+
+
+def staging_table(connection, tbl, start, info) -> Table:
+    """
+    Creates an empty table shaped like a partition, to be loaded and then swapped
+    in with swap_partition. It has no indexes, they are built when it is attached
+    """
+    _check_postgresql(connection)
+    name = partition_name(tbl, start, info[1]) + "_staging"
+    preparer = connection.dialect.identifier_preparer
+    connection.exec_driver_sql("DROP TABLE IF EXISTS {}".format(preparer.quote(name)))
+    connection.exec_driver_sql(
+        "CREATE TABLE {} (LIKE {} INCLUDING DEFAULTS)".format(
+            preparer.quote(name), preparer.format_table(tbl.__table__)
+        )
+    )
+    return Table(
+        name, MetaData(), *[Column(x.name, x.type) for x in tbl.__table__.columns]
+    )
+
+
+def keep_rows_outside(connection, tbl, staging: Table, start, first, last, info) -> int:
+    """
+    Copies the rows of the partition starting at start that are dated before first
+    or after last into a staging table, so swap_partition keeps the days that were
+    not reloaded. Returns the number of rows copied
+    """
+    _check_postgresql(connection)
+    column, granularity = info
+    start, end = partition_bounds(start, granularity)
+    preparer = connection.dialect.identifier_preparer
+    columns = ", ".join(preparer.quote(x.name) for x in staging.columns)
+    col = preparer.quote(column)
+    sql = "INSERT INTO {} ({}) SELECT {} FROM {} WHERE {} < :first OR {} >= :after"
+    result = connection.execute(
+        text(
+            sql.format(
+                preparer.quote(staging.name),
+                columns,
+                columns,
+                preparer.quote(partition_name(tbl, start, granularity)),
+                col,
+                col,
+            )
+        ),
+        {"first": first, "after": last + timedelta(days=1)},
+    )
+    return result.rowcount
+
+
+def swap_partition(connection, tbl, staging: Table, start, info):
+    """
+    Replaces the partition starting at start with a loaded staging table. The old
+    partition is dropped, and the staging table takes its name and place. A CHECK
+    constraint matching the bounds lets ATTACH skip validating every row. Run it
+    inside a transaction, readers see either the old or the new partition
+    """
+    _check_postgresql(connection)
+    column, granularity = info
+    start, end = partition_bounds(start, granularity)
+    preparer = connection.dialect.identifier_preparer
+    parent = preparer.format_table(tbl.__table__)
+    name = partition_name(tbl, start, granularity)
+    staged = preparer.quote(staging.name)
+    col = preparer.quote(column)
+    check = preparer.quote(staging.name + "_bounds")
+
+    statements = [
+        "ALTER TABLE {0} ADD CONSTRAINT {1} CHECK ({2} IS NOT NULL "
+        "AND {2} >= '{3:%Y-%m-%d}' AND {2} < '{4:%Y-%m-%d}')".format(
+            staged, check, col, start, end
+        ),
+        "DROP TABLE IF EXISTS {}".format(preparer.quote(name)),
+        "ALTER TABLE {} RENAME TO {}".format(staged, preparer.quote(name)),
+        "ALTER TABLE {} ATTACH PARTITION {} FOR VALUES {}".format(
+            parent, preparer.quote(name), _range_sql(start, end)
+        ),
+        "ALTER TABLE {} DROP CONSTRAINT {}".format(preparer.quote(name), check),
+    ]
+    for sql in statements:
+        connection.exec_driver_sql(sql)
+
@@ -0,0 +1,195 @@
+"""
+Compact in-memory store of pitches. Every field is a single typed NumPy array
+(struct of arrays) in the smallest dtype that holds it, text fields are kept as
+integer codes into a table of their distinct values, and the store can be saved
+to and loaded from a single .npz file.
+"""
+import numpy as np
+import pandas as pd
+
+from dormouse.extras.parquet import _pyarrow
+
+_INT_TYPES = [np.int8, np.int16, np.int32, np.int64]
+
+
+def smallest_int(values: np.ndarray):
+    """
+    The smallest signed integer dtype that holds every value
+    """
+    if len(values) == 0:
+        return np.int8
+    low, high = values.min(), values.max()
+    for dtype in _INT_TYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return np.int64
+
+
+class PitchStore:
+    """
+    Struct of arrays holding one row per pitch. store[name] is the raw array of a
+    field, codes for the text fields, see decode and code.
+    :param arrays: {field: ndarray}, every array with the same length
+    :type dict, required
+    :param categories: {field: distinct values} of the dictionary encoded fields.
+        Their arrays hold indices into the values, -1 for missing
+    :type dict, optional
+    """
+
+    def __init__(self, arrays: dict, categories=None):
+        lengths = set(len(x) for x in arrays.values())
+        if len(lengths) > 1:
+            raise ValueError("Every field of a PitchStore needs the same length")
+        self.arrays = dict(arrays)
+        self.categories = dict(categories or {})
+        self._indexes = {}
+
+    @classmethod
+    def from_arrow(cls, table):
+        """
+        Builds a store from an Arrow table, e.g. pitch_arrays(..., arrow=True).
+        Integers are narrowed to the smallest dtype that fits, floats become
+        float32, timestamps become dates and text is dictionary encoded, without
+        creating a Python object per row
+        :param table: The pitches
+        :type class: 'pyarrow.Table', required
+        """
+        pa = _pyarrow()
+        import pyarrow.compute as pc
+
+        arrays = {}
+        categories = {}
+        for name in table.column_names:
+            col = table.column(name).combine_chunks()
+            if pa.types.is_string(col.type) or pa.types.is_large_string(col.type):
+                encoded = pc.dictionary_encode(col)
+                values = np.array(encoded.dictionary.to_pylist(), dtype=str)
+                codes = encoded.indices.fill_null(-1).to_numpy()
+                arrays[name] = codes.astype(smallest_int(np.r_[codes, len(values)]))
+                categories[name] = values
+            elif pa.types.is_integer(col.type) and col.null_count == 0:
+                values = col.to_numpy()
+                arrays[name] = values.astype(smallest_int(values))
+            elif pa.types.is_integer(col.type) or pa.types.is_floating(col.type):
+                arrays[name] = col.cast(pa.float32()).to_numpy()
+            elif pa.types.is_timestamp(col.type) or pa.types.is_date(col.type):
+                arrays[name] = col.to_numpy().astype("datetime64[D]")
+            else:
+                arrays[name] = np.asarray(col.to_numpy(zero_copy_only=False))
+        return cls(arrays, categories)
+
+    def __len__(self):
+        return len(next(iter(self.arrays.values()), []))
+
+    def __getitem__(self, name) -> np.ndarray:
+        return self.arrays[name]
+
+    @property
+    def columns(self) -> list:
+        return list(self.arrays)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(x.nbytes for x in self.arrays.values()) + sum(
+            x.nbytes for x in self.categories.values()
+        )
+
+    def code(self, name, value) -> int:
+        """
+        Code of a value of a text field, -1 when it never occurs. Used to filter on
+        the codes, e.g. store["pitch_type"] == store.code("pitch_type", "FF")
+        """
+        matches = np.flatnonzero(self.categories[name] == value)
+        return int(matches[0]) if len(matches) else -1
+
+    def decode(self, name) -> np.ndarray:
+        """
+        The values of a text field as a fixed width unicode array, "" for missing
+        """
+        values = np.append(self.categories[name], "")
+        return values[self.arrays[name]]
+
+    def take(self, rows):
+        """
+        A store with a subset of the rows, rows can be a slice, indices or a mask.
+        Slices share memory with this store
+        """
+        return PitchStore(
+            {k: v[rows] for k, v in self.arrays.items()}, self.categories
+        )
+
+    def _index(self, key):
+        """
+        (order, values, starts, ends) of the runs of every distinct value of key.
+        order is None when key is already sorted
+        """
+        if key not in self._indexes:
+            keys = self.arrays[key]
+            order = None
+            if len(keys) > 1 and (keys[1:] < keys[:-1]).any():
+                order = np.argsort(keys, kind="stable")
+                keys = keys[order]
+            starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+            if len(keys) == 0:
+                starts = starts[:0]
+            ends = np.r_[starts[1:], len(keys)]
+            self._indexes[key] = (order, keys[starts], starts, ends)
+        return self._indexes[key]
+
+    def rows(self, key, value):
+        """
+        The pitches whose field key equals value, e.g. rows("pitcher", 543037).
+        The lookup is a binary search over an index built on first use
+        """
+        order, values, starts, ends = self._index(key)
+        i = np.searchsorted(values, value)
+        if i == len(values) or values[i] != value:
+            return self.take(slice(0, 0))
+        if order is None:
+            return self.take(slice(starts[i], ends[i]))
+        return self.take(order[starts[i] : ends[i]])
+
+    def by_pitcher(self, pitcher):
+        return self.rows("pitcher", pitcher)
+
+    def by_batter(self, batter):
+        return self.rows("batter", batter)
+
+    def by_game(self, game_pk):
+        return self.rows("game_pk", game_pk)
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        DataFrame of the store with the text fields as pandas Categoricals
+        """
+        return pd.DataFrame(
+            {
+                k: pd.Categorical.from_codes(v, self.categories[k])
+                if k in self.categories
+                else v
+                for k, v in self.arrays.items()
+            }
+        )
+
+    def save(self, path):
+        """
+        Writes the store to a single uncompressed .npz file
+        """
+        payload = {"a." + k: v for k, v in self.arrays.items()}
+        payload.update({"c." + k: v for k, v in self.categories.items()})
+        with open(path, "wb") as f:
+            np.savez(f, **payload)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a store written by save
+        """
+        arrays = {}
+        categories = {}
+        with np.load(path, allow_pickle=False) as data:
+            for key in data.files:
+                kind, name = key.split(".", 1)
+                (arrays if kind == "a" else categories)[name] = data[key]
+        return cls(arrays, categories)
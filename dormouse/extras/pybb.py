@@ -6,8 +6,15 @@ import pandas as pd
 from bs4 import BeautifulSoup
 import requests
 import numpy as np
-import io
-from datetime import datetime
+import re
+from zipfile import ZipFile
+
+from dormouse.extras.cache import get_cache
+
+REGISTER_URL = (
+    "https://github.com/chadwickbureau/register/archive/refs/heads/master.zip"
+)
+RETROSPLITS_URL = "https://raw.githubusercontent.com/chadwickbureau/retrosplits/master/daybyday/{}-{}.csv"
 
 
 def _single_player_soup(
@@ -166,46 +173,100 @@ def single_player_batting_stats(
     return table
 
 
-def retro_day_stats(start_season, end_season=None, agg_type="playing"):
+def chadwick_register(refresh=False):
     """
-    Pull day by data stats from the chadwick repository on github. The data orignates from retrosheets event files
-    :param start_season: The first season to pull
-    :type int, required
-    :param end_season: The last season to pull
-    :type int, optional
-    :param agg_type: The aggregation type, either "playing" or "team"
-    :type str, optional
+    The Chadwick Bureau player register, as returned by pybaseball's get_lookup_table,
+    but downloaded through the source cache
+    :param refresh: Download the register again even if it is cached
+    :type bool, optional
     """
+    mlb_only_cols = [
+        "key_retro",
+        "key_bbref",
+        "key_fangraphs",
+        "mlb_played_first",
+        "mlb_played_last",
+    ]
+    cols_to_keep = ["name_last", "name_first", "key_mlbam"] + mlb_only_cols
 
-    def _fix_date(dt_string):
-        """
-        Convert YYYY-MM-DD integer to datetime object
-        """
-        dt_string = str(dt_string)
-        dt_string = dt_string.split("-")
-        return datetime(
-            year=int(dt_string[0]),
-            month=int(dt_string[1]),
-            day=int(dt_string[2]),
+    with ZipFile(get_cache().fetch(REGISTER_URL, refresh=refresh)) as data:
+        table = pd.concat(
+            [
+                pd.read_csv(data.open(x), low_memory=False, usecols=cols_to_keep)
+                for x in data.namelist()
+                if re.search("/people.+csv$", x)
+            ],
+            axis=0,
         )
 
-    def _pull_rs_github(season, agg_type):
-        base_url = "https://raw.githubusercontent.com/chadwickbureau/retrosplits/master/daybyday/{}-{}.csv"
-        r = requests.get(base_url.format(agg_type, season))
-        return pd.read_csv(io.StringIO(r.text))
+    # Keep only the major league rows
+    table = table.dropna(how="all", subset=mlb_only_cols).reset_index(drop=True)
+    table[["key_mlbam", "key_fangraphs"]] = (
+        table[["key_mlbam", "key_fangraphs"]].fillna(-1).astype(int)
+    )
+    table["name_last"] = table["name_last"].str.lower()
+    table["name_first"] = table["name_first"].str.lower()
+    return table[cols_to_keep]
+
+
+# Rows parsed per chunk of a retrosplits csv
+RETRO_CHUNK_ROWS = 50000
 
+
+def retro_day_path(season, agg_type="playing", refresh=False) -> str:
+    """
+    Local path of a retrosplits day by day csv, downloaded through the source cache
+    :param season: The season to pull
+    :type int, required
+    :param agg_type: The aggregation type, either "playing" or "team"
+    :type str, optional
+    :param refresh: Download the file again even if it is cached
+    :type bool, optional
+    """
     if agg_type not in ["playing", "team"]:
         raise ValueError(f"{agg_type} not recognized")
 
+    url = RETROSPLITS_URL.format(agg_type, int(season))
+    return get_cache().fetch(url, refresh=refresh)
+
+
+def retro_day_chunks(path, chunksize=None):
+    """
+    Parses a retrosplits day by day csv in fixed size chunks, so a season never has
+    to be held in memory at once. The date columns are converted on every chunk
+    :param path: A file from retro_day_path
+    :type str, required
+    :param chunksize: Rows per chunk, defaults to RETRO_CHUNK_ROWS
+    :type int, optional
+    """
+    chunks = pd.read_csv(
+        path, low_memory=False, chunksize=chunksize or RETRO_CHUNK_ROWS
+    )
+    for df in chunks:
+        for col in ["game.date", "appear.date"]:
+            df[col] = pd.to_datetime(df[col], format="%Y-%m-%d")
+        yield df
+
+
+def retro_day_stats(start_season, end_season=None, agg_type="playing", refresh=False):
+    """
+    Pull day by data stats from the chadwick repository on github. The data orignates from retrosheets event files
+    :param start_season: The first season to pull
+    :type int, required
+    :param end_season: The last season to pull
+    :type int, optional
+    :param agg_type: The aggregation type, either "playing" or "team"
+    :type str, optional
+    :param refresh: Download the files again even if they are cached
+    :type bool, optional
+    """
     if end_season == None:
         end_season = start_season
 
     [start_season, end_season] = [int(x) for x in [start_season, end_season]]
-    df = pd.DataFrame()
-
-    for season in range(start_season, end_season + 1):
-        df = df.append(_pull_rs_github(season, agg_type), ignore_index=True)
-
-    df["game.date"] = df["game.date"].apply(_fix_date)
-    df["appear.date"] = df["appear.date"].apply(_fix_date)
-    return df
+    chunks = [
+        df
+        for season in range(start_season, end_season + 1)
+        for df in retro_day_chunks(retro_day_path(season, agg_type, refresh))
+    ]
+    return pd.concat(chunks, ignore_index=True)
@@ -0,0 +1,246 @@
+"""
+Runs the units of a database build, e.g. one source for one season, in parallel
+while respecting the dependencies between them.
+"""
+import threading
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from multiprocessing.util import Finalize
+
+from sqlalchemy.orm import sessionmaker
+
+from dormouse.extras.engine import get_engine
+from dormouse.extras.metrics import stage
+
+_LOCAL = threading.local()
+# Engines of the worker threads of this process, disposed when run_tasks returns
+# or, in a worker process, when the process exits
+_ENGINES = []
+
+
+class BuildTask:
+    """
+    A single unit of a build. func is called as func(session, *args, **kwargs) with a
+    session owned by the worker running it, and should return the number of rows
+    it wrote.
+    :param name: Unique name of the unit, e.g. "gamelog:2019"
+    :type str, required
+    :param func: A populate_* function
+    :type function, required
+    :param args: Positional arguments passed after the session
+    :type tuple, optional
+    :param kwargs: Keyword arguments passed to func
+    :type dict, optional
+    :param deps: Names of the tasks that have to finish first
+    :type list, optional
+    """
+
+    def __init__(self, name, func, args=(), kwargs=None, deps=None):
+        self.name = name
+        self.func = func
+        self.args = tuple(args)
+        self.kwargs = kwargs or {}
+        self.deps = list(deps or [])
+
+    def __repr__(self):
+        return f"BuildTask({self.name})"
+
+
+def _worker_session(connection):
+    """
+    Every worker thread or process keeps its own engine for the whole build, with
+    the bulk load settings of the backend
+    """
+    engines = getattr(_LOCAL, "engines", None)
+    if engines is None:
+        engines = _LOCAL.engines = {}
+    if connection not in engines:
+        engines[connection] = get_engine(connection, build=True)
+        _ENGINES.append(engines[connection])
+    return sessionmaker(bind=engines[connection])()
+
+
+def run_unit(connection, name, func, args=(), kwargs=None):
+    """
+    Runs one populate function in a fresh session inside its own metrics stage and
+    commits it. Returns the number of rows written and the stage summary
+    :param connection: The sqlalchemy connection string
+    :type str, required
+    :param name: Name of the stage
+    :type str, required
+    """
+    session = _worker_session(connection)
+    with stage(name) as metrics:
+        try:
+            n_rows = func(session, *args, **(kwargs or {}))
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+    return n_rows, metrics.to_dict()
+
+
+def _check_graph(tasks):
+    names = [x.name for x in tasks]
+    if len(set(names)) != len(names):
+        raise ValueError("Task names must be unique")
+    for task in tasks:
+        missing = [x for x in task.deps if x not in names]
+        if missing:
+            raise ValueError(f"{task.name} depends on unknown tasks {missing}")
+
+    # Kahn's algorithm, anything left over is part of a cycle
+    done = set()
+    remaining = list(tasks)
+    while remaining:
+        ready = [x for x in remaining if all(d in done for d in x.deps)]
+        if not ready:
+            raise ValueError(f"Dependency cycle between {remaining}")
+        done.update(x.name for x in ready)
+        remaining = [x for x in remaining if x.name not in done]
+
+
+def _dispose_engines():
+    # Idle worker connections would keep the build settings, see restore_settings
+    while _ENGINES:
+        _ENGINES.pop().dispose()
+
+
+def _init_worker(initializer, initargs):
+    """
+    Runs in every worker process. The process pool exits its workers without
+    running atexit hooks, multiprocessing finalizers still run
+    """
+    Finalize(None, _dispose_engines, exitpriority=10)
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def run_tasks(
+    tasks,
+    connection,
+    jobs=1,
+    processes=False,
+    initializer=None,
+    initargs=(),
+    callback=None,
+    done=None,
+    retries=0,
+    backoff=5.0,
+    on_error=None,
+):
+    """
+    Runs a graph of BuildTasks on a pool of jobs workers, submitting every task as
+    soon as all of its dependencies have finished. A failed task is retried up to
+    retries times, waiting backoff * 2 ** (attempt - 1) seconds before each retry.
+    Once a task has failed for good the tasks that depend on it are skipped, every
+    other task still runs, and the first error is raised at the end.
+    Returns a {name: n_rows} dict.
+    :param tasks: The units of the build
+    :type list, required
+    :param connection: The sqlalchemy connection string every worker connects with
+    :type str, required
+    :param jobs: Number of workers
+    :type int, optional
+    :param processes: Use a process pool instead of a thread pool
+    :type bool, optional
+    :param initializer: Called once in every worker process, e.g. configure_cache
+    :type function, optional
+    :param initargs: Arguments of initializer
+    :type tuple, optional
+    :param callback: Called with (task, n_rows, stats) when a task finishes, where
+        stats is the StageMetrics summary of the task
+    :type function, optional
+    :param done: Names of tasks finished by an earlier run, they are not run again
+    :type set, optional
+    :param retries: Number of times a failed task is retried
+    :type int, optional
+    :param backoff: Seconds to wait before the first retry
+    :type float, optional
+    :param on_error: Called with (task, error, attempt, final) every time a task fails
+    :type function, optional
+    """
+    _check_graph(tasks)
+    if processes:
+        pool = ProcessPoolExecutor(
+            max_workers=max(1, jobs),
+            initializer=_init_worker,
+            initargs=(initializer, initargs),
+        )
+    else:
+        pool = ThreadPoolExecutor(max_workers=max(1, jobs))
+
+    done = set(done or [])
+    results = {x.name: 0 for x in tasks if x.name in done}
+    failed = set()
+    attempts = {}
+    waiting = [x for x in tasks if x.name not in done]
+    running = {}
+    # (time, task) of the failed tasks waiting for their retry, the workers stay free
+    # for other tasks meanwhile
+    retrying = []
+    error = None
+
+    def _submit(task):
+        attempts[task.name] = attempts.get(task.name, 0) + 1
+        future = pool.submit(
+            run_unit, connection, task.name, task.func, task.args, task.kwargs
+        )
+        running[future] = task
+
+    with pool:
+        while waiting or running or retrying:
+            # Dependents of a failed task can never run
+            blocked = [x for x in waiting if any(d in failed for d in x.deps)]
+            for task in blocked:
+                waiting.remove(task)
+                failed.add(task.name)
+
+            ready = [x for x in waiting if all(d in results for d in x.deps)]
+            for task in ready:
+                waiting.remove(task)
+                _submit(task)
+            now = time.monotonic()
+            for task in [x[1] for x in retrying if x[0] <= now]:
+                _submit(task)
+            retrying = [x for x in retrying if x[0] > now]
+
+            timeout = None
+            if retrying:
+                timeout = max(0.0, min(x[0] for x in retrying) - time.monotonic())
+            if not running:
+                if timeout is not None:
+                    time.sleep(timeout)
+                continue
+
+            finished, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in finished:
+                task = running.pop(future)
+                try:
+                    results[task.name], stats = future.result()
+                except Exception as e:
+                    final = attempts[task.name] > retries
+                    if on_error is not None:
+                        on_error(task, e, attempts[task.name], final)
+                    if not final:
+                        delay = backoff * 2 ** (attempts[task.name] - 1)
+                        retrying.append((time.monotonic() + delay, task))
+                        continue
+                    failed.add(task.name)
+                    if error is None:
+                        error = e
+                    continue
+                if callback is not None:
+                    callback(task, results[task.name], stats)
+
+    _dispose_engines()
+    if error is not None:
+        raise error
+    return results
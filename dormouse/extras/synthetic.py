@@ -0,0 +1,336 @@
+"""
+Synthetic source data of any size, shaped like the real downloads. Used by the
+tests and by scripts/benchmark_ingest.py to run every populate_* function without
+touching the network.
+"""
+import io
+from zipfile import ZipFile
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import DateTime, Float, Integer
+
+from dormouse.extras.pybb import REGISTER_URL, RETROSPLITS_URL
+from dormouse.extras.utils import clean_db_col_names
+
+TEAMS = (
+    "ANA ARI ATL BAL BOS CHA CHN CIN CLE COL DET HOU KCA LAN MIA "
+    "MIL MIN NYA NYN OAK PHI PIT SDN SEA SFN SLN TBA TEX TOR WAS"
+).split()
+PITCH_TYPES = ["FF", "SI", "SL", "CH", "CU", "FC", "KC", "FS"]
+
+
+def _rng(seed):
+    return np.random.default_rng(seed)
+
+
+def _retro_ids(rng, n):
+    """
+    Retrosheet style player ids, e.g. abcd001
+    """
+    letters = rng.choice(list("abcdefghijklmnopqrstuvwxyz"), (n, 4))
+    return ["".join(x) + f"{i % 1000:03d}" for i, x in enumerate(letters)]
+
+
+def _fill_by_type(tbl, names, n, rng):
+    """
+    Random columns for every name based on the type of the matching table column
+    """
+    data = {}
+    for name in names:
+        col = getattr(tbl, clean_db_col_names(name), None)
+        col_type = None if col is None else col.type
+        if isinstance(col_type, Integer):
+            data[name] = rng.integers(0, 10, n)
+        elif isinstance(col_type, Float):
+            data[name] = rng.normal(0, 1, n).round(3)
+        elif isinstance(col_type, DateTime):
+            data[name] = pd.NaT
+        else:
+            data[name] = rng.choice(list("ABCDEFGH"), n)
+    return data
+
+
+def _zip_bytes(members: dict) -> bytes:
+    """
+    Zip archive holding {name: text}
+    """
+    buf = io.BytesIO()
+    with ZipFile(buf, "w") as data:
+        for name, text in members.items():
+            data.writestr(name, text)
+    return buf.getvalue()
+
+
+def statcast_day(day, n_pitches=4000, seed=None) -> pd.DataFrame:
+    """
+    One day of Baseball Savant pitches, with every column of statcast_pitching
+    :param day: The game date
+    :type {str, datetime}, required
+    :param n_pitches: Number of pitches, a full slate is about 4000
+    :type int, optional
+    :param seed: Random seed, defaults to the date
+    :type int, optional
+    """
+    from dormouse.tables.dbPerson import StatcastPitching
+
+    day = pd.Timestamp(day)
+    rng = _rng(int(day.strftime("%Y%m%d")) if seed is None else seed)
+    n_games = max(1, n_pitches // 300)
+    game = np.arange(n_pitches) * n_games // n_pitches
+    pitch_in_game = np.arange(n_pitches) - np.searchsorted(game, game)
+
+    names = [c.name for c in StatcastPitching.__table__.columns if c.name != "UID"]
+    names = ["type" if x == "result_type" else x for x in names]
+    df = pd.DataFrame(_fill_by_type(StatcastPitching, names, n_pitches, rng))
+    df = df.assign(
+        pitch_type=rng.choice(PITCH_TYPES, n_pitches),
+        game_date=day,
+        release_speed=rng.normal(89, 5, n_pitches).round(1),
+        player_name="Doe, John",
+        batter=rng.integers(400000, 700000, n_pitches),
+        pitcher=rng.integers(400000, 700000, n_pitches),
+        events=np.where(rng.random(n_pitches) < 0.25, "field_out", None),
+        description=rng.choice(["ball", "called_strike", "foul"], n_pitches),
+        zone=rng.integers(1, 15, n_pitches),
+        game_type="R",
+        stand=rng.choice(["L", "R"], n_pitches),
+        p_throws=rng.choice(["L", "R"], n_pitches),
+        home_team=rng.choice(TEAMS, n_pitches),
+        away_team=rng.choice(TEAMS, n_pitches),
+        type=rng.choice(["B", "S", "X"], n_pitches),
+        balls=rng.integers(0, 4, n_pitches),
+        strikes=rng.integers(0, 3, n_pitches),
+        game_year=day.year,
+        inning=rng.integers(1, 10, n_pitches),
+        inning_topbot=rng.choice(["Top", "Bot"], n_pitches),
+        game_pk=int(day.strftime("%y%m%d")) * 100 + game,
+        at_bat_number=pitch_in_game // 4 + 1,
+        pitch_number=pitch_in_game % 4 + 1,
+        pitch_name="4-Seam Fastball",
+    )
+    return df
+
+
+def game_log(year, n_games=2430, seed=None) -> pd.DataFrame:
+    """
+    A season of Retrosheet game logs with all 161 columns, as they appear in the
+    glYYYY.txt file
+    :param year: The season
+    :type int, required
+    :param n_games: Number of games, a full season is 2430
+    :type int, optional
+    :param seed: Random seed, defaults to the year
+    :type int, optional
+    """
+    from dormouse.tables.dbGame import GAMELOG_COLUMNS, GameLog
+
+    rng = _rng(year if seed is None else seed)
+    # Every team plays once a day, 15 games per day
+    per_day = len(TEAMS) // 2
+    n_days = -(-n_games // per_day)
+    pairings = rng.permuted(np.tile(np.arange(len(TEAMS)), (n_days, 1)), axis=1)
+    home = pairings[:, ::2].ravel()[:n_games]
+    visiting = pairings[:, 1::2].ravel()[:n_games]
+    dates = pd.Timestamp(f"{year}-03-28") + pd.to_timedelta(
+        np.arange(n_games) // per_day, unit="D"
+    )
+    players = _retro_ids(rng, 1200)
+
+    df = pd.DataFrame(_fill_by_type(GameLog, GAMELOG_COLUMNS, n_games, rng))
+    df["Date"] = pd.DatetimeIndex(dates).strftime("%Y%m%d").astype(int)
+    df["GameSeriesNumber"] = 0
+    df["DOW"] = pd.DatetimeIndex(dates).strftime("%a")
+    df["NumberOuts"] = 54
+    df["DayNight"] = rng.choice(["D", "N"], n_games)
+    df["HomeTeam"] = np.array(TEAMS)[home]
+    df["VisitingTeam"] = np.array(TEAMS)[visiting]
+    for side in ["Visiting", "Home"]:
+        df[f"{side}League"] = rng.choice(["AL", "NL"], n_games)
+        df[f"{side}Score"] = rng.integers(0, 12, n_games)
+        df[f"{side}LineScore"] = [
+            "".join(map(str, x)) for x in rng.integers(0, 3, (n_games, 9))
+        ]
+        df[f"{side}_StartingPID"] = rng.choice(players, n_games)
+        for i in range(1, 10):
+            df[f"{side}_Batter{i}ID"] = rng.choice(players, n_games)
+            df[f"{side}_Batter{i}Name"] = "John Doe"
+            df[f"{side}_Batter{i}Pos"] = i
+    df["ParkID"] = df["HomeTeam"] + "01"
+    df["Attendance"] = rng.integers(5000, 50000, n_games)
+    df["TimeOfGame"] = rng.integers(120, 240, n_games)
+    return df[GAMELOG_COLUMNS]
+
+
+def game_log_zip(year, n_games=2430, seed=None) -> bytes:
+    """
+    game_log packed the way Retrosheet distributes it, glYYYY.zip
+    """
+    df = game_log(year, n_games=n_games, seed=seed)
+    return _zip_bytes({f"GL{year}.TXT": df.to_csv(header=False, index=False)})
+
+
+def rosters(year, n_players=40, seed=None) -> dict:
+    """
+    {team: roster frame} in the layout of a TEAMYYYY.ROS file
+    :param year: The season
+    :type int, required
+    :param n_players: Players per team
+    :type int, optional
+    """
+    rng = _rng(year if seed is None else seed)
+    out = {}
+    for team in TEAMS:
+        ids = _retro_ids(rng, n_players)
+        out[team] = pd.DataFrame(
+            {
+                "rs_id": ids,
+                "name_first": rng.choice(["John", "Jose", "Will"], n_players),
+                "name_last": [x[:4].title() for x in ids],
+                "bats": rng.choice(["L", "R", "B"], n_players),
+                "throws": rng.choice(["L", "R"], n_players),
+                "team": team,
+                "position": rng.choice(["P", "C", "1B", "SS", "OF"], n_players),
+            }
+        )
+    return out
+
+
+def events_zip(year, n_players=40, seed=None) -> bytes:
+    """
+    An event file archive, YYYYeve.zip, holding a .ROS file per team. The event
+    files themselves are empty since nothing reads them
+    """
+    members = {}
+    for team, df in rosters(year, n_players=n_players, seed=seed).items():
+        members[f"{team}{year}.ROS"] = df.to_csv(header=False, index=False)
+        members[f"{year}{team}.EVA"] = ""
+    return _zip_bytes(members)
+
+
+def retrosplits(season, n_rows=60000, seed=None) -> pd.DataFrame:
+    """
+    A season of retrosplits day by day playing rows, about 60000 in a full season
+    :param season: The season
+    :type int, required
+    :param n_rows: Number of player games
+    :type int, optional
+    """
+    from dormouse.tables.dbPerson import PlayerGameStats
+
+    rng = _rng(season if seed is None else seed)
+    # Everything but the B_/P_/F_ stat columns uses dots in the csv header
+    names = [
+        x if x[:2] in ["B_", "P_", "F_"] else x.replace("_", ".")
+        for x in [c.name for c in PlayerGameStats.__table__.columns]
+        if x != "UID"
+    ]
+    df = pd.DataFrame(_fill_by_type(PlayerGameStats, names, n_rows, rng))
+    n_games = max(1, n_rows // 50)
+    game = np.arange(n_rows) * n_games // n_rows
+    dates = pd.Timestamp(f"{season}-03-28") + pd.to_timedelta(
+        game * 186 // n_games, unit="D"
+    )
+    teams = pd.Series(rng.choice(TEAMS, n_games))
+    game_dates = pd.Series(dates[np.searchsorted(game, np.arange(n_games))])
+    # Game keys are the home team, the date and the game number of the day
+    game_keys = (
+        teams
+        + game_dates.dt.strftime("%Y%m%d")
+        + teams.groupby([teams, game_dates]).cumcount().astype(str)
+    )
+    df["game.key"] = game_keys.values[game]
+    df["game.source"] = "evt"
+    df["game.date"] = dates.strftime("%Y-%m-%d")
+    df["appear.date"] = df["game.date"]
+    df["site.key"] = teams.values[game] + "01"
+    df["team.key"] = teams.values[game]
+    df["opponent.key"] = rng.choice(TEAMS, n_rows)
+    # Every team carries a pool of 50 players
+    df["person.key"] = [
+        f"{t}{i % 50:05d}" for t, i in zip(df["team.key"], range(n_rows))
+    ]
+    return df
+
+
+def register(n_players=20000, seed=0) -> pd.DataFrame:
+    """
+    The people files of the Chadwick register, most rows without an mlbam id
+    """
+    rng = _rng(seed)
+    has_mlbam = rng.random(n_players) < 0.3
+    return pd.DataFrame(
+        {
+            "key_person": [f"{i:08x}" for i in range(n_players)],
+            "key_mlbam": np.where(has_mlbam, np.arange(n_players) + 400000, None),
+            "key_retro": _retro_ids(rng, n_players),
+            "key_bbref": _retro_ids(rng, n_players),
+            "key_fangraphs": np.where(has_mlbam, np.arange(n_players), None),
+            "name_last": rng.choice(["Doe", "Smith", "Abreu"], n_players),
+            "name_first": rng.choice(["John", "Jose", "Will"], n_players),
+            "mlb_played_first": np.where(has_mlbam, 2010, None),
+            "mlb_played_last": np.where(has_mlbam, 2019, None),
+        }
+    )
+
+
+def register_zip(n_players=20000, seed=0) -> bytes:
+    """
+    register packed like the master.zip of the register repository
+    """
+    df = register(n_players=n_players, seed=seed)
+    half = len(df) // 2
+    return _zip_bytes(
+        {
+            "register-master/data/people-0.csv": df[:half].to_csv(index=False),
+            "register-master/data/people-1.csv": df[half:].to_csv(index=False),
+        }
+    )
+
+
+def seed_cache(
+    cache,
+    start_season,
+    end_season,
+    games_per_season=2430,
+    players_per_team=40,
+    retrosplits_rows=60000,
+    register_players=20000,
+    statcast_days=None,
+    pitches_per_day=4000,
+):
+    """
+    Stores synthetic copies of every source in a SourceCache under the keys the
+    populate_* functions look up, so a build can run against it with offline=True
+    :param cache: The cache to fill
+    :type class: 'dormouse.extras.cache.SourceCache', required
+    :param statcast_days: The statcast days to generate, none by default
+    :type list, optional
+    """
+    from dormouse.tables.dbGame import EVENTS_URL, GAMELOG_URL
+    from dormouse.tables.dbPerson import STATCAST_CACHE_KEY
+
+    for year in range(int(start_season), int(end_season) + 1):
+        cache.put_bytes(
+            GAMELOG_URL.format(year), game_log_zip(year, n_games=games_per_season)
+        )
+        cache.put_bytes(
+            EVENTS_URL.format(year), events_zip(year, n_players=players_per_team)
+        )
+        cache.put_bytes(
+            RETROSPLITS_URL.format("playing", year),
+            retrosplits(year, n_rows=retrosplits_rows)
+            .to_csv(index=False)
+            .encode("utf-8"),
+        )
+    cache.put_bytes(REGISTER_URL, register_zip(n_players=register_players))
+
+    for day in statcast_days or []:
+        day = pd.Timestamp(day)
+        cache.put_bytes(
+            STATCAST_CACHE_KEY.format(day.strftime("%Y-%m-%d")),
+            statcast_day(day, n_pitches=pitches_per_day)
+            .to_csv(index=False)
+            .encode("utf-8"),
+        )
+
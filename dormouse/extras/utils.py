@@ -1,11 +1,14 @@
 import pandas as pd
 import numpy as np
 
+import hashlib
 import time
 import datetime
 
 from sqlalchemy.sql import func
-from sqlalchemy import Integer
+from sqlalchemy import Integer, String
+
+from dormouse.extras.metrics import timed
 
 
 def clean_db_col_names(name: str, rule_set={".": "_"}, replace_set=None):
@@ -109,3 +112,79 @@ def cast_fiel_dtypes(df: pd.DataFrame, tbl) -> pd.DataFrame:
             pass
 
     return df
+
+
+def _uid_strings(values: pd.Series) -> pd.Series:
+    """
+    Column-wise equivalent of str(native_dtype(x)) for every value in the series
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        # native_dtype reduces timestamps to dates
+        return values.dt.strftime("%Y-%m-%d").fillna("NaT").astype(object)
+    if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(
+        values
+    ):
+        return values.astype(str).astype(object)
+
+    return values.astype(object).where(values.notna(), "nan").map(str)
+
+
+def hash_columns(df: pd.DataFrame, columns, strip_dots=False) -> pd.Series:
+    """
+    Vectorized md5 UIDs. Produces the same hex digest as hashing the concatenated
+    str() of each key column one row at a time
+    :param df: Frame holding the key columns
+    :type class: 'pd.DataFrame', required
+    :param columns: The key columns, in hashing order
+    :type list, required
+    :param strip_dots: Remove "." from the key before hashing
+    :type bool, optional
+    """
+    with timed("hash"):
+        key = _uid_strings(df[columns[0]])
+        for col in columns[1:]:
+            key = key + _uid_strings(df[col])
+        if strip_dots:
+            key = key.str.replace(".", "", regex=False)
+
+        md5 = hashlib.md5
+        return pd.Series(
+            [md5(x.encode("utf-8")).hexdigest() for x in key.tolist()],
+            index=df.index,
+            dtype=object,
+        )
+
+
+def payload_checksum(payload) -> str:
+    """
+    md5 checksum of a downloaded payload, used to detect source files that changed
+    :param payload: Raw bytes, the path to a downloaded file or a parsed DataFrame
+    :type {bytes, str, pd.DataFrame}, required
+    """
+    with timed("hash"):
+        if isinstance(payload, str):
+            md5 = hashlib.md5()
+            with open(payload, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    md5.update(chunk)
+            return md5.hexdigest()
+        if isinstance(payload, pd.DataFrame):
+            payload = pd.util.hash_pandas_object(payload, index=False).values.tobytes()
+        return hashlib.md5(payload).hexdigest()
+
+
+def string_dtypes(tbl, columns) -> dict:
+    """
+    pd.read_csv dtype mapping that keeps every column stored as a String in the
+    table as str, so chunked reads don't infer a different dtype for each chunk
+    :param tbl: Database table object
+    :type class: 'sqlalchemy.ext.declarative.delarative_base', required
+    :param columns: The csv column names
+    :type list, required
+    """
+    dtypes = {}
+    for name in columns:
+        col = getattr(tbl, clean_db_col_names(name), None)
+        if col is not None and isinstance(col.type, String):
+            dtypes[name] = str
+    return dtypes
@@ -1,3 +1,3 @@
 from .dbGame import GameLog, TeamRoster
-from .dbMeta import Teams, populate_team_data
+from .dbMeta import BuildJournal, IngestManifest, Teams, populate_team_data
 from .dbPerson import PlayerGameStats, PlayerLookup, StatcastPitching
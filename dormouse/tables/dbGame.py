@@ -1,200 +1,252 @@
 import hashlib
-import io
-from datetime import datetime
+import re
+from datetime import datetime, timedelta
 from zipfile import ZipFile
 
+import numpy as np
 import pandas as pd
-import requests
-from sqlalchemy import Column, Date, DateTime, Float, Integer, Sequence, String
+from sqlalchemy import (
+    Column,
+    Date,
+    DateTime,
+    Float,
+    Index,
+    Integer,
+    Sequence,
+    String,
+    func,
+    select,
+)
 from sqlalchemy.ext.declarative import declarative_base
 
+from dormouse.extras.bulk import frame_to_table, merge_df
+from dormouse.extras.cache import get_cache
+from dormouse.extras.metrics import count, timed, timed_iter
 from dormouse.extras.utils import (
     clean_db_col_names,
     native_dtype,
     cast_fiel_dtypes,
+    hash_columns,
+    payload_checksum,
+    string_dtypes,
+)
+from dormouse.tables.dbMeta import (
+    Teams,
+    manifest_partitions,
+    skip_partition,
+    update_manifest,
 )
+from dormouse.tables.dbPerson import StatcastPitching
+
+
+# Rows parsed per chunk when reading csv members of an archive
+CSV_CHUNK_ROWS = 10000
+
+# One inning of a Retrosheet line score: a digit, a parenthesized score of ten
+# runs or more, or the x of a home half inning that was not played
+LINE_SCORE_PATTERN = r"\((?P<paren>\d+)\)|(?P<digit>\d)|(?P<unplayed>[xX])"
+LINE_SCORE_SIDES = ["Visiting", "Home"]
+# (player id, position) game log fields of every lineup slot, the starting
+# pitcher first. His position is always 1
+LINEUP_SLOTS = [("StartingPID", None)] + [
+    ("Batter{}ID".format(i), "Batter{}Pos".format(i)) for i in range(1, 10)
+]
+
+GAMELOG_URL = "https://www.retrosheet.org/gamelogs/gl{}.zip"
+EVENTS_URL = "https://www.retrosheet.org/events/{}eve.zip"
+
+
+# The 161 columns of a Retrosheet game log
+# https://www.retrosheet.org/gamelogs/glfields.txt
+GAMELOG_COLUMNS = [
+    "Date",
+    "GameSeriesNumber",
+    "DOW",
+    "VisitingTeam",
+    "VisitingLeague",
+    "VisitingTeamGameNumber",
+    "HomeTeam",
+    "HomeLeague",
+    "HomeTeamGameNumber",
+    "VisitingScore",
+    "HomeScore",
+    "NumberOuts",
+    "DayNight",
+    "CompletionInfo",
+    "ForfeitInfo",
+    "ProtestInfo",
+    "ParkID",
+    "Attendance",
+    "TimeOfGame",
+    "VisitingLineScore",
+    "HomeLineScore",
+    "Visiting_AB",
+    "Visiting_B1",
+    "Visiting_B2",
+    "Visiting_B3",
+    "Visiting_HR",
+    "Visiting_RBI",
+    "Visiting_SH",
+    "Visiting_SF",
+    "Visiting_HBP",
+    "Visiting_BB",
+    "Visiting_IBB",
+    "Visiting_K",
+    "Visiting_SB",
+    "Visiting_CS",
+    "Visiting_GDP",
+    "Visiting_INT",
+    "Visiting_LOB",
+    "Visiting_PitchersUsed",
+    "Visiting_IndividualER",
+    "Visiting_TeamER",
+    "Visiting_WP",
+    "Visiting_BK",
+    "Visiting_PO",
+    "Visiting_A",
+    "Visiting_E",
+    "Visiting_PassedBall",
+    "Visiting_DP",
+    "Visiting_TP",
+    "Home_AB",
+    "Home_B1",
+    "Home_B2",
+    "Home_B3",
+    "Home_HR",
+    "Home_RBI",
+    "Home_SH",
+    "Home_SF",
+    "Home_HBP",
+    "Home_BB",
+    "Home_IBB",
+    "Home_K",
+    "Home_SB",
+    "Home_CS",
+    "Home_GDP",
+    "Home_INT",
+    "Home_LOB",
+    "Home_PitchersUsed",
+    "Home_IndividualER",
+    "Home_TeamER",
+    "Home_WP",
+    "Home_BK",
+    "Home_PO",
+    "Home_A",
+    "Home_E",
+    "Home_PassedBall",
+    "Home_DP",
+    "Home_TP",
+    "HP_UmpireID",
+    "HP_UmpireName",
+    "B1_UmpireID",
+    "B1_UmpireName",
+    "B2_UmpireID",
+    "B2_UmpireName",
+    "B3_UmpireID",
+    "B3_UmpireName",
+    "LF_UmpireID",
+    "LF_UmpireName",
+    "RF_UmpireID",
+    "RF_UmpireName",
+    "Visiting_ManagerID",
+    "Visiting_ManagerName",
+    "Home_ManagerID",
+    "Home_ManagerName",
+    "WinningPitcherID",
+    "WinningPitcherName",
+    "LosingPitcherID",
+    "LosingPitcherName",
+    "SavingPitcherID",
+    "SavingPitcherName",
+    "GameWinRBIID",
+    "GameWinRBIName",
+    "Visiting_StartingPID",
+    "Visiting_StartingPName",
+    "Home_StartingPID",
+    "Home_StartingPName",
+    "Visiting_Batter1ID",
+    "Visiting_Batter1Name",
+    "Visiting_Batter1Pos",
+    "Visiting_Batter2ID",
+    "Visiting_Batter2Name",
+    "Visiting_Batter2Pos",
+    "Visiting_Batter3ID",
+    "Visiting_Batter3Name",
+    "Visiting_Batter3Pos",
+    "Visiting_Batter4ID",
+    "Visiting_Batter4Name",
+    "Visiting_Batter4Pos",
+    "Visiting_Batter5ID",
+    "Visiting_Batter5Name",
+    "Visiting_Batter5Pos",
+    "Visiting_Batter6ID",
+    "Visiting_Batter6Name",
+    "Visiting_Batter6Pos",
+    "Visiting_Batter7ID",
+    "Visiting_Batter7Name",
+    "Visiting_Batter7Pos",
+    "Visiting_Batter8ID",
+    "Visiting_Batter8Name",
+    "Visiting_Batter8Pos",
+    "Visiting_Batter9ID",
+    "Visiting_Batter9Name",
+    "Visiting_Batter9Pos",
+    "Home_Batter1ID",
+    "Home_Batter1Name",
+    "Home_Batter1Pos",
+    "Home_Batter2ID",
+    "Home_Batter2Name",
+    "Home_Batter2Pos",
+    "Home_Batter3ID",
+    "Home_Batter3Name",
+    "Home_Batter3Pos",
+    "Home_Batter4ID",
+    "Home_Batter4Name",
+    "Home_Batter4Pos",
+    "Home_Batter5ID",
+    "Home_Batter5Name",
+    "Home_Batter5Pos",
+    "Home_Batter6ID",
+    "Home_Batter6Name",
+    "Home_Batter6Pos",
+    "Home_Batter7ID",
+    "Home_Batter7Name",
+    "Home_Batter7Pos",
+    "Home_Batter8ID",
+    "Home_Batter8Name",
+    "Home_Batter8Pos",
+    "Home_Batter9ID",
+    "Home_Batter9Name",
+    "Home_Batter9Pos",
+    "AdditionalInformation",
+    "AcquisitionInformation",
+]
 
 
-def _unzip_content(content) -> ZipFile:
+def _open_archive(path) -> ZipFile:
     """
-    Unzips the byte content and returns a zipfile object
+    Opens a downloaded zip archive in place. Members are only read when they are
+    opened, so the archive never has to fit in memory
     """
-    f = io.BytesIO(content)
-    data = ZipFile(f)
-    return data
+    return ZipFile(path)
 
 
-def populate_game_log(year, game_type, session, auto_commit=True):
+def populate_game_log(year, game_type, session, auto_commit=True, refresh=False):
     """
-    Populates the game log table with data from the given year
+    Populates the game log table with data from the given year.
+    Seasons already recorded in the ingest manifest are skipped unless refresh is True
+    or the season is still being played.
     TODO: Implement other game types (WS, DS, etc.)
     """
     if game_type != "rs":
         raise NotImplementedError("Only regular season is supported")
 
-    rs_columns = [
-        "Date",
-        "GameSeriesNumber",
-        "DOW",
-        "VisitingTeam",
-        "VisitingLeague",
-        "VisitingTeamGameNumber",
-        "HomeTeam",
-        "HomeLeague",
-        "HomeTeamGameNumber",
-        "VisitingScore",
-        "HomeScore",
-        "NumberOuts",
-        "DayNight",
-        "CompletionInfo",
-        "ForfeitInfo",
-        "ProtestInfo",
-        "ParkID",
-        "Attendance",
-        "TimeOfGame",
-        "VisitingLineScore",
-        "HomeLineScore",
-        "Visiting_AB",
-        "Visiting_B1",
-        "Visiting_B2",
-        "Visiting_B3",
-        "Visiting_HR",
-        "Visiting_RBI",
-        "Visiting_SH",
-        "Visiting_SF",
-        "Visiting_HBP",
-        "Visiting_BB",
-        "Visiting_IBB",
-        "Visiting_K",
-        "Visiting_SB",
-        "Visiting_CS",
-        "Visiting_GDP",
-        "Visiting_INT",
-        "Visiting_LOB",
-        "Visiting_PitchersUsed",
-        "Visiting_IndividualER",
-        "Visiting_TeamER",
-        "Visiting_WP",
-        "Visiting_BK",
-        "Visiting_PO",
-        "Visiting_A",
-        "Visiting_E",
-        "Visiting_PassedBall",
-        "Visiting_DP",
-        "Visiting_TP",
-        "Home_AB",
-        "Home_B1",
-        "Home_B2",
-        "Home_B3",
-        "Home_HR",
-        "Home_RBI",
-        "Home_SH",
-        "Home_SF",
-        "Home_HBP",
-        "Home_BB",
-        "Home_IBB",
-        "Home_K",
-        "Home_SB",
-        "Home_CS",
-        "Home_GDP",
-        "Home_INT",
-        "Home_LOB",
-        "Home_PitchersUsed",
-        "Home_IndividualER",
-        "Home_TeamER",
-        "Home_WP",
-        "Home_BK",
-        "Home_PO",
-        "Home_A",
-        "Home_E",
-        "Home_PassedBall",
-        "Home_DP",
-        "Home_TP",
-        "HP_UmpireID",
-        "HP_UmpireName",
-        "B1_UmpireID",
-        "B1_UmpireName",
-        "B2_UmpireID",
-        "B2_UmpireName",
-        "B3_UmpireID",
-        "B3_UmpireName",
-        "LF_UmpireID",
-        "LF_UmpireName",
-        "RF_UmpireID",
-        "RF_UmpireName",
-        "Visiting_ManagerID",
-        "Visiting_ManagerName",
-        "Home_ManagerID",
-        "Home_ManagerName",
-        "WinningPitcherID",
-        "WinningPitcherName",
-        "LosingPitcherID",
-        "LosingPitcherName",
-        "SavingPitcherID",
-        "SavingPitcherName",
-        "GameWinRBIID",
-        "GameWinRBIName",
-        "Visiting_StartingPID",
-        "Visiting_StartingPName",
-        "Home_StartingPID",
-        "Home_StartingPName",
-        "Visiting_Batter1ID",
-        "Visiting_Batter1Name",
-        "Visiting_Batter1Pos",
-        "Visiting_Batter2ID",
-        "Visiting_Batter2Name",
-        "Visiting_Batter2Pos",
-        "Visiting_Batter3ID",
-        "Visiting_Batter3Name",
-        "Visiting_Batter3Pos",
-        "Visiting_Batter4ID",
-        "Visiting_Batter4Name",
-        "Visiting_Batter4Pos",
-        "Visiting_Batter5ID",
-        "Visiting_Batter5Name",
-        "Visiting_Batter5Pos",
-        "Visiting_Batter6ID",
-        "Visiting_Batter6Name",
-        "Visiting_Batter6Pos",
-        "Visiting_Batter7ID",
-        "Visiting_Batter7Name",
-        "Visiting_Batter7Pos",
-        "Visiting_Batter8ID",
-        "Visiting_Batter8Name",
-        "Visiting_Batter8Pos",
-        "Visiting_Batter9ID",
-        "Visiting_Batter9Name",
-        "Visiting_Batter9Pos",
-        "Home_Batter1ID",
-        "Home_Batter1Name",
-        "Home_Batter1Pos",
-        "Home_Batter2ID",
-        "Home_Batter2Name",
-        "Home_Batter2Pos",
-        "Home_Batter3ID",
-        "Home_Batter3Name",
-        "Home_Batter3Pos",
-        "Home_Batter4ID",
-        "Home_Batter4Name",
-        "Home_Batter4Pos",
-        "Home_Batter5ID",
-        "Home_Batter5Name",
-        "Home_Batter5Pos",
-        "Home_Batter6ID",
-        "Home_Batter6Name",
-        "Home_Batter6Pos",
-        "Home_Batter7ID",
-        "Home_Batter7Name",
-        "Home_Batter7Pos",
-        "Home_Batter8ID",
-        "Home_Batter8Name",
-        "Home_Batter8Pos",
-        "Home_Batter9ID",
-        "Home_Batter9Name",
-        "Home_Batter9Pos",
-        "AdditionalInformation",
-        "AcquisitionInformation",
-    ]
+    manifest = manifest_partitions(session, "gamelog")
+    partition = str(year)
+    is_open = year >= datetime.now().year
+    if skip_partition(manifest, partition, refresh, is_open):
+        count(partitions_skipped=1)
+        return 0
 
     def _fix_date(dt_string):
         """
@@ -207,46 +259,125 @@ def populate_game_log(year, game_type, session, auto_commit=True):
             day=int(dt_string[6:8]),
         )
 
-    url = "https://www.retrosheet.org/gamelogs/gl{}.zip".format(year)
-    res = requests.get(url)
-    data = _unzip_content(res.content)
-    rs_file = data.read(data.namelist()[0])
-    df = pd.read_csv(io.BytesIO(rs_file), header=None, names=rs_columns)
-    df = df.fillna(0)
-
-    # df = cast_fiel_dtypes(df, TeamLineup)
-    df = cast_fiel_dtypes(df, GameLog)
-
-    # Fix game date columns
-    df["Date"] = df["Date"].apply(_fix_date)
-
-    # Get list of UIDs in db
-    query = session.query(TeamLineup.UID).all()
-    UIDs = [x[0] for x in query]
-
-    for _, row in df.iterrows():
-        game = GameLog(row)
-        session.add(game)
-        hlu = TeamLineup(game, "Home")
-        vlu = TeamLineup(game, "Visiting")
-        if hlu.UID not in UIDs:
-            session.add(hlu)
-        if vlu.UID not in UIDs:
-            session.add(vlu)
+    url = GAMELOG_URL.format(year)
+    path = get_cache().fetch(url, refresh=refresh or is_open)
+    checksum = payload_checksum(path)
+    if manifest.get(partition) == checksum:
+        count(partitions_skipped=1)
+        return 0
+
+    n_rows = 0
+    n_parsed = 0
+    with _open_archive(path) as data:
+        chunks = pd.read_csv(
+            data.open(data.namelist()[0]),
+            header=None,
+            names=GAMELOG_COLUMNS,
+            dtype=string_dtypes(GameLog, GAMELOG_COLUMNS),
+            chunksize=CSV_CHUNK_ROWS,
+        )
+        for df in timed_iter(chunks, "transform"):
+            count(rows_parsed=len(df))
+            with timed("transform"):
+                # Missing line scores are parsed before they become "0"
+                line_scores = df[["{}LineScore".format(x) for x in LINE_SCORE_SIDES]]
+                df = df.fillna(0)
+
+                # df = cast_fiel_dtypes(df, TeamLineup)
+                df = cast_fiel_dtypes(df, GameLog)
+
+                # Fix game date columns
+                df["Date"] = df["Date"].apply(_fix_date)
+
+                games = frame_to_table(df, GameLog)
+            games["UID"] = GameLog.get_uids(df)
+            n_rows += merge_df(session, GameLog, games)
+            for side in ["Home", "Visiting"]:
+                merge_df(session, TeamLineup, _lineup_frame(df, side))
+            merge_df(session, LineupSlot, lineup_slots_frame(df, games["UID"]))
+            merge_df(
+                session, GameInningRuns, inning_runs_frame(line_scores, games["UID"])
+            )
+            n_parsed += len(df)
+    update_manifest(session, "gamelog", partition, n_parsed, checksum)
+    count(partitions_loaded=1)
 
     if auto_commit:
-        session.commit()
+        with timed("flush"):
+            session.commit()
+
+    return n_rows
 
 
-def populate_team_roster(year, session, auto_commit=True):
+def _lineup_frame(df: pd.DataFrame, side: str) -> pd.DataFrame:
     """
-    Populates the team roster table with data from team for the season year
+    Pulls one side's starting lineup out of a frame of game logs
+    """
+    props = ["StartingPID"] + [
+        "Batter{}{}".format(i, x) for i in range(1, 10) for x in ["ID", "Pos"]
+    ]
+    lineups = df[["{}_{}".format(side, x) for x in props]]
+    lineups.columns = props
+    lineups = lineups.assign(
+        parkid=df["ParkID"],
+        team=df["{}Team".format(side)],
+        UID=TeamLineup.get_uids(df, side),
+    )
+    return lineups
 
-    team is the 3 letter RS team code
+
+def lineup_slots_frame(df: pd.DataFrame, uids: pd.Series) -> pd.DataFrame:
     """
+    Reshapes the starting lineups of a frame of game logs into one row per game,
+    side and lineup slot, see LineupSlot. Slot 0 is the starting pitcher
+    :param df: Game logs, after the dtypes are cast
+    :type class: 'pd.DataFrame', required
+    :param uids: GameLog UIDs of the games, with the same index as df
+    :type class: 'pd.Series', required
+    """
+    n_slots = len(LINEUP_SLOTS)
+    with timed("transform"):
+        ids = ["{}_{}".format(s, x) for s in LINE_SCORE_SIDES for x, _ in LINEUP_SLOTS]
+        positions = [
+            df["{}_{}".format(s, x)] if x is not None else pd.Series(1, df.index)
+            for s in LINE_SCORE_SIDES
+            for _, x in LINEUP_SLOTS
+        ]
+        teams = df[["{}Team".format(x) for x in LINE_SCORE_SIDES]].to_numpy()
+        # Row major, so every game's slots stay together
+        slots = pd.DataFrame(
+            {
+                "game_uid": np.repeat(uids.to_numpy(), 2 * n_slots),
+                "game_date": np.repeat(df["Date"].to_numpy(), 2 * n_slots),
+                "side": np.tile(np.repeat(LINE_SCORE_SIDES, n_slots), len(df)),
+                "team": np.repeat(teams, n_slots, axis=1).ravel(),
+                "slot": np.tile(np.arange(n_slots), 2 * len(df)),
+                "player_id": df[ids].to_numpy().ravel(),
+                "position": np.column_stack(positions).ravel(),
+            }
+        )
+        # Empty slots were filled with 0 before the dtypes were cast, which leaves
+        # either the number or the text in the column
+        ids = slots["player_id"]
+        slots = slots[ids.notna() & ~ids.astype(str).isin(["0", ""])]
+    slots["UID"] = LineupSlot.get_uids(slots)
+    return slots
 
-    query = session.query(TeamRoster.UID).all()
-    UIDs = [x[0] for x in query]
+
+def populate_team_roster(year, session, auto_commit=True, refresh=False):
+    """
+    Populates the team roster table with data from team for the season year.
+    Seasons already recorded in the ingest manifest are skipped unless refresh is True
+    or the season is still being played.
+
+    team is the 3 letter RS team code
+    """
+    manifest = manifest_partitions(session, "roster")
+    partition = str(year)
+    is_open = year >= datetime.now().year
+    if skip_partition(manifest, partition, refresh, is_open):
+        count(partitions_skipped=1)
+        return 0
 
     roster_cols = [
         "rs_id",
@@ -257,39 +388,313 @@ def populate_team_roster(year, session, auto_commit=True):
         "team",
         "position",
     ]
-    base_url = "https://www.retrosheet.org/events/{}eve.zip"
-    res = requests.get(base_url.format(str(year)))
-    data = _unzip_content(res.content)
-    file_list = data.namelist()
-
-    for f_name in [x for x in file_list if x[-3:] == "ROS"]:
-        df = pd.read_csv(
-            io.BytesIO(data.read(f_name)), header=None, names=roster_cols
-        )
-        df["year"] = year
-        for _, row in df.iterrows():
-            roster = TeamRoster(row)
-            if roster.UID not in UIDs:
-                session.add(roster)
-                UIDs.append(roster.UID)
+    url = EVENTS_URL.format(year)
+    path = get_cache().fetch(url, refresh=refresh or is_open)
+    checksum = payload_checksum(path)
+    if manifest.get(partition) == checksum:
+        count(partitions_skipped=1)
+        return 0
+
+    n_rows = 0
+    n_parsed = 0
+    with _open_archive(path) as data:
+        # Only the .ROS members are opened, the event files are never read
+        for f_name in [x for x in data.namelist() if x[-3:] == "ROS"]:
+            chunks = pd.read_csv(
+                data.open(f_name),
+                header=None,
+                names=roster_cols,
+                dtype=str,
+                chunksize=CSV_CHUNK_ROWS,
+            )
+            for df in timed_iter(chunks, "transform"):
+                count(rows_parsed=len(df))
+                df["year"] = year
+                df["UID"] = TeamRoster.get_uids(df)
+                n_rows += merge_df(
+                    session, TeamRoster, frame_to_table(df, TeamRoster)
+                )
+                n_parsed += len(df)
+    update_manifest(session, "roster", partition, n_parsed, checksum)
+    count(partitions_loaded=1)
 
     if auto_commit:
-        session.commit()
+        with timed("flush"):
+            session.commit()
+
+    return n_rows
 
 
 def get_line_score(game_row: pd.Series, side="Home"):
     """
-    Parses out the line score for a given side and returns a list
+    Parses out the line score for a given side and returns a list of the runs
+    scored in every inning that was played
     :param game_row: The full row of game data from the GameLog table
     :type class: 'pd.Series', required
     :param side: The side of the game to return
     :type ["Home", "Visiting"], required
     """
-    raise NotImplementedError("yeah")
-    # line_string = game_row["{}LineScore".format(side)]
-    # score_list = []
-    # for char in line_string:
-    #     score_list.append(char)
+    if side not in LINE_SCORE_SIDES:
+        raise ValueError(f"{side} not recognized as a valid parameter")
+    line_string = game_row["{}LineScore".format(side)]
+    return [
+        int(x.group("paren") or x.group("digit"))
+        for x in re.finditer(LINE_SCORE_PATTERN, str(line_string))
+        if x.group("unplayed") is None
+    ]
+
+
+def inning_runs_frame(line_scores: pd.DataFrame, uids: pd.Series) -> pd.DataFrame:
+    """
+    Parses the line scores of a whole frame of game logs at once into one row per
+    game, side and inning played, see GameInningRuns
+    :param line_scores: The VisitingLineScore and HomeLineScore columns
+    :type class: 'pd.DataFrame', required
+    :param uids: GameLog UIDs of the games, with the same index as line_scores
+    :type class: 'pd.Series', required
+    """
+    frames = []
+    with timed("transform"):
+        for side in LINE_SCORE_SIDES:
+            scores = line_scores["{}LineScore".format(side)].dropna().astype(str)
+            innings = scores.str.extractall(LINE_SCORE_PATTERN)
+            innings = innings[innings["unplayed"].isna()]
+            # Innings are numbered by their position in the line score
+            games = innings.index.get_level_values(0)
+            frames.append(
+                pd.DataFrame(
+                    {
+                        "game_uid": uids.loc[games].to_numpy(),
+                        "side": side,
+                        "inning": innings.index.get_level_values(1) + 1,
+                        "runs": innings["paren"]
+                        .fillna(innings["digit"])
+                        .astype(int)
+                        .to_numpy(),
+                    }
+                )
+            )
+        runs = pd.concat(frames, ignore_index=True)
+    runs["UID"] = GameInningRuns.get_uids(runs)
+    return runs
+
+
+def populate_inning_runs(session, auto_commit=True) -> int:
+    """
+    Fills game_inning_runs for the games in game_log that have no innings yet,
+    e.g. seasons loaded before the table existed. Returns the number of rows added
+    """
+    parsed = select(GameInningRuns.game_uid).distinct()
+    query = select(
+        GameLog.UID, GameLog.VisitingLineScore, GameLog.HomeLineScore
+    ).where(GameLog.UID.not_in(parsed))
+    with timed("fetch"):
+        games = pd.read_sql(query, session.connection())
+    if len(games) == 0:
+        return 0
+    n_rows = merge_df(session, GameInningRuns, inning_runs_frame(games, games["UID"]))
+    if auto_commit:
+        with timed("flush"):
+            session.commit()
+    return n_rows
+
+
+def populate_lineup_slots(session, auto_commit=True) -> int:
+    """
+    Fills lineup_slots for the games in game_log that have no lineups yet, e.g.
+    seasons loaded before the table existed. Returns the number of rows added
+    """
+    fields = [x for slot in LINEUP_SLOTS for x in slot if x is not None]
+    columns = (
+        ["UID", "Date"]
+        + ["{}Team".format(s) for s in LINE_SCORE_SIDES]
+        + ["{}_{}".format(s, x) for s in LINE_SCORE_SIDES for x in fields]
+    )
+    loaded = select(LineupSlot.game_uid).distinct()
+    query = select(*[GameLog.__table__.c[x] for x in columns]).where(
+        GameLog.UID.not_in(loaded)
+    )
+    with timed("fetch"):
+        games = pd.read_sql(query, session.connection(), parse_dates=["Date"])
+    if len(games) == 0:
+        return 0
+    n_rows = merge_df(session, LineupSlot, lineup_slots_frame(games, games["UID"]))
+    if auto_commit:
+        with timed("flush"):
+            session.commit()
+    return n_rows
+
+
+def lineup_starts(
+    session, player_id=None, team=None, slot=None, start_dt=None, end_date=None
+) -> pd.DataFrame:
+    """
+    Lineup slots matching every given filter, e.g. all the games a player started
+    in the cleanup spot, lineup_starts(session, "troum001", slot=4), or a team's
+    lineups for sampling, lineup_starts(session, team="ANA", start_dt=...).
+    Reads through the player or the team index of lineup_slots
+    """
+    query = select(LineupSlot.__table__)
+    if player_id is not None:
+        query = query.where(LineupSlot.player_id == player_id)
+    if team is not None:
+        query = query.where(LineupSlot.team == team)
+    if slot is not None:
+        query = query.where(LineupSlot.slot == slot)
+    if start_dt is not None:
+        query = query.where(LineupSlot.game_date >= start_dt)
+    if end_date is not None:
+        query = query.where(LineupSlot.game_date <= end_date)
+    query = query.order_by(LineupSlot.game_date, LineupSlot.game_uid, LineupSlot.side)
+    return pd.read_sql(query, session.connection(), parse_dates=["game_date"])
+
+
+def inning_run_distribution(session, side=None) -> pd.DataFrame:
+    """
+    Number of half innings that scored each number of runs, by inning. Reads
+    nothing but the inning index of game_inning_runs
+    :param side: Only count the "Home" or "Visiting" half innings
+    :type str, optional
+    """
+    query = select(
+        GameInningRuns.inning,
+        GameInningRuns.runs,
+        func.count().label("n_innings"),
+    ).group_by(GameInningRuns.inning, GameInningRuns.runs)
+    if side is not None:
+        query = query.where(GameInningRuns.side == side)
+    query = query.order_by(GameInningRuns.inning, GameInningRuns.runs)
+    return pd.read_sql(query, session.connection())
+
+
+def populate_game_crosswalk(session, auto_commit=True, refresh=False) -> int:
+    """
+    Links the statcast game_pks to their game_log rows, see GameCrosswalk. Only the
+    days of statcast loaded since the last run, and the seasons whose game logs
+    arrived since then, are matched again. Games that have no game log yet are
+    picked up once it arrives. Returns the number of games linked.
+    :param session: Sqlalchemy session
+    :type class: 'sqlalchemy.orm.Session', required
+    :param refresh: Match every game again
+    :type bool, optional
+    """
+    statcast = manifest_partitions(session, "statcast")
+    gamelogs = manifest_partitions(session, "gamelog")
+    done = manifest_partitions(session, "game_crosswalk")
+
+    since = None
+    if not refresh and len(done) > 0:
+        pending = [d for d, c in statcast.items() if done.get(d) != c]
+        if len(statcast) > 0:
+            # Open days are reloaded without a manifest entry
+            pending.append(
+                (pd.Timestamp(max(statcast)) + timedelta(days=1)).strftime("%Y-%m-%d")
+            )
+        pending += [f"{y}-01-01" for y, c in gamelogs.items() if done.get(y) != c]
+        since = pd.Timestamp(min(pending)).to_pydatetime() if pending else None
+        if since is None:
+            return 0
+    if refresh:
+        with timed("flush"):
+            session.execute(GameCrosswalk.__table__.delete())
+
+    pitches = StatcastPitching.__table__
+    linked = select(GameCrosswalk.game_pk)
+    with timed("fetch"):
+        query = (
+            select(pitches.c.game_pk, pitches.c.game_date, pitches.c.home_team)
+            .distinct()
+            .where(pitches.c.game_pk.not_in(linked))
+            # Spring training and exhibition games have no game log
+            .where(pitches.c.game_type == "R")
+        )
+        if since is not None:
+            query = query.where(pitches.c.game_date >= since)
+        games = pd.read_sql(query, session.connection(), parse_dates=["game_date"])
+    count(rows_parsed=len(games))
+
+    n_rows = 0
+    if len(games) > 0:
+        with timed("fetch"):
+            columns = ["UID", "Date", "HomeTeam", "GameSeriesNumber"]
+            logs = pd.read_sql(
+                select(*[GameLog.__table__.c[x] for x in columns]).where(
+                    GameLog.Date >= games["game_date"].min().to_pydatetime(),
+                    GameLog.Date <= games["game_date"].max().to_pydatetime(),
+                ),
+                session.connection(),
+                parse_dates=["Date"],
+            )
+            teams = pd.read_sql(
+                select(Teams.mlbam_abbrev, Teams.rs_abbrev), session.connection()
+            )
+        crosswalk = game_crosswalk_frame(games, logs, teams)
+        n_rows = merge_df(session, GameCrosswalk, crosswalk, key="game_pk")
+
+    for partition, checksum in list(statcast.items()) + list(gamelogs.items()):
+        if done.get(partition) != checksum:
+            update_manifest(session, "game_crosswalk", partition, None, checksum)
+
+    if auto_commit:
+        with timed("flush"):
+            session.commit()
+
+    return n_rows
+
+
+def _doubleheader_numbers(dates, home_teams, order) -> pd.Series:
+    """
+    0 for the only game of a home team on a day, 1, 2, ... by order otherwise, the
+    way Retrosheet numbers doubleheaders
+    """
+    games = order.groupby([dates, home_teams], dropna=False)
+    rank = games.rank(method="first").astype(int)
+    return rank.where(games.transform("size") > 1, 0)
+
+
+def game_crosswalk_frame(
+    games: pd.DataFrame, logs: pd.DataFrame, teams: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Matches statcast games to game logs on the date, the home team and the game of
+    a doubleheader. Statcast games are numbered within a doubleheader by game_pk
+    and game logs by GameSeriesNumber
+    :param games: game_pk, game_date and home_team of statcast_pitching
+    :type class: 'pd.DataFrame', required
+    :param logs: UID, Date, HomeTeam and GameSeriesNumber of game_log
+    :type class: 'pd.DataFrame', required
+    :param teams: mlbam_abbrev and rs_abbrev of every team
+    :type class: 'pd.DataFrame', required
+    """
+    with timed("transform"):
+        # Every pitch carries the game keys, keep one row per game
+        games = games.drop_duplicates("game_pk")
+        codes = dict(zip(teams["mlbam_abbrev"], teams["rs_abbrev"]))
+        games = pd.DataFrame(
+            {
+                "game_pk": games["game_pk"].astype(int),
+                "game_date": games["game_date"].dt.normalize(),
+                # Codes missing from Teams are assumed to be Retrosheet's already
+                "home_team": games["home_team"].map(codes).fillna(games["home_team"]),
+            }
+        )
+        games["game_number"] = _doubleheader_numbers(
+            games["game_date"], games["home_team"], games["game_pk"]
+        )
+
+        logs = pd.DataFrame(
+            {
+                "game_uid": logs["UID"],
+                "game_date": logs["Date"].dt.normalize(),
+                "home_team": logs["HomeTeam"],
+                "series": logs["GameSeriesNumber"],
+            }
+        )
+        logs["game_number"] = _doubleheader_numbers(
+            logs["game_date"], logs["home_team"], logs["series"]
+        )
+        crosswalk = games.merge(logs, on=["game_date", "home_team", "game_number"])
+    return crosswalk[[x.name for x in GameCrosswalk.__table__.columns]]
 
 
 class GameLog(declarative_base()):
@@ -303,6 +708,7 @@ class GameLog(declarative_base()):
     """
 
     __tablename__ = "game_log"
+    __table_args__ = (Index("ix_game_log_date_home", "Date", "HomeTeam"),)
     # TODO: Need a better primary key for game log
     id = Column(Integer, Sequence("game_id_seq"), primary_key=True)
     UID = Column(String(50), unique=True)
@@ -492,6 +898,88 @@ class GameLog(declarative_base()):
 
         return hashlib.md5(hash_str).hexdigest()
 
+    @classmethod
+    def get_uids(cls, df: pd.DataFrame) -> pd.Series:
+        """
+        Vectorized get_uid for a frame of game logs
+        """
+        return hash_columns(
+            df, ["Date", "GameSeriesNumber", "HomeTeam", "VisitingTeam"]
+        )
+
+
+class LineupSlot(declarative_base()):
+    """
+    One row per game, side and slot of the starting lineups in GameLog. Slot 0 is
+    the starting pitcher, slots 1 to 9 the batting order
+
+    UID is md5 hash of game_uid, side and slot
+    """
+
+    __tablename__ = "lineup_slots"
+    __table_args__ = (
+        Index("ix_lineup_slots_player", "player_id", "slot"),
+        Index("ix_lineup_slots_team", "team", "game_date"),
+    )
+    UID = Column(String(32), primary_key=True)
+    game_uid = Column(String(50))
+    game_date = Column(DateTime)
+    side = Column(String(8))
+    team = Column(String(3))
+    slot = Column(Integer)
+    player_id = Column(String(8))
+    position = Column(Integer)
+
+    @classmethod
+    def get_uids(cls, df: pd.DataFrame) -> pd.Series:
+        """
+        Vectorized UIDs for a frame of lineup slots
+        """
+        return hash_columns(df, ["game_uid", "side", "slot"])
+
+
+class GameCrosswalk(declarative_base()):
+    """
+    Links a statcast game_pk to its GameLog row. Built from the date, the home team
+    (through the Teams abbreviations) and the game of a doubleheader, see
+    populate_game_crosswalk. home_team is the Retrosheet code
+    """
+
+    __tablename__ = "game_crosswalk"
+    __table_args__ = (Index("ix_game_crosswalk_game_uid", "game_uid"),)
+    game_pk = Column(Integer, primary_key=True, autoincrement=False)
+    game_uid = Column(String(50))
+    game_date = Column(DateTime)
+    home_team = Column(String(3))
+    game_number = Column(Integer)
+
+
+class GameInningRuns(declarative_base()):
+    """
+    Runs scored by each side in every inning of a game, parsed from the line
+    scores of GameLog. Extra innings are kept, unplayed half innings are not
+
+    UID is md5 hash of game_uid, side and inning
+    """
+
+    __tablename__ = "game_inning_runs"
+    __table_args__ = (
+        # Covers the run distribution queries, see inning_run_distribution
+        Index("ix_game_inning_runs_inning", "inning", "side", "runs"),
+        Index("ix_game_inning_runs_game", "game_uid"),
+    )
+    UID = Column(String(32), primary_key=True)
+    game_uid = Column(String(50))
+    side = Column(String(8))
+    inning = Column(Integer)
+    runs = Column(Integer)
+
+    @classmethod
+    def get_uids(cls, df: pd.DataFrame) -> pd.Series:
+        """
+        Vectorized UIDs for a frame of innings
+        """
+        return hash_columns(df, ["game_uid", "side", "inning"])
 
 
 class TeamLineup(declarative_base()):
@@ -504,7 +992,7 @@ class TeamLineup(declarative_base()):
     __tablename__ = "team_lineups"
     UID = Column(String(32), index=True, primary_key=True, unique=True)
     parkid = Column(String(5))
-    team = String(3)
+    team = Column(String(3))
     StartingPID = Column(String(8))
     Batter1ID = Column(String(8))
     Batter1Pos = Column(Integer)
@@ -542,14 +1030,14 @@ class TeamLineup(declarative_base()):
         self.Batter1Pos = self._get_prop("Batter1Pos")
         self.Batter2ID = self._get_prop("Batter2ID")
         self.Batter2Pos = self._get_prop("Batter2Pos")
-        self.Batter3ID = self._get_prop("Batter9Pos")
-        self.Batter3Pos = self._get_prop("Batter9Pos")
+        self.Batter3ID = self._get_prop("Batter3ID")
+        self.Batter3Pos = self._get_prop("Batter3Pos")
         self.Batter4ID = self._get_prop("Batter4ID")
         self.Batter4Pos = self._get_prop("Batter4Pos")
         self.Batter5ID = self._get_prop("Batter5ID")
         self.Batter5Pos = self._get_prop("Batter5Pos")
         self.Batter6ID = self._get_prop("Batter6ID")
-        self.Batter6Pos = self._get_prop("Batter9Pos")
+        self.Batter6Pos = self._get_prop("Batter6Pos")
         self.Batter7ID = self._get_prop("Batter7ID")
         self.Batter7Pos = self._get_prop("Batter7Pos")
         self.Batter8ID = self._get_prop("Batter8ID")
@@ -574,6 +1062,17 @@ class TeamLineup(declarative_base()):
 
         return hashlib.md5(hash_str).hexdigest()
 
+    @classmethod
+    def get_uids(cls, glog_df: pd.DataFrame, side: str) -> pd.Series:
+        """
+        Vectorized get_uid for one side of a frame of game logs
+        """
+        if side not in ["Home", "Visiting"]:
+            raise ValueError(f"{side} not recognized as a valid parameter")
+        return hash_columns(
+            glog_df, ["Date", "GameSeriesNumber", "{}Team".format(side)]
+        )
+
     def _get_prop(self, prop_string):
         return self._glog.__dict__["{}_{}".format(self.side, prop_string)]
 
@@ -619,3 +1118,14 @@ class TeamRoster(declarative_base()):
             .encode("utf-8")
         )
         return hashlib.md5(hash_str).hexdigest()
+
+    @classmethod
+    def get_uids(cls, df: pd.DataFrame) -> pd.Series:
+        """
+        Vectorized _get_uid for a frame of roster rows
+        """
+        return hash_columns(
+            df,
+            ["team", "year", "name_first", "name_last", "bats", "throws"],
+            strip_dots=True,
+        )
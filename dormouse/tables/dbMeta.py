@@ -1,14 +1,104 @@
 import hashlib
 import os
+from datetime import datetime
 
 import pandas as pd
 from sqlalchemy import Column, Date, DateTime, Float, Integer, Sequence, String
 from sqlalchemy.ext.declarative import declarative_base
 
-from dormouse.extras.utils import clean_db_col_names, native_dtype
+from dormouse.extras.bulk import merge_df
+from dormouse.extras.metrics import count, timed
+from dormouse.extras.utils import (
+    clean_db_col_names,
+    hash_columns,
+    native_dtype,
+    payload_checksum,
+)
 
 
-def populate_team_data(session, auto_commit=True):
+def manifest_partitions(session, source) -> dict:
+    """
+    Returns {partition: checksum} for every partition of a source that has been loaded
+    :param session: Sqlalchemy session
+    :type class: 'sqlalchemy.orm.Session', required
+    :param source: One of "statcast", "gamelog", "retrosplits", "roster", "register", "teams"
+    :type str, required
+    """
+    IngestManifest.__table__.create(bind=session.connection(), checkfirst=True)
+    query = (
+        session.query(IngestManifest.partition, IngestManifest.checksum)
+        .filter(IngestManifest.source == source)
+        .all()
+    )
+    return {x[0]: x[1] for x in query}
+
+
+def skip_partition(manifest: dict, partition, refresh=False, is_open=False):
+    """
+    True when a partition is already loaded and does not need to be fetched again.
+    Open partitions (e.g. the season currently being played) are always re-checked
+    :param manifest: Output of manifest_partitions
+    :type dict, required
+    :param partition: The partition key
+    :type str, required
+    :param refresh: Re-check every partition
+    :type bool, optional
+    :param is_open: The source is still being updated
+    :type bool, optional
+    """
+    return not (refresh or is_open) and partition in manifest
+
+
+def update_manifest(session, source, partition, row_count, checksum):
+    """
+    Record that a partition of a source was loaded
+    """
+    entry = IngestManifest(
+        source=source,
+        partition=partition,
+        loaded_at=datetime.now(),
+        row_count=row_count,
+        checksum=checksum,
+    )
+    entry.UID = entry.get_uid()
+    session.merge(entry)
+
+
+def journal_units(session) -> dict:
+    """
+    Returns {unit: status} for every unit in the build journal
+    """
+    BuildJournal.__table__.create(bind=session.connection(), checkfirst=True)
+    query = session.query(BuildJournal.unit, BuildJournal.status).all()
+    return {x[0]: x[1] for x in query}
+
+
+def record_unit(session, unit, status, error=None):
+    """
+    Record the outcome of a build unit, "done" or "failed", and commit it right away
+    so the journal survives a crash
+    """
+    entry = BuildJournal(unit=unit)
+    entry.UID = entry.get_uid()
+    previous = session.get(BuildJournal, entry.UID)
+    entry.attempts = (previous.attempts if previous is not None else 0) + 1
+    entry.status = status
+    entry.error = None if error is None else repr(error)[:500]
+    entry.updated_at = datetime.now()
+    session.merge(entry)
+    session.commit()
+
+
+def clear_journal(session):
+    """
+    Forget every unit, used when a build is started from scratch
+    """
+    BuildJournal.__table__.create(bind=session.connection(), checkfirst=True)
+    session.query(BuildJournal).delete()
+    session.commit()
+
+
+def populate_team_data(session, auto_commit=True, refresh=False):
 
     team_df = pd.DataFrame.from_dict(
         {
@@ -175,17 +265,22 @@ def populate_team_data(session, auto_commit=True):
         }
     )
 
-    query = session.query(Teams.UID).all()
-    UIDs = [x[0] for x in query]
+    count(rows_parsed=len(team_df))
+    checksum = payload_checksum(team_df)
+    if manifest_partitions(session, "teams").get("all") == checksum and not refresh:
+        count(partitions_skipped=1)
+        return 0
 
-    for _, row in team_df.iterrows():
-        team = Teams(row)
-        if team.UID not in UIDs:
-            session.add(team)
-            UIDs.append(team.UID)
+    team_df["UID"] = Teams.get_uids(team_df)
+    n_rows = merge_df(session, Teams, team_df)
+    update_manifest(session, "teams", "all", len(team_df), checksum)
+    count(partitions_loaded=1)
 
     if auto_commit:
-        session.commit()
+        with timed("flush"):
+            session.commit()
+
+    return n_rows
 
 
 class Teams(declarative_base()):
@@ -215,3 +310,49 @@ class Teams(declarative_base()):
             .encode("utf-8")
         )
         return hashlib.md5(hash_str).hexdigest()
+
+    @classmethod
+    def get_uids(cls, df: pd.DataFrame) -> pd.Series:
+        """
+        Vectorized _get_uid for a frame of teams
+        """
+        return hash_columns(df, ["name", "league"], strip_dots=True)
+
+
+class IngestManifest(declarative_base()):
+    """
+    One row per loaded partition of a source (a statcast day, a gamelog season, ...).
+    Lets incremental builds fetch only the partitions that are missing or changed
+    """
+
+    __tablename__ = "ingest_manifest"
+
+    UID = Column(String(32), index=True, primary_key=True, unique=True)
+    source = Column(String(20), index=True)
+    partition = Column(String(20))
+    loaded_at = Column(DateTime)
+    row_count = Column(Integer)
+    checksum = Column(String(32))
+
+    def get_uid(self):
+        hash_str = "".join([str(x) for x in [self.source, self.partition]])
+        return hashlib.md5(hash_str.encode("utf-8")).hexdigest()
+
+
+class BuildJournal(declarative_base()):
+    """
+    One row per unit of a build (a source for a single season) and whether it
+    finished or failed. Lets an interrupted build resume where it stopped
+    """
+
+    __tablename__ = "build_journal"
+
+    UID = Column(String(32), index=True, primary_key=True, unique=True)
+    unit = Column(String(50))
+    status = Column(String(10))
+    attempts = Column(Integer)
+    error = Column(String(500))
+    updated_at = Column(DateTime)
+
+    def get_uid(self):
+        return hashlib.md5(self.unit.encode("utf-8")).hexdigest()
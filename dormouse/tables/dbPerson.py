@@ -1,68 +1,265 @@
 import hashlib
+import os
+import tempfile
 from datetime import datetime, timedelta
 
 import pandas as pd
 import numpy as np
 
-import requests
-
-from sqlalchemy import Column, DateTime, Float, Integer, Sequence, String
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Float,
+    Index,
+    Integer,
+    Sequence,
+    String,
+    func,
+    select,
+)
 from sqlalchemy.ext.declarative import declarative_base
 
 from pybaseball import statcast
-from pybaseball.playerid_lookup import get_lookup_table
 
 
-from dormouse.extras.pybb import retro_day_stats, single_player_batting_stats
+from dormouse.extras.bulk import bulk_load_df, frame_to_table, merge_df
+from dormouse.extras.cache import cached_frame, get_cache
+from dormouse.extras.crosswalk import IdCrosswalk
+from dormouse.extras.fetch import (
+    PartialFetchError,
+    TokenBucket,
+    fetch_ordered,
+    retry_call,
+)
+from dormouse.extras.metrics import count, timed, timed_iter
+from dormouse.extras.columnar import select_arrow, to_numpy
+from dormouse.extras.pitchstore import PitchStore
+from dormouse.extras.partitions import (
+    ensure_partitions,
+    keep_rows_outside,
+    partition_info,
+    partition_ranges,
+    staging_table,
+    swap_partition,
+)
+from dormouse.extras.parquet import (
+    mirror_filter,
+    mirror_table,
+    read_mirror,
+    write_partition_file,
+)
+from dormouse.extras.pybb import (
+    chadwick_register,
+    retro_day_chunks,
+    retro_day_path,
+)
 from dormouse.extras.utils import (
     clean_db_col_names,
     get_col_min_max,
     native_dtype,
-    space_out_req,
     cast_fiel_dtypes,
+    hash_columns,
+    payload_checksum,
+)
+from dormouse.tables.dbMeta import (
+    manifest_partitions,
+    skip_partition,
+    update_manifest,
 )
 
 _BASE = declarative_base()
 
+# Number of days before a statcast day is considered final
+STATCAST_OPEN_DAYS = 3
+# (month, day) bounds of the days fetched when a whole season is reloaded
+STATCAST_SEASON = [(3, 1), (11, 30)]
+# Source cache key of a single statcast day
+STATCAST_CACHE_KEY = "statcast:{}"
+# Partition columns of the statcast parquet mirror
+STATCAST_PARQUET_PARTITIONS = ["game_year", "month"]
+# Columns read by pitch_arrays when none are given
+ARSENAL_COLUMNS = [
+    "pitcher",
+    "pitch_type",
+    "release_speed",
+    "plate_x",
+    "plate_z",
+    "pfx_x",
+    "pfx_z",
+]
+# Id systems of the player crosswalk, see load_crosswalk
+CROSSWALK_KEYS = ["key_mlbam", "key_retro", "key_bbref", "key_fangraphs"]
+# Source cache key of the crosswalk built from a version of the register
+CROSSWALK_CACHE_KEY = "crosswalk:{}"
+# Fields of a PitchStore built by load_pitch_store
+PITCH_STORE_COLUMNS = ARSENAL_COLUMNS + [
+    "game_pk",
+    "game_date",
+    "batter",
+    "at_bat_number",
+    "pitch_number",
+    "inning",
+    "balls",
+    "strikes",
+    "outs_when_up",
+    "on_1b",
+    "on_2b",
+    "on_3b",
+    "stand",
+    "p_throws",
+    "player_name",
+    "events",
+    "description",
+    "bb_type",
+    "zone",
+    "effective_speed",
+    "release_spin_rate",
+    "release_extension",
+    "launch_speed",
+    "launch_angle",
+    "estimated_woba_using_speedangle",
+]
+# Keys of a pitch mix distribution, and the pitch fields averaged for every pitch type
+PITCH_MIX_KEYS = ["pitcher", "season", "balls", "strikes", "stand"]
+PITCH_MIX_MEANS = ["release_speed", "plate_x", "plate_z", "pfx_x", "pfx_z"]
+# Windows of player_form, {name: (kind, size)}. "days" windows cover the calendar
+# days up to the date, "games" and "starts" the last game days or starts
+FORM_WINDOWS = {
+    "7d": ("days", 7),
+    "15d": ("days", 15),
+    "30d": ("days", 30),
+    "5gs": ("starts", 5),
+}
+# Counting stats summed over every form window
+FORM_STATS = [
+    "B_G",
+    "B_PA",
+    "B_AB",
+    "B_R",
+    "B_H",
+    "B_TB",
+    "B_2B",
+    "B_3B",
+    "B_HR",
+    "B_RBI",
+    "B_BB",
+    "B_IBB",
+    "B_SO",
+    "B_HP",
+    "B_SF",
+    "B_SB",
+    "B_CS",
+    "P_G",
+    "P_GS",
+    "P_OUT",
+    "P_TBF",
+    "P_H",
+    "P_R",
+    "P_ER",
+    "P_HR",
+    "P_BB",
+    "P_SO",
+    "P_HP",
+    "P_GO",
+    "P_AO",
+    "P_PITCH",
+    "P_STRIKE",
+]
+# Sort order of pitch_arrays, the UID makes it the same for every backend
+PITCH_ORDER = ["pitcher", "game_date", "UID"]
+
 def populate_statcast(
-    start_dt: datetime, end_date: datetime, session, auto_commit=True
+    start_dt: datetime,
+    end_date: datetime,
+    session,
+    auto_commit=True,
+    bulk=False,
+    refresh=False,
+    workers=1,
+    rate=2.0,
+    retries=3,
+    backoff=2.0,
+    parquet_dir=None,
 ):
     """
     Populates the statcast_pitching table with values ranging from start date to end date, inclusively.
+    When bulk is True, each day is written straight into the table (COPY FROM STDIN on
+    PostgreSQL, batched INSERTs elsewhere) instead of building a StatcastPitching object per pitch.
+    Days already recorded in the ingest manifest are skipped unless refresh is True.
+    Up to `workers` days are fetched concurrently, sharing a limit of `rate` requests per second.
+    The days are still written one at a time, in date order.
+    A day that fails to download is retried `retries` times with exponential backoff
+    starting at `backoff` seconds. Days that still fail are left out of the manifest, so
+    the next run picks them up, and a PartialFetchError is raised once every other day
+    has been written.
+    When parquet_dir is given, every day that is loaded is also written to the parquet
+    mirror of the table, see export_statcast.
+    When statcast_pitching is a partitioned table (PostgreSQL only, see
+    dormouse.extras.partitions), the partitions covering the loaded days are created first.
+    Progress is recorded in the active build stage, see dormouse.extras.metrics.
+    Returns the number of rows added.
     # TODO: Make this work with a lst of supplied teams instead of all teams
-    # TODO: Check to see what the earliest and latest dates are in the db. Fill in dates only where needed
     """
+    manifest = manifest_partitions(session, "statcast")
+    if len(manifest) == 0:
+        manifest = _seed_statcast_manifest(session)
+    # Savant keeps correcting the last few days, so they are always re-fetched
+    open_after = _statcast_open_after()
 
-    @space_out_req
-    def _single_day_sc(d):
-        return statcast(start_dt=d)
-
+    dates = []
     date = start_dt
+    while date <= end_date:
+        if not skip_partition(
+            manifest, date.strftime("%Y-%m-%d"), refresh, date >= open_after
+        ):
+            dates.append(date)
+        else:
+            count(partitions_skipped=1)
+        date += timedelta(days=1)
 
-    # Get list of UIDs in db
-    query = (
-        session.query(StatcastPitching.UID)
-        .filter(
-            StatcastPitching.game_date >= start_dt,
-            StatcastPitching.game_date <= end_date,
+    # Get list of UIDs in db for the days that will be loaded. The bulk path
+    # deduplicates inside the database
+    UIDs = set()
+    if not bulk and len(dates) > 0:
+        query = (
+            session.query(StatcastPitching.UID)
+            .filter(
+                StatcastPitching.game_date >= dates[0],
+                StatcastPitching.game_date < dates[-1] + timedelta(days=1),
+            )
+            .all()
         )
-        .all()
-    )
-    UIDs = [x[0] for x in query]
-    while date <= end_date:
+        UIDs = set(x[0] for x in query)
+    if len(dates) > 0:
+        ensure_partitions(session.connection(), StatcastPitching, dates[0], dates[-1])
+
+    def _fetch_day(d):
+        return retry_call(
+            lambda x: _statcast_day(x, refresh, limiter), d, retries, backoff
+        )
+
+    n_rows = 0
+    failed = []
+    limiter = TokenBucket(rate)
+    for date, result in fetch_ordered(_fetch_day, dates, workers):
+        partition = date.strftime("%Y-%m-%d")
         try:
-            df = _single_day_sc(date.strftime("%Y-%m-%d"))
-            df = df.fillna(0)
-            df = cast_fiel_dtypes(df, StatcastPitching)
-            for _, row in df.iterrows():
-                entry = StatcastPitching(row)
-                if entry.UID not in UIDs:
-                    session.add(entry)
-            print(date)
-        except ValueError:
-            print(f"error @ {date}")
+            df = result.result()
+        except Exception as e:
+            print(f"error @ {date}: {e!r}")
+            count(partitions_failed=1)
+            failed.append(partition)
+            continue
 
-        date += timedelta(days=1)
+        count(rows_parsed=len(df))
+        checksum = payload_checksum(df)
+        if manifest.get(partition) != checksum:
+            n_rows += _load_statcast_day(session, df, bulk, UIDs, parquet_dir)
+            count(partitions_loaded=1)
+        else:
+            count(partitions_skipped=1)
+        if date < open_after:
+            update_manifest(session, "statcast", partition, len(df), checksum)
 
         """
         Since the datasets are so large (25 MB / 3 days), we need to commit
@@ -70,67 +267,942 @@ def populate_statcast(
         GB of data in one INSERT statement.
         """
         if auto_commit:
-            session.commit()
+            with timed("flush"):
+                session.commit()
+
+    if len(failed) > 0:
+        raise PartialFetchError("statcast", failed)
+    return n_rows
+
+
+def _statcast_open_after() -> datetime:
+    return datetime.now() - timedelta(days=STATCAST_OPEN_DAYS)
+
+
+def _statcast_day(d: datetime, refresh=False, limiter=None) -> pd.DataFrame:
+    """
+    One day of raw statcast data, from the source cache when possible. Only the
+    requests that actually go to Savant wait for the limiter
+    """
+    day = d.strftime("%Y-%m-%d")
+
+    def _download():
+        if limiter is not None:
+            limiter.acquire()
+        return statcast(start_dt=day)
+
+    return cached_frame(
+        STATCAST_CACHE_KEY.format(day),
+        _download,
+        refresh=refresh or d >= _statcast_open_after(),
+        parse_dates=["game_date"],
+    )
+
+
+def replace_statcast_season(
+    session,
+    season: int,
+    auto_commit=True,
+    refresh=True,
+    workers=1,
+    rate=2.0,
+    retries=3,
+    backoff=2.0,
+) -> int:
+    """
+    Reloads a whole season of a partitioned statcast_pitching table. Each partition
+    of the season is loaded into an empty staging table which then replaces the
+    partition, instead of DELETEing the old rows and merging the new ones into a
+    table that holds every season. Queries keep reading the old rows until the swap.
+    Only the days within STATCAST_SEASON are fetched, the rows of a partition dated
+    outside of them are kept.
+    A partition with a day that fails to download is left untouched, and a
+    PartialFetchError is raised once the rest of the season is replaced.
+    Returns the number of rows loaded into the new partitions.
+    :param season: The season to reload
+    :type int, required
+    :param refresh: Re-download the days instead of reading the source cache
+    :type bool, optional
+    """
+    connection = session.connection()
+    info = partition_info(connection, StatcastPitching)
+    if info is None:
+        raise ValueError("statcast_pitching is not a partitioned table")
+    open_after = _statcast_open_after()
+    limiter = TokenBucket(rate)
+
+    def _fetch_day(d):
+        return retry_call(
+            lambda x: _statcast_day(x, refresh, limiter), d, retries, backoff
+        )
+
+    n_rows = 0
+    failed = []
+    season_start = datetime(season, *STATCAST_SEASON[0])
+    season_end = datetime(season, *STATCAST_SEASON[1])
+    for start, end in partition_ranges(season_start, season_end, info[1]):
+        connection = session.connection()
+        ensure_partitions(connection, StatcastPitching, start, start, info)
+        staging = staging_table(connection, StatcastPitching, start, info)
+        first = max(start, season_start)
+        last = min(end - timedelta(days=1), season_end)
+        days = [first + timedelta(days=x) for x in range((last - first).days + 1)]
+        loaded = {}
+        failed_days = []
+        staged = 0
+        for date, result in fetch_ordered(_fetch_day, days, workers):
+            partition = date.strftime("%Y-%m-%d")
+            try:
+                df = result.result()
+            except Exception as e:
+                print(f"error @ {date}: {e!r}")
+                count(partitions_failed=1)
+                failed_days.append(partition)
+                continue
+            count(rows_parsed=len(df))
+            if len(df) > 0:
+                with timed("transform"):
+                    frame = _statcast_frame(
+                        cast_fiel_dtypes(df.fillna(0), StatcastPitching)
+                    )
+                    # The same pitch can show up twice in a day of raw data
+                    frame = frame.drop_duplicates("UID")
+                staged += bulk_load_df(session, staging, frame)
+            loaded[partition] = (len(df), payload_checksum(df))
+
+        if len(failed_days) > 0:
+            failed += failed_days
+            staging.drop(session.connection())
+            continue
+        with timed("flush"):
+            # e.g. the winter months of a year partition
+            keep_rows_outside(
+                session.connection(), StatcastPitching, staging, start, first, last, info
+            )
+            swap_partition(session.connection(), StatcastPitching, staging, start, info)
+        n_rows += staged
+        count(partitions_loaded=len(loaded))
+        for partition, (rows, checksum) in loaded.items():
+            if datetime.strptime(partition, "%Y-%m-%d") < open_after:
+                update_manifest(session, "statcast", partition, rows, checksum)
+        if auto_commit:
+            with timed("flush"):
+                session.commit()
+
+    if len(failed) > 0:
+        raise PartialFetchError("statcast", failed)
+    return n_rows
+
+
+def _load_statcast_day(session, df: pd.DataFrame, bulk, UIDs, parquet_dir=None):
+    """
+    Writes one day of raw statcast data, returns the number of new rows
+    """
+    if len(df) == 0:
+        return 0
+
+    with timed("transform"):
+        df = df.fillna(0)
+        df = cast_fiel_dtypes(df, StatcastPitching)
+    frame = _statcast_frame(df) if bulk or parquet_dir is not None else None
+    if parquet_dir is not None:
+        with timed("flush"):
+            mirror_statcast_day(parquet_dir, frame)
+    if bulk:
+        return merge_df(session, StatcastPitching, frame)
 
-    return
+    n_rows = 0
+    with timed("transform"):
+        for _, row in df.iterrows():
+            entry = StatcastPitching(row)
+            if entry.UID not in UIDs:
+                session.add(entry)
+                UIDs.add(entry.UID)
+                n_rows += 1
+    count(rows_inserted=n_rows, rows_skipped=len(df) - n_rows)
+    return n_rows
 
 
-def populate_player_lu(session, auto_commit=True):
+def _seed_statcast_manifest(session) -> dict:
     """
-    Can only do the entire table or no table at all
+    Databases built before the manifest existed already hold statcast days that were never
+    recorded. Every day with at least one pitch in the table is assumed loaded, days in
+    between that have none, e.g. after a failed fetch, are still fetched
     """
-    # From pybaseball
-    lu_df = get_lookup_table()
-    # covnert to correct dtypes
-    lu_df["mlb_played_last"] = (
-        pd.to_numeric(lu_df["mlb_played_last"], errors="coerce")
-        .fillna(0)
-        .astype(np.int64)
+    days = session.query(func.date(StatcastPitching.game_date)).distinct().all()
+    for (day,) in days:
+        if day is None:
+            continue
+        update_manifest(
+            session, "statcast", pd.Timestamp(day).strftime("%Y-%m-%d"), None, None
+        )
+
+    return manifest_partitions(session, "statcast")
+
+
+def _statcast_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converts a raw statcast day into a frame that can be bulk loaded into statcast_pitching
+    """
+    with timed("transform"):
+        df = frame_to_table(
+            df, StatcastPitching, replace_set={"type": "result_type"}
+        )
+        df = df.assign(game_date=pd.to_datetime(df["game_date"]))
+    df["UID"] = StatcastPitching.get_uids(df)
+    return df.drop_duplicates("UID")
+
+
+def mirror_statcast_day(root, df: pd.DataFrame) -> str:
+    """
+    Writes one day of statcast_pitching rows (see _statcast_frame) to the parquet
+    mirror under root/game_year=YYYY/month=M/YYYY-MM-DD.parquet
+    """
+    day = pd.Timestamp(df["game_date"].iloc[0])
+    return write_partition_file(
+        root,
+        StatcastPitching,
+        df,
+        {"game_year": day.year, "month": day.month},
+        day.strftime("%Y-%m-%d"),
     )
-    lu_df["mlb_played_first"] = (
-        pd.to_numeric(lu_df["mlb_played_first"], errors="coerce")
-        .fillna(0)
-        .astype(np.int64)
+
+
+def export_statcast(session, root, refresh=False) -> int:
+    """
+    Brings the parquet mirror of statcast_pitching up to date with the table, one
+    month at a time. Months recorded in the ingest manifest (source "parquet") are
+    skipped unless refresh is True; the current month is always exported again.
+    Returns the number of rows written.
+    :param session: Sqlalchemy session
+    :type class: 'sqlalchemy.orm.Session', required
+    :param root: Root directory of the mirror
+    :type str, required
+    :param refresh: Export every month again
+    :type bool, optional
+    """
+    start, end = get_col_min_max(session, StatcastPitching, "game_date")
+    if start is None:
+        return 0
+
+    manifest = manifest_partitions(session, "parquet")
+    open_after = _statcast_open_after()
+    table = StatcastPitching.__table__
+    n_rows = 0
+    for month in pd.period_range(pd.Timestamp(start), pd.Timestamp(end), freq="M"):
+        month_start = month.start_time.to_pydatetime()
+        month_end = (month + 1).start_time.to_pydatetime()
+        is_open = month_end > open_after
+        if skip_partition(manifest, str(month), refresh, is_open):
+            count(partitions_skipped=1)
+            continue
+
+        with timed("fetch"):
+            df = pd.read_sql(
+                table.select().where(
+                    table.c.game_date >= month_start, table.c.game_date < month_end
+                ),
+                session.connection(),
+            )
+        count(rows_parsed=len(df))
+        with timed("flush"):
+            for _, day in df.groupby(df["game_date"].dt.normalize()):
+                mirror_statcast_day(root, day)
+        n_rows += len(df)
+        if not is_open:
+            update_manifest(session, "parquet", str(month), len(df), None)
+        count(partitions_loaded=1)
+
+    return n_rows
+
+
+def read_statcast(
+    root,
+    columns=None,
+    pitcher=None,
+    batter=None,
+    start_dt=None,
+    end_date=None,
+) -> pd.DataFrame:
+    """
+    Reads pitches from the parquet mirror of statcast_pitching. Only the requested
+    columns are read, and the filters skip whole seasons/months and the row groups
+    that can't match
+    :param root: Root directory of the mirror
+    :type str, required
+    :param columns: Columns to read, all by default
+    :type list, optional
+    :param pitcher: mlbam id(s) of the pitchers to read
+    :type {int, list}, optional
+    :param batter: mlbam id(s) of the batters to read
+    :type {int, list}, optional
+    :param start_dt: First game date to read
+    :type datetime, optional
+    :param end_date: Last game date to read, inclusively
+    :type datetime, optional
+    """
+    return read_mirror(
+        root,
+        StatcastPitching,
+        STATCAST_PARQUET_PARTITIONS,
+        columns=columns,
+        filter=_statcast_mirror_filter(pitcher, batter, start_dt, end_date),
     )
 
-    query = session.query(PlayerLookup.key_mlbam).all()
-    UIDs = [x[0] for x in query]
-    for _, row in lu_df.iterrows():
+
+def _statcast_mirror_filter(pitcher, batter, start_dt, end_date):
+    start_dt = None if start_dt is None else pd.Timestamp(start_dt)
+    end_date = None if end_date is None else pd.Timestamp(end_date)
+    ranges = {
+        "game_date": (
+            start_dt,
+            None if end_date is None else end_date + pd.Timedelta(days=1) - pd.Timedelta(1, "us"),
+        ),
+        "game_year": (
+            None if start_dt is None else start_dt.year,
+            None if end_date is None else end_date.year,
+        ),
+    }
+    return mirror_filter(isin={"pitcher": pitcher, "batter": batter}, ranges=ranges)
+
+
+def pitch_arrays(
+    session,
+    columns=None,
+    pitcher=None,
+    start_dt=None,
+    end_date=None,
+    parquet_dir=None,
+    arrow=False,
+):
+    """
+    Reads pitches as contiguous typed NumPy arrays, {column: ndarray}, sorted by
+    pitcher and game date (see PITCH_ORDER), without building a Python object per pitch. See
+    dormouse.extras.columnar.group_slices to split them into one arsenal per pitcher.
+    The parquet mirror is read when parquet_dir is given, otherwise the database is
+    :param session: Sqlalchemy session, can be None when reading the mirror
+    :type class: 'sqlalchemy.orm.Session', required
+    :param columns: Columns to read, ARSENAL_COLUMNS by default
+    :type list, optional
+    :param pitcher: mlbam id(s) of the pitchers to read
+    :type {int, list}, optional
+    :param start_dt: First game date to read
+    :type datetime, optional
+    :param end_date: Last game date to read, inclusively
+    :type datetime, optional
+    :param parquet_dir: Root directory of the parquet mirror, see export_statcast
+    :type str, optional
+    :param arrow: Return the pyarrow.Table instead of NumPy arrays
+    :type bool, optional
+    """
+    columns = list(columns or ARSENAL_COLUMNS)
+    if parquet_dir is not None:
+        table = mirror_table(
+            parquet_dir,
+            StatcastPitching,
+            STATCAST_PARQUET_PARTITIONS,
+            columns=list(dict.fromkeys(columns + PITCH_ORDER)),
+            filter=_statcast_mirror_filter(pitcher, None, start_dt, end_date),
+        )
+        table = table.sort_by([(x, "ascending") for x in PITCH_ORDER])
+        table = table.select(columns)
+    else:
+        where = []
+        if pitcher is not None:
+            pitchers = pitcher if isinstance(pitcher, (list, tuple, set)) else [pitcher]
+            where.append(StatcastPitching.pitcher.in_(list(pitchers)))
+        if start_dt is not None:
+            where.append(StatcastPitching.game_date >= start_dt)
+        if end_date is not None:
+            where.append(StatcastPitching.game_date < end_date + timedelta(days=1))
+        table = select_arrow(
+            session,
+            StatcastPitching,
+            columns,
+            where=where,
+            order_by=PITCH_ORDER,
+        )
+
+    return table if arrow else to_numpy(table)
+
+
+def load_pitch_store(
+    session,
+    start_dt=None,
+    end_date=None,
+    pitcher=None,
+    columns=None,
+    parquet_dir=None,
+) -> PitchStore:
+    """
+    Builds a compact PitchStore of the pitches between two dates, sorted by pitcher.
+    The arguments are the same as pitch_arrays
+    :param columns: Fields of the store, PITCH_STORE_COLUMNS by default
+    :type list, optional
+    """
+    table = pitch_arrays(
+        session,
+        columns=columns or PITCH_STORE_COLUMNS,
+        pitcher=pitcher,
+        start_dt=start_dt,
+        end_date=end_date,
+        parquet_dir=parquet_dir,
+        arrow=True,
+    )
+    return PitchStore.from_arrow(table)
+
+
+def populate_pitch_mix(session, auto_commit=True, refresh=False):
+    """
+    Populates the pitch_mix table from statcast_pitching. Only the (pitcher, season)
+    distributions touched by statcast days loaded since the last run are recomputed,
+    unless refresh is True or the table is empty.
+    Returns the number of rows written.
+    :param session: Sqlalchemy session
+    :type class: 'sqlalchemy.orm.Session', required
+    :param refresh: Rebuild every distribution
+    :type bool, optional
+    """
+    loaded = manifest_partitions(session, "statcast")
+    done = manifest_partitions(session, "pitch_mix")
+    table = StatcastPitching.__table__
+
+    # Days that changed since the last run, and every open day after the last
+    # closed one since those are reloaded without a manifest entry
+    since = None
+    if not refresh and len(done) > 0:
+        pending = [d for d, c in loaded.items() if done.get(d) != c]
+        if len(loaded) > 0:
+            pending.append(
+                (pd.Timestamp(max(loaded)) + timedelta(days=1)).strftime("%Y-%m-%d")
+            )
+        since = pd.Timestamp(min(pending)).to_pydatetime() if pending else None
+
+    with timed("fetch"):
+        query = select(table.c.pitcher, table.c.game_year).distinct()
+        if since is not None:
+            query = query.where(table.c.game_date >= since)
+        affected = pd.read_sql(query, session.connection())
+
+    n_rows = 0
+    for season, pitchers in affected.groupby("game_year")["pitcher"]:
+        season = int(season)
+        with timed("fetch"):
+            query = select(
+                *[table.c[x] for x in ["pitcher", "balls", "strikes", "stand"]],
+                table.c.pitch_type,
+                *[table.c[x] for x in PITCH_MIX_MEANS],
+            ).where(table.c.game_year == season)
+            if since is not None:
+                query = query.where(table.c.pitcher.in_(pitchers.tolist()))
+            df = pd.read_sql(query, session.connection())
+        count(rows_parsed=len(df))
+
+        mix = pitch_mix_frame(df.assign(season=season))
+        with timed("flush"):
+            delete = PitchMix.__table__.delete().where(PitchMix.season == season)
+            if since is not None:
+                delete = delete.where(PitchMix.pitcher.in_(pitchers.tolist()))
+            session.execute(delete)
+        n_rows += bulk_load_df(session, PitchMix, mix)
+        count(partitions_loaded=1)
+
+    for day, checksum in loaded.items():
+        if done.get(day) != checksum:
+            update_manifest(session, "pitch_mix", day, None, checksum)
+
+    if auto_commit:
+        with timed("flush"):
+            session.commit()
+
+    return n_rows
+
+
+def pitch_mix_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Pitch type frequencies and mean velocity, location and movement of every
+    PITCH_MIX_KEYS group of a frame of pitches. Pitches without a type are left out
+    """
+    with timed("transform"):
+        df = df[~df["pitch_type"].isin(["", "0"]) & df["pitch_type"].notna()]
+        mix = (
+            df.groupby(PITCH_MIX_KEYS + ["pitch_type"], sort=False)
+            .agg(
+                n_pitches=("pitch_type", "size"),
+                **{x: (x, "mean") for x in PITCH_MIX_MEANS},
+            )
+            .reset_index()
+        )
+        total = mix.groupby(PITCH_MIX_KEYS, sort=False)["n_pitches"].transform("sum")
+        mix["frequency"] = mix["n_pitches"] / total
+    mix["UID"] = PitchMix.get_uids(mix)
+    return mix
+
+
+def pitch_mix_lookup(session, season=None) -> dict:
+    """
+    Loads the pitch_mix table into {(pitcher, season, balls, strikes, stand):
+    (pitch types, frequencies)} for constant time lookups, e.g. to draw the next
+    pitch of a simulated at bat with numpy.random.choice
+    :param season: Only load a single season
+    :type int, optional
+    """
+    table = PitchMix.__table__
+    query = select(*[table.c[x] for x in PITCH_MIX_KEYS + ["pitch_type", "frequency"]])
+    if season is not None:
+        query = query.where(table.c.season == season)
+    df = pd.read_sql(query, session.connection())
+    return {
+        key: (group["pitch_type"].to_numpy(), group["frequency"].to_numpy())
+        for key, group in df.groupby(PITCH_MIX_KEYS, sort=False)
+    }
+
+
+def populate_player_lu(session, auto_commit=True, refresh=False):
+    """
+    Can only do the entire table or no table at all.
+    Skipped once the register is in the ingest manifest unless refresh is True
+    """
+    manifest = manifest_partitions(session, "register")
+    if skip_partition(manifest, "all", refresh):
+        count(partitions_skipped=1)
+        return 0
+
+    lu_df = chadwick_register(refresh=refresh)
+    count(rows_parsed=len(lu_df))
+    checksum = payload_checksum(lu_df)
+    if manifest.get("all") == checksum:
+        count(partitions_skipped=1)
+        return 0
+
+    with timed("transform"):
+        # covnert to correct dtypes
+        lu_df["mlb_played_last"] = (
+            pd.to_numeric(lu_df["mlb_played_last"], errors="coerce")
+            .fillna(0)
+            .astype(np.int64)
+        )
+        lu_df["mlb_played_first"] = (
+            pd.to_numeric(lu_df["mlb_played_first"], errors="coerce")
+            .fillna(0)
+            .astype(np.int64)
+        )
+
         # Only add if there is advanced data for a given player
-        if row["key_mlbam"] != -1:
-            player = PlayerLookup(row)
-            if player.key_mlbam not in UIDs:
-                session.add(player)
+        lu_df = frame_to_table(lu_df[lu_df["key_mlbam"] != -1], PlayerLookup)
+    n_rows = merge_df(session, PlayerLookup, lu_df, key="key_mlbam")
+    update_manifest(session, "register", "all", len(lu_df), checksum)
+    count(partitions_loaded=1)
 
     if auto_commit:
-        session.commit()
+        with timed("flush"):
+            session.commit()
+
+    return n_rows
+
+
+# Crosswalks already loaded by this process, by register checksum
+_CROSSWALKS = {}
+
+
+def load_crosswalk(session, refresh=False) -> IdCrosswalk:
+    """
+    The player id crosswalk of player_lookup, to translate whole arrays of ids
+    between the MLBAM, Retrosheet, Baseball-Reference and FanGraphs systems, e.g.
+    load_crosswalk(session).translate(pitchers, "key_mlbam", "key_retro").
+    A crosswalk is keyed by the checksum of the register it was built from. It is
+    kept in memory and in the source cache, so other processes sharing the cache
+    load it from a single file instead of reading the table again
+    :param session: Sqlalchemy session
+    :type class: 'sqlalchemy.orm.Session', required
+    :param refresh: Rebuild the crosswalk from player_lookup
+    :type bool, optional
+    """
+    checksum = manifest_partitions(session, "register").get("all")
+    key = CROSSWALK_CACHE_KEY.format(checksum)
+    if checksum is not None and not refresh:
+        if checksum in _CROSSWALKS:
+            return _CROSSWALKS[checksum]
+        path = get_cache().get(key)
+        if path is not None:
+            _CROSSWALKS[checksum] = IdCrosswalk.load(path)
+            return _CROSSWALKS[checksum]
 
-    return
+    query = select(*[PlayerLookup.__table__.c[x] for x in CROSSWALK_KEYS])
+    with timed("fetch"):
+        df = pd.read_sql(query, session.connection())
+    with timed("transform"):
+        crosswalk = IdCrosswalk.from_frame(df)
+    # Tables filled without the manifest can change without notice, never cache them
+    if checksum is not None:
+        fd, tmp = tempfile.mkstemp(dir=get_cache().directory)
+        os.close(fd)
+        crosswalk.save(tmp)
+        get_cache().put_file(key, tmp)
+        _CROSSWALKS[checksum] = crosswalk
+    return crosswalk
 
 
 def populate_player_game_stats(
-    start_season, end_season, session, auto_commit=True
+    start_season, end_season, session, auto_commit=True, refresh=False
 ):
     """
-    Populates the player single game stats with data from Retrosheets Day-by-day events for an entire season
+    Populates the player single game stats with data from Retrosheets Day-by-day events for an entire season.
+    Seasons already recorded in the ingest manifest are skipped unless refresh is True
+    or the season is still being played.
     """
+    manifest = manifest_partitions(session, "retrosplits")
+    seasons = [
+        x
+        for x in range(int(start_season), int(end_season) + 1)
+        if not skip_partition(
+            manifest, str(x), refresh, is_open=x >= datetime.now().year
+        )
+    ]
+    count(partitions_skipped=int(end_season) - int(start_season) + 1 - len(seasons))
 
-    data = retro_day_stats(start_season, end_season)
+    def _season_path(season):
+        is_open = season >= datetime.now().year
+        return retro_day_path(season, refresh=refresh or is_open)
 
-    data = data.fillna(0)
-    data = cast_fiel_dtypes(data, PlayerGameStats)
+    # The next season downloads while the current one is being inserted
+    n_rows = 0
+    for season, result in fetch_ordered(_season_path, seasons):
+        partition = str(season)
+        path = result.result()
+        checksum = payload_checksum(path)
+        if manifest.get(partition) == checksum:
+            count(partitions_skipped=1)
+            continue
 
-    query = session.query(PlayerGameStats.UID).all()
-    UIDs = [x[0] for x in query]
-    for _, row in data.iterrows():
-        # Only add if there is advanced data for a given player
-        player = PlayerGameStats(row)
-        if player.UID not in UIDs:
-            UIDs.append(player.UID)
-            session.add(player)
+        n_parsed = 0
+        for data in timed_iter(retro_day_chunks(path), "transform"):
+            count(rows_parsed=len(data))
+            with timed("transform"):
+                data = data.fillna(0)
+                data = cast_fiel_dtypes(data, PlayerGameStats)
+                data = frame_to_table(data, PlayerGameStats)
+                # Assigned on a consolidated copy, inserting into the column-wise
+                # built frame fragments it
+                data = data.copy().assign(UID=PlayerGameStats.get_uids(data))
+            n_rows += merge_df(session, PlayerGameStats, data)
+            n_parsed += len(data)
+        update_manifest(session, "retrosplits", partition, n_parsed, checksum)
+        count(partitions_loaded=1)
 
-    if auto_commit:
-        session.commit()
+        if auto_commit:
+            with timed("flush"):
+                session.commit()
+
+    return n_rows
+
+
+def _as_of_stat_columns() -> list:
+    """
+    The counting stats of as_of_date_stats
+    """
+    return [
+        c.name
+        for c in AsOfDatePlayerGameStats.__table__.columns
+        if c.name[:2] in ["B_", "P_", "F_"] and not c.name.endswith("_POS")
+    ]
+
+
+def _season_bounds(season):
+    return datetime(season, 1, 1), datetime(season + 1, 1, 1)
+
+
+def populate_as_of_date_stats(
+    start_season, end_season, session, auto_commit=True, refresh=False
+):
+    """
+    Populates as_of_date_stats with season to date totals from single_game_player_stats.
+    In the current season every player's totals are only extended past the last day
+    already in the table, so a day of new games appends one row per player who played
+    in it. Past seasons are skipped while their retrosplits data is unchanged since the
+    last run, and recomputed from scratch when it changed, as any game may have been
+    corrected. refresh recomputes every season.
+    Returns the number of rows added.
+    """
+    loaded = manifest_partitions(session, "retrosplits")
+    done = manifest_partitions(session, "asof")
+    stats = _as_of_stat_columns()
+    games_tbl = PlayerGameStats.__table__
+    asof_tbl = AsOfDatePlayerGameStats.__table__
+
+    n_rows = 0
+    for season in range(int(start_season), int(end_season) + 1):
+        partition = str(season)
+        is_open = season >= datetime.now().year
+        # A season that was never computed has no entry, even if retrosplits has none
+        unchanged = partition in done and done[partition] == loaded.get(partition)
+        if not (refresh or is_open) and unchanged:
+            count(partitions_skipped=1)
+            continue
+
+        start, end = _season_bounds(season)
+        if refresh or not is_open:
+            with timed("flush"):
+                session.execute(asof_tbl.delete().where(asof_tbl.c.season == season))
+
+        with timed("fetch"):
+            # Latest totals of every player, the base the new games are added to
+            latest = (
+                select(
+                    asof_tbl.c.person_key,
+                    func.max(asof_tbl.c.asof_date).label("asof_date"),
+                )
+                .where(asof_tbl.c.season == season)
+                .group_by(asof_tbl.c.person_key)
+                .subquery()
+            )
+            base = pd.read_sql(
+                select(
+                    asof_tbl.c.person_key,
+                    asof_tbl.c.asof_date,
+                    *[asof_tbl.c[x] for x in stats],
+                )
+                .join(
+                    latest,
+                    (asof_tbl.c.person_key == latest.c.person_key)
+                    & (asof_tbl.c.asof_date == latest.c.asof_date),
+                )
+                .where(asof_tbl.c.season == season),
+                session.connection(),
+            )
+            games = pd.read_sql(
+                select(
+                    games_tbl.c.person_key,
+                    games_tbl.c.game_date,
+                    *[games_tbl.c[x] for x in stats],
+                ).where(games_tbl.c.game_date >= start, games_tbl.c.game_date < end),
+                session.connection(),
+                parse_dates=["game_date"],
+            )
+        count(rows_parsed=len(games))
+
+        with timed("transform"):
+            base = base.set_index("person_key")
+            last = games["person_key"].map(base["asof_date"])
+            games = games[last.isna() | (games["game_date"] > pd.to_datetime(last))]
+            daily = games.groupby(["person_key", "game_date"])[stats].sum()
+            daily = daily.sort_index()
+            keys = daily.index.to_frame(index=False)
+            values = daily.groupby(level="person_key").cumsum().to_numpy(np.int64)
+            base = base[stats].reindex(keys["person_key"]).fillna(0)
+            values = values + base.to_numpy(np.int64)
+            totals = pd.concat(
+                [
+                    keys.rename(columns={"game_date": "asof_date"}).assign(season=season),
+                    pd.DataFrame(values, columns=stats),
+                ],
+                axis=1,
+            )
+        totals["UID"] = AsOfDatePlayerGameStats.get_uids(totals)
+        n_rows += bulk_load_df(session, AsOfDatePlayerGameStats, totals)
+        update_manifest(session, "asof", partition, len(totals), loaded.get(partition))
+        count(partitions_loaded=1)
+
+        if auto_commit:
+            with timed("flush"):
+                session.commit()
+
+    return n_rows
+
+
+def populate_player_form(
+    start_season, end_season, session, auto_commit=True, refresh=False, windows=None
+):
+    """
+    Populates player_form with the rolling window totals of FORM_STATS from
+    single_game_player_stats, one row per window and day a player appeared (or
+    started, for "starts" windows). Windows do not reach back into the previous season.
+    In the current season only players with games after their last row are recomputed
+    and only their new rows are written. Past seasons are skipped while their
+    retrosplits data is unchanged since the last run, and rebuilt when it changed.
+    refresh rebuilds every season.
+    Returns the number of rows added.
+    :param windows: {name: (kind, size)} of the windows, FORM_WINDOWS by default
+    :type dict, optional
+    """
+    windows = windows or FORM_WINDOWS
+    loaded = manifest_partitions(session, "retrosplits")
+    done = manifest_partitions(session, "form")
+    games_tbl = PlayerGameStats.__table__
+    form_tbl = PlayerForm.__table__
+
+    n_rows = 0
+    for season in range(int(start_season), int(end_season) + 1):
+        partition = str(season)
+        is_open = season >= datetime.now().year
+        # A season that was never computed has no entry, even if retrosplits has none
+        unchanged = partition in done and done[partition] == loaded.get(partition)
+        if not (refresh or is_open) and unchanged:
+            count(partitions_skipped=1)
+            continue
+
+        start, end = _season_bounds(season)
+        if refresh or not is_open:
+            with timed("flush"):
+                session.execute(form_tbl.delete().where(form_tbl.c.season == season))
+
+        with timed("fetch"):
+            last = pd.read_sql(
+                select(
+                    form_tbl.c.person_key,
+                    form_tbl.c.form_window,
+                    func.max(form_tbl.c.asof_date).label("last_date"),
+                )
+                .where(form_tbl.c.season == season)
+                .group_by(form_tbl.c.person_key, form_tbl.c.form_window),
+                session.connection(),
+                parse_dates=["last_date"],
+            )
+            games = pd.read_sql(
+                select(
+                    games_tbl.c.person_key,
+                    games_tbl.c.game_date,
+                    *[games_tbl.c[x] for x in FORM_STATS],
+                ).where(games_tbl.c.game_date >= start, games_tbl.c.game_date < end),
+                session.connection(),
+                parse_dates=["game_date"],
+            )
+        count(rows_parsed=len(games))
+
+        with timed("transform"):
+            # Players whose last game is already in the table need no update
+            latest = last.groupby("person_key")["last_date"].max()
+            newest = games.groupby("person_key")["game_date"].max()
+            stale = newest.index[~(newest <= latest.reindex(newest.index))]
+            form = player_form_frame(games[games["person_key"].isin(stale)], windows)
+            form = form.merge(last, how="left", on=["person_key", "form_window"])
+            form = form[~(form["asof_date"] <= form["last_date"])]
+            form = form.drop(columns="last_date").assign(season=season)
+        form["UID"] = PlayerForm.get_uids(form)
+        n_rows += bulk_load_df(session, PlayerForm, form)
+        update_manifest(session, "form", partition, len(form), loaded.get(partition))
+        count(partitions_loaded=1)
+
+        if auto_commit:
+            with timed("flush"):
+                session.commit()
+
+    return n_rows
+
+
+def player_form_frame(games: pd.DataFrame, windows=None) -> pd.DataFrame:
+    """
+    Rolling window totals of FORM_STATS for a frame of single games, with one row
+    per player, window and day. n_games is the number of game days in the window
+    :param games: person_key, game_date and FORM_STATS of single games
+    :type class: 'pd.DataFrame', required
+    :param windows: {name: (kind, size)}, FORM_WINDOWS by default
+    :type dict, optional
+    """
+    windows = windows or FORM_WINDOWS
+    counts = FORM_STATS + ["n_games"]
+    daily = games.groupby(["person_key", "game_date"])[FORM_STATS].sum()
+    daily = daily.assign(n_games=1).sort_index().reset_index()
+
+    frames = []
+    for name, (kind, size) in windows.items():
+        rows = daily
+        if kind == "starts":
+            rows = daily[daily["P_GS"] > 0].reset_index(drop=True)
+        elif kind not in ["days", "games"]:
+            raise ValueError(f"Unknown form window kind {kind}")
+        totals = _rolling_sums(
+            rows["person_key"].to_numpy(),
+            rows["game_date"].to_numpy("datetime64[D]").astype(np.int64),
+            rows[counts].to_numpy(np.int64),
+            size if kind == "days" else None,
+            size if kind != "days" else None,
+        )
+        frame = pd.DataFrame(totals, columns=counts)
+        frame.insert(0, "person_key", rows["person_key"].to_numpy())
+        frame.insert(1, "asof_date", rows["game_date"].to_numpy())
+        frame.insert(2, "form_window", name)
+        frames.append(frame)
+
+    columns = ["person_key", "asof_date", "form_window", "n_games"] + FORM_STATS
+    if len(frames) == 0:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)[columns]
+
+
+def _rolling_sums(keys, days, values, n_days=None, n_rows=None) -> np.ndarray:
+    """
+    Rolling sums of values over rows sorted by key and day, restarting at every
+    key. A row's window holds the rows of its key within the last n_days days, or
+    its last n_rows rows. Computed as differences of one cumulative sum, with the
+    window starts found by binary search
+    """
+    if len(keys) == 0:
+        return values[:0]
+    csum = np.vstack(
+        [np.zeros((1, values.shape[1]), np.int64), values.cumsum(axis=0)]
+    )
+    index = np.arange(len(keys))
+    first = np.r_[True, keys[1:] != keys[:-1]]
+    group_start = np.maximum.accumulate(np.where(first, index, 0))
+    if n_days is not None:
+        # One sorted axis of (key, day) pairs, each key in its own range of days
+        days = days - days.min()
+        span = days.max() + n_days + 1
+        position = np.cumsum(first) * span + days
+        window_start = np.searchsorted(position, position - n_days + 1, side="left")
+    else:
+        window_start = index - n_rows + 1
+    window_start = np.maximum(window_start, group_start)
+    return csum[index + 1] - csum[window_start]
+
+
+def player_form_as_of(session, person_key, date, window):
+    """
+    A player's form in one window as of their last game (or start) before date.
+    Returns None when the player has not appeared yet that season
+    :param person_key: Retrosheet id of the player
+    :type str, required
+    :param date: The day being simulated
+    :type datetime, required
+    :param window: Name of the window, e.g. "7d"
+    :type str, required
+    """
+    start, _ = _season_bounds(date.year)
+    return (
+        session.query(PlayerForm)
+        .filter(
+            PlayerForm.person_key == person_key,
+            PlayerForm.form_window == window,
+            PlayerForm.asof_date >= start,
+            PlayerForm.asof_date < date,
+        )
+        .order_by(PlayerForm.asof_date.desc())
+        .first()
+    )
+
+
+def player_stats_as_of(session, person_key, date):
+    """
+    A player's season to date totals before the games of date, for backtests that
+    must not see the result of the game being simulated. Returns None when the
+    player has not played yet that season
+    :param person_key: Retrosheet id of the player
+    :type str, required
+    :param date: The day being simulated
+    :type datetime, required
+    """
+    start, _ = _season_bounds(date.year)
+    return (
+        session.query(AsOfDatePlayerGameStats)
+        .filter(
+            AsOfDatePlayerGameStats.person_key == person_key,
+            AsOfDatePlayerGameStats.asof_date >= start,
+            AsOfDatePlayerGameStats.asof_date < date,
+        )
+        .order_by(AsOfDatePlayerGameStats.asof_date.desc())
+        .first()
+    )
 
 
 class StatcastPitching(_BASE):
@@ -139,6 +1211,16 @@ class StatcastPitching(_BASE):
     """
 
     __tablename__ = "statcast_pitching"
+    __table_args__ = (
+        Index("ix_statcast_pitching_pitcher_date", "pitcher", "game_date"),
+        Index("ix_statcast_pitching_batter_date", "batter", "game_date"),
+        Index(
+            "ix_statcast_pitching_game_order",
+            "game_pk",
+            "at_bat_number",
+            "pitch_number",
+        ),
+    )
     # id = Column(Integer, Sequence("event_id_seq"), primary_key=True)
     UID = Column(String(32), index=True, primary_key=True, unique=True)
     pitch_type = Column(String(2))
@@ -257,6 +1339,49 @@ class StatcastPitching(_BASE):
         )
         return hashlib.md5(hash_str).hexdigest()
 
+    @classmethod
+    def get_uids(cls, df: pd.DataFrame) -> pd.Series:
+        """
+        Vectorized _get_uid for a frame with the table's column names
+        """
+        return hash_columns(
+            df,
+            ["game_pk", "pitcher", "at_bat_number", "pitch_number", "release_speed"],
+            strip_dots=True,
+        )
+
+
+class PitchMix(_BASE):
+    """
+    Share of every pitch type a pitcher threw in a season, by count and batter
+    handedness, with the mean velocity, location and movement of the pitch type.
+    Derived from statcast_pitching, see populate_pitch_mix
+    """
+
+    __tablename__ = "pitch_mix"
+    __table_args__ = (Index("ix_pitch_mix_key", *PITCH_MIX_KEYS),)
+    UID = Column(String(32), index=True, primary_key=True, unique=True)
+    pitcher = Column(Integer)
+    season = Column(Integer)
+    balls = Column(Integer)
+    strikes = Column(Integer)
+    stand = Column(String(1))
+    pitch_type = Column(String(2))
+    n_pitches = Column(Integer)
+    frequency = Column(Float)
+    release_speed = Column(Float)
+    plate_x = Column(Float)
+    plate_z = Column(Float)
+    pfx_x = Column(Float)
+    pfx_z = Column(Float)
+
+    @classmethod
+    def get_uids(cls, df: pd.DataFrame) -> pd.Series:
+        """
+        md5 of the distribution keys and the pitch type
+        """
+        return hash_columns(df, PITCH_MIX_KEYS + ["pitch_type"])
+
 
 class PlayerLookup(_BASE):
     """
@@ -291,6 +1416,9 @@ class PlayerLookup(_BASE):
 class PlayerGameStats(_BASE):
     # From https://github.com/chadwickbureau/retrosplits/tree/master/daybyday
     __tablename__ = "single_game_player_stats"
+    __table_args__ = (
+        Index("ix_single_game_player_stats_person_date", "person_key", "game_date"),
+    )
     UID = Column(String(21), primary_key=True, unique=True, index=True)
     game_key = Column(String(12))
     game_source = Column(String(3))
@@ -478,12 +1606,26 @@ class PlayerGameStats(_BASE):
     def _get_uid(self):
         return "{}_{}".format(self.game_key, self.person_key)
 
+    @classmethod
+    def get_uids(cls, df: pd.DataFrame) -> pd.Series:
+        """
+        Vectorized _get_uid for a frame with the table's column names
+        """
+        return df["game_key"].astype(str) + "_" + df["person_key"].astype(str)
+
+
 class AsOfDatePlayerGameStats(_BASE):
-    """"Calculate as of date player stats for quick retrieval
-    """"
+    """Calculate as of date player stats for quick retrieval
+    Season to date totals of a player after the games of asof_date, one row per day
+    the player appeared. The *_POS columns are per game and are not carried over.
+    See populate_as_of_date_stats and player_stats_as_of
+    """
 
     __tablename__ = "as_of_date_stats"
-    UID= Column(Integer)
+    __table_args__ = (
+        Index("ix_as_of_date_stats_person", "person_key", "asof_date"),
+    )
+    UID = Column(String(21), primary_key=True, unique=True, index=True)
     season = Column(Integer)
     asof_date = Column(DateTime)
     person_key = Column(String(8))
@@ -658,4 +1800,70 @@ class AsOfDatePlayerGameStats(_BASE):
         self.UID = self._get_uid()
 
     def _get_uid(self):
-        return "{}_{}".format(self.game_key, self.person_key)
+        return "{}_{}".format(self.person_key, self.asof_date.strftime("%Y%m%d"))
+
+    @classmethod
+    def get_uids(cls, df: pd.DataFrame) -> pd.Series:
+        """
+        Vectorized _get_uid for a frame with the table's column names
+        """
+        dates = df["asof_date"].dt.strftime("%Y%m%d")
+        return df["person_key"].astype(str) + "_" + dates
+
+
+class PlayerForm(_BASE):
+    """
+    Rolling window totals of a player, e.g. the last 7 days or the last 5 starts,
+    one row per window and day the player appeared. See populate_player_form
+    """
+
+    __tablename__ = "player_form"
+    __table_args__ = (
+        Index("ix_player_form_person", "person_key", "form_window", "asof_date"),
+    )
+    UID = Column(String(32), primary_key=True, unique=True, index=True)
+    season = Column(Integer)
+    asof_date = Column(DateTime)
+    person_key = Column(String(8))
+    form_window = Column(String(10))
+    n_games = Column(Integer)
+    B_G = Column(Integer)
+    B_PA = Column(Integer)
+    B_AB = Column(Integer)
+    B_R = Column(Integer)
+    B_H = Column(Integer)
+    B_TB = Column(Integer)
+    B_2B = Column(Integer)
+    B_3B = Column(Integer)
+    B_HR = Column(Integer)
+    B_RBI = Column(Integer)
+    B_BB = Column(Integer)
+    B_IBB = Column(Integer)
+    B_SO = Column(Integer)
+    B_HP = Column(Integer)
+    B_SF = Column(Integer)
+    B_SB = Column(Integer)
+    B_CS = Column(Integer)
+    P_G = Column(Integer)
+    P_GS = Column(Integer)
+    P_OUT = Column(Integer)
+    P_TBF = Column(Integer)
+    P_H = Column(Integer)
+    P_R = Column(Integer)
+    P_ER = Column(Integer)
+    P_HR = Column(Integer)
+    P_BB = Column(Integer)
+    P_SO = Column(Integer)
+    P_HP = Column(Integer)
+    P_GO = Column(Integer)
+    P_AO = Column(Integer)
+    P_PITCH = Column(Integer)
+    P_STRIKE = Column(Integer)
+
+    @classmethod
+    def get_uids(cls, df: pd.DataFrame) -> pd.Series:
+        """
+        person_key, window and date of a frame with the table's column names
+        """
+        dates = df["asof_date"].dt.strftime("%Y%m%d")
+        return df["person_key"].astype(str) + "_" + df["form_window"] + "_" + dates
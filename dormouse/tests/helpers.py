@@ -0,0 +1,107 @@
+"""
+Fixtures shared by the tests: temporary directories, source caches seeded with
+synthetic data and in-memory databases
+"""
+import datetime
+import os
+import shutil
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from dormouse.extras.cache import configure_cache
+from dormouse.extras.synthetic import seed_cache
+
+SEASON = 2019
+MIDSEASON = datetime.datetime(SEASON, 6, 15)
+# Connection string of a scratch PostgreSQL database for the PostgreSQL only tests
+POSTGRES_ENV = "DORMOUSE_TEST_POSTGRES"
+
+_TEMP_DIRS = []
+
+
+class SeasonInProgress(datetime.datetime):
+    """
+    Patched over a module's datetime so that SEASON is the current, open season
+    """
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls(SEASON, 10, 1)
+
+
+def temp_dir() -> str:
+    """
+    A new temporary directory, removed by remove_temp_dirs
+    """
+    directory = tempfile.mkdtemp(prefix="dormouse-test-")
+    _TEMP_DIRS.append(directory)
+    return directory
+
+
+def empty_cache(**kwargs):
+    """
+    Points the source cache at a new, empty temporary directory
+    :param kwargs: Passed to configure_cache, e.g. offline
+    :type dict, optional
+    """
+    return configure_cache(temp_dir(), **kwargs)
+
+
+def seed_offline_cache(**kwargs):
+    """
+    Points the source cache at a new temporary directory holding a synthetic
+    season, and turns offline mode on
+    :param kwargs: Passed to seed_cache, e.g. statcast_days
+    :type dict, optional
+    """
+    cache = empty_cache()
+    options = dict(
+        games_per_season=30,
+        players_per_team=5,
+        retrosplits_rows=100,
+        register_players=100,
+    )
+    options.update(kwargs)
+    seed_cache(cache, SEASON, SEASON, **options)
+    cache.offline = True
+    return cache
+
+
+def remove_temp_dirs():
+    """
+    Deletes every directory created by temp_dir, usually from tearDownModule
+    """
+    while _TEMP_DIRS:
+        shutil.rmtree(_TEMP_DIRS.pop(), ignore_errors=True)
+
+
+def memory_session(*tables):
+    """
+    Session of a new in-memory SQLite database holding empty tables
+    :param tables: The declarative table classes to create
+    :type list, required
+    """
+    engine = create_engine("sqlite://", echo=False)
+    for tbl in tables:
+        tbl.__table__.create(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+def postgres_engine():
+    """
+    Engine of the database named by the DORMOUSE_TEST_POSTGRES environment
+    variable. The calling test is skipped when none is set or it can't be reached
+    """
+    connection = os.environ.get(POSTGRES_ENV)
+    if not connection:
+        raise unittest.SkipTest(f"{POSTGRES_ENV} is not set")
+    try:
+        engine = create_engine(connection)
+        with engine.connect():
+            pass
+    except Exception as e:
+        raise unittest.SkipTest(f"PostgreSQL is not available: {e}")
+    return engine
@@ -0,0 +1,141 @@
+import os
+import sys
+
+this_file = os.path.realpath(__file__)
+sys.path.insert(1, os.path.realpath(os.path.join(this_file, "../../..")))
+
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from dormouse.extras.bulk import bulk_load_df
+from dormouse.tables.dbMeta import IngestManifest, update_manifest
+from dormouse.tables.dbPerson import (
+    AsOfDatePlayerGameStats,
+    PlayerGameStats,
+    player_stats_as_of,
+    populate_as_of_date_stats,
+    populate_player_game_stats,
+)
+from dormouse.tests.helpers import (
+    MIDSEASON,
+    SeasonInProgress,
+    memory_session,
+    remove_temp_dirs,
+    seed_offline_cache,
+)
+
+
+def setUpModule():
+    seed_offline_cache(retrosplits_rows=3000)
+
+
+def tearDownModule():
+    remove_temp_dirs()
+
+
+class TestAsOfDateStats(unittest.TestCase):
+    def setUp(self):
+        self.session = memory_session(
+            PlayerGameStats, AsOfDatePlayerGameStats, IngestManifest
+        )
+        populate_player_game_stats(2019, 2019, self.session)
+        self.games = pd.read_sql(
+            "SELECT * FROM single_game_player_stats",
+            self.session.connection(),
+            parse_dates=["game_date", "appear_date"],
+        )
+
+    def _as_of(self):
+        return (
+            pd.read_sql(
+                "SELECT * FROM as_of_date_stats",
+                self.session.connection(),
+                parse_dates=["asof_date"],
+            )
+            .sort_values("UID")
+            .reset_index(drop=True)
+        )
+
+    def test_cumulative_totals(self):
+        n_rows = populate_as_of_date_stats(2019, 2019, self.session)
+        as_of = self._as_of()
+        self.assertEqual(n_rows, len(as_of))
+        self.assertEqual(
+            len(as_of), len(self.games.drop_duplicates(["person_key", "game_date"]))
+        )
+
+        person = self.games["person_key"].iloc[0]
+        games = self.games[self.games["person_key"] == person]
+        before = games[games["game_date"] < MIDSEASON]
+        row = player_stats_as_of(self.session, person, MIDSEASON)
+        if len(before) == 0:
+            self.assertIsNone(row)
+        else:
+            self.assertEqual(row.B_H, before["B_H"].sum())
+            self.assertEqual(row.P_OUT, before["P_OUT"].sum())
+            self.assertEqual(row.asof_date, before["game_date"].max())
+        # Nothing changed, nothing to do
+        self.assertEqual(populate_as_of_date_stats(2019, 2019, self.session), 0)
+
+    @mock.patch("dormouse.tables.dbPerson.datetime", SeasonInProgress)
+    def test_new_days_append_tails(self):
+        # Build on the first half of the season, then load the rest
+        self.session.query(PlayerGameStats).filter(
+            PlayerGameStats.game_date >= MIDSEASON
+        ).delete()
+        populate_as_of_date_stats(2019, 2019, self.session)
+        n_first = len(self._as_of())
+
+        late = self.games[self.games["game_date"] >= MIDSEASON]
+        bulk_load_df(self.session, PlayerGameStats, late)
+        n_rows = populate_as_of_date_stats(2019, 2019, self.session)
+        self.assertEqual(
+            n_rows, len(late.drop_duplicates(["person_key", "game_date"]))
+        )
+        incremental = self._as_of()
+        self.assertEqual(len(incremental), n_first + n_rows)
+
+        populate_as_of_date_stats(2019, 2019, self.session, refresh=True)
+        pd.testing.assert_frame_equal(incremental, self._as_of())
+
+    def test_season_without_retrosplits_manifest(self):
+        # single_game_player_stats loaded without a manifest entry, e.g. by hand
+        self.session.query(IngestManifest).filter(
+            IngestManifest.source == "retrosplits"
+        ).delete()
+        n_rows = populate_as_of_date_stats(2019, 2019, self.session)
+        self.assertGreater(n_rows, 0)
+        self.assertEqual(n_rows, len(self._as_of()))
+        # Computed once, then skipped
+        self.assertEqual(populate_as_of_date_stats(2019, 2019, self.session), 0)
+
+    def test_corrected_past_season_is_recomputed(self):
+        populate_as_of_date_stats(2019, 2019, self.session)
+        before = self._as_of()
+
+        # Correct an early game of a past season
+        game = self.games.sort_values("game_date").iloc[0]
+        self.session.query(PlayerGameStats).filter(
+            PlayerGameStats.UID == game["UID"]
+        ).update({PlayerGameStats.B_H: PlayerGameStats.B_H + 5})
+        update_manifest(self.session, "retrosplits", "2019", None, "corrected")
+        populate_as_of_date_stats(2019, 2019, self.session)
+        after = self._as_of()
+
+        self.assertEqual(len(after), len(before))
+        changed = (after["person_key"] == game["person_key"]) & (
+            after["asof_date"] >= game["game_date"]
+        )
+        self.assertTrue(changed.any())
+        pd.testing.assert_series_equal(
+            after.loc[changed, "B_H"], before.loc[changed, "B_H"] + 5
+        )
+        pd.testing.assert_series_equal(
+            after.loc[~changed, "B_H"], before.loc[~changed, "B_H"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,243 @@
+import datetime
+import os
+import sys
+
+this_file = os.path.realpath(__file__)
+sys.path.insert(1, os.path.realpath(os.path.join(this_file, "../../..")))
+
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Column, DateTime, Float, String, create_engine, inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from dormouse.extras.bulk import (
+    analyze,
+    bulk_load_df,
+    create_indexes,
+    drop_indexes,
+    merge_df,
+)
+from dormouse.tables.dbMeta import Teams, populate_team_data
+from dormouse.tables.dbPerson import (
+    PlayerLookup,
+    StatcastPitching,
+    populate_statcast,
+)
+from dormouse.tests.helpers import empty_cache, postgres_engine, remove_temp_dirs
+
+
+def _fake_statcast(start_dt=None, n_pitches=50):
+    """
+    Small statcast-shaped frame for a single day
+    """
+    rng = np.random.default_rng(int(start_dt.replace("-", "")))
+    return pd.DataFrame(
+        {
+            "pitch_type": rng.choice(["FF", "SL", "CH"], n_pitches),
+            "game_date": pd.to_datetime([start_dt] * n_pitches),
+            "release_speed": rng.uniform(80, 100, n_pitches).round(1),
+            "player_name": ["Doe, John"] * n_pitches,
+            "batter": rng.integers(400000, 700000, n_pitches),
+            "pitcher": rng.integers(400000, 700000, n_pitches),
+            "events": [None] * n_pitches,
+            "type": rng.choice(["B", "S", "X"], n_pitches),
+            "balls": rng.integers(0, 4, n_pitches),
+            "strikes": rng.integers(0, 3, n_pitches),
+            "plate_x": rng.normal(0, 1, n_pitches),
+            "game_pk": [int(start_dt.replace("-", ""))] * n_pitches,
+            "at_bat_number": np.arange(n_pitches) // 4,
+            "pitch_number": np.arange(n_pitches) % 4 + 1,
+        }
+    )
+
+
+def setUpModule():
+    empty_cache()
+
+
+def tearDownModule():
+    remove_temp_dirs()
+
+
+class TestBulkStatcast(unittest.TestCase):
+    def _session(self):
+        engine = create_engine("sqlite://", echo=False)
+        StatcastPitching.__table__.create(bind=engine, checkfirst=True)
+        return sessionmaker(bind=engine)()
+
+    @mock.patch("dormouse.extras.fetch.TokenBucket.acquire", lambda *x: None)
+    @mock.patch("dormouse.tables.dbPerson.statcast", _fake_statcast)
+    def test_bulk_matches_orm(self):
+        date_begin = datetime.datetime(day=1, month=4, year=2019)
+        date_end = datetime.datetime(day=3, month=4, year=2019)
+
+        orm_session = self._session()
+        bulk_session = self._session()
+        n_orm = populate_statcast(date_begin, date_end, orm_session)
+        n_bulk = populate_statcast(
+            date_begin, date_end, bulk_session, bulk=True, workers=3
+        )
+        self.assertEqual(n_orm, 150)
+        self.assertEqual(n_bulk, 150)
+
+        cols = ["UID", "pitch_type", "result_type", "release_speed", "game_date"]
+        orm_df = pd.read_sql_table("statcast_pitching", orm_session.bind)
+        bulk_df = pd.read_sql_table("statcast_pitching", bulk_session.bind)
+        pd.testing.assert_frame_equal(
+            orm_df[cols].sort_values("UID").reset_index(drop=True),
+            bulk_df[cols].sort_values("UID").reset_index(drop=True),
+        )
+
+        with self.subTest("Overlapping ranges dont clash"):
+            n_bulk = populate_statcast(
+                date_begin, date_end, bulk_session, bulk=True
+            )
+            self.assertEqual(n_bulk, 0)
+            self.assertEqual(
+                bulk_session.query(StatcastPitching.UID).count(), 150
+            )
+
+
+class TestMerge(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://", echo=False)
+        Teams.__table__.create(bind=engine, checkfirst=True)
+        PlayerLookup.__table__.create(bind=engine, checkfirst=True)
+        self.session = sessionmaker(bind=engine)()
+
+    def test_merge_skips_existing_keys(self):
+        df = pd.DataFrame(
+            {
+                "key_mlbam": [1, 2, 3, 3],
+                "name_last": ["a", "b", "c", "c"],
+                "key_retro": ["a001", None, "c001", "c001"],
+            }
+        )
+        self.assertEqual(merge_df(self.session, PlayerLookup, df, "key_mlbam"), 3)
+        df = pd.DataFrame({"key_mlbam": [3, 4], "name_last": ["c", "d"]})
+        self.assertEqual(merge_df(self.session, PlayerLookup, df, "key_mlbam"), 1)
+        self.assertEqual(self.session.query(PlayerLookup.id).count(), 4)
+
+    def test_rerun_team_data(self):
+        self.assertEqual(populate_team_data(self.session), 30)
+        self.assertEqual(populate_team_data(self.session), 0)
+        self.assertEqual(self.session.query(Teams.UID).count(), 30)
+
+
+class _MergeTarget(declarative_base()):
+    """
+    Scratch table of the merge_df tests, safe to drop in a shared database
+    """
+
+    __tablename__ = "dormouse_test_merge"
+    UID = Column(String(32), primary_key=True)
+    game_date = Column(DateTime, nullable=False)
+    value = Column(Float)
+
+
+class _MergeBackend:
+    """
+    merge_df against the backend of _engine, PostgreSQL loads the staging table
+    with COPY and every other backend with executemany
+    """
+
+    def _engine(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        engine = self._engine()
+        table = _MergeTarget.__table__
+        table.drop(bind=engine, checkfirst=True)
+        table.create(bind=engine)
+        self.session = sessionmaker(bind=engine)()
+
+        def _cleanup():
+            self.session.close()
+            table.drop(bind=engine, checkfirst=True)
+            engine.dispose()
+
+        self.addCleanup(_cleanup)
+
+    def _frame(self, uids):
+        return pd.DataFrame(
+            {
+                "UID": uids,
+                "game_date": pd.Timestamp("2019-04-01"),
+                "value": [1.5 if x != "b" else np.nan for x in uids],
+            }
+        )
+
+    def test_merge(self):
+        n_rows = merge_df(self.session, _MergeTarget, self._frame(list("abcc")))
+        self.assertEqual(n_rows, 3)
+        n_rows = merge_df(self.session, _MergeTarget, self._frame(list("cd")))
+        self.assertEqual(n_rows, 1)
+        self.session.commit()
+        df = pd.read_sql_table("dormouse_test_merge", self.session.bind)
+        self.assertEqual(sorted(df["UID"]), list("abcd"))
+        self.assertEqual(df["value"].isna().sum(), 1)
+
+    def test_bulk_load(self):
+        df = self._frame(list("ab"))
+        self.assertEqual(bulk_load_df(self.session, _MergeTarget, df), 2)
+        self.session.commit()
+        stored = pd.read_sql_table("dormouse_test_merge", self.session.bind)
+        pd.testing.assert_frame_equal(
+            stored.sort_values("UID").reset_index(drop=True), df, check_dtype=False
+        )
+
+    def test_failed_insert_raises_its_own_error(self):
+        df = self._frame(list("ab")).assign(game_date=None)
+        with self.assertRaises(IntegrityError):
+            merge_df(self.session, _MergeTarget, df)
+        self.session.rollback()
+        self.assertEqual(merge_df(self.session, _MergeTarget, self._frame(["a"])), 1)
+
+
+class TestMergeSqlite(_MergeBackend, unittest.TestCase):
+    def _engine(self):
+        return create_engine("sqlite://", echo=False)
+
+
+class TestMergePostgres(_MergeBackend, unittest.TestCase):
+    def _engine(self):
+        return postgres_engine()
+
+
+class TestIndexes(unittest.TestCase):
+    def test_drop_and_rebuild(self):
+        engine = create_engine("sqlite://", echo=False)
+        StatcastPitching.__table__.create(bind=engine)
+
+        def _indexes():
+            return {x["name"] for x in inspect(engine).get_indexes("statcast_pitching")}
+
+        declared = {x.name for x in StatcastPitching.__table__.indexes}
+        unique = {x.name for x in StatcastPitching.__table__.indexes if x.unique}
+        self.assertIn("ix_statcast_pitching_pitcher_date", declared)
+        self.assertIn("ix_statcast_pitching_UID", unique)
+        self.assertEqual(_indexes(), declared)
+
+        with engine.begin() as connection:
+            dropped = drop_indexes(connection, [StatcastPitching])
+        self.assertEqual(_indexes(), unique)
+        self.assertEqual({x.name for x in dropped}, declared - unique)
+
+        with engine.begin() as connection:
+            create_indexes(connection, [StatcastPitching])
+            # Indexes that already exist are skipped
+            create_indexes(connection, [StatcastPitching])
+            analyze(connection, [StatcastPitching])
+            stats = connection.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE name = 'sqlite_stat1'"
+            ).all()
+        self.assertEqual(_indexes(), declared)
+        self.assertEqual(len(stats), 1)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
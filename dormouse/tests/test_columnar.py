@@ -0,0 +1,90 @@
+import datetime
+import os
+import sys
+
+this_file = os.path.realpath(__file__)
+sys.path.insert(1, os.path.realpath(os.path.join(this_file, "../../..")))
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from dormouse.extras.columnar import group_slices
+from dormouse.tables.dbMeta import IngestManifest
+from dormouse.tables.dbPerson import (
+    StatcastPitching,
+    pitch_arrays,
+    populate_statcast,
+)
+from dormouse.tests.helpers import (
+    memory_session,
+    remove_temp_dirs,
+    seed_offline_cache,
+    temp_dir,
+)
+
+DAYS = [datetime.datetime(2019, 4, 1), datetime.datetime(2019, 4, 2)]
+
+
+class TestPitchArrays(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        seed_offline_cache(statcast_days=DAYS, pitches_per_day=400)
+
+        cls.session = memory_session(StatcastPitching, IngestManifest)
+        cls.root = temp_dir()
+        populate_statcast(
+            DAYS[0], DAYS[-1], cls.session, bulk=True, rate=None, parquet_dir=cls.root
+        )
+        cls.pitchers = sorted(
+            x[0] for x in cls.session.query(StatcastPitching.pitcher).distinct()
+        )[:3]
+
+    @classmethod
+    def tearDownClass(cls):
+        remove_temp_dirs()
+
+    def test_arrays_match_the_table(self):
+        arrays = pitch_arrays(self.session, pitcher=self.pitchers, start_dt=DAYS[1])
+        expected = pd.read_sql(
+            "SELECT pitcher, release_speed, pitch_type FROM statcast_pitching "
+            "WHERE game_date >= '2019-04-02'",
+            self.session.connection(),
+        )
+        expected = expected[expected["pitcher"].isin(self.pitchers)]
+
+        self.assertEqual(arrays["release_speed"].dtype, np.float64)
+        self.assertTrue(arrays["plate_x"].flags["C_CONTIGUOUS"])
+        self.assertEqual(arrays["pitch_type"].dtype.kind, "U")
+        self.assertEqual(len(arrays["pitcher"]), len(expected))
+        self.assertTrue((np.diff(arrays["pitcher"]) >= 0).all())
+        self.assertAlmostEqual(
+            arrays["release_speed"].sum(), expected["release_speed"].sum()
+        )
+        self.assertEqual(
+            sorted(arrays["pitch_type"]), sorted(expected["pitch_type"].astype(str))
+        )
+
+    def test_mirror_matches_database(self):
+        db = pitch_arrays(self.session, pitcher=self.pitchers)
+        mirror = pitch_arrays(None, pitcher=self.pitchers, parquet_dir=self.root)
+        self.assertEqual(list(db), list(mirror))
+        for name in db:
+            np.testing.assert_array_equal(db[name], mirror[name])
+
+    def test_group_slices(self):
+        arrays = pitch_arrays(self.session, pitcher=self.pitchers)
+        arsenals = group_slices(arrays, "pitcher")
+        self.assertEqual(sorted(arsenals), self.pitchers)
+        speeds = arsenals[self.pitchers[0]]["release_speed"]
+        self.assertTrue(np.shares_memory(speeds, arrays["release_speed"]))
+
+    def test_arrow(self):
+        table = pitch_arrays(self.session, columns=["pitch_type"], arrow=True)
+        self.assertEqual(table.column_names, ["pitch_type"])
+        self.assertEqual(table.num_rows, self.session.query(StatcastPitching).count())
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,91 @@
+import os
+import sys
+
+this_file = os.path.realpath(__file__)
+sys.path.insert(1, os.path.realpath(os.path.join(this_file, "../../..")))
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from dormouse.extras.cache import get_cache
+from dormouse.extras.crosswalk import IdCrosswalk
+from dormouse.tables import dbPerson
+from dormouse.tables.dbMeta import IngestManifest
+from dormouse.tables.dbPerson import (
+    CROSSWALK_CACHE_KEY,
+    PlayerLookup,
+    load_crosswalk,
+    populate_player_lu,
+)
+from dormouse.tests.helpers import (
+    memory_session,
+    remove_temp_dirs,
+    seed_offline_cache,
+)
+
+
+def setUpModule():
+    seed_offline_cache(register_players=300)
+
+
+def tearDownModule():
+    remove_temp_dirs()
+
+
+class TestCrosswalk(unittest.TestCase):
+    def setUp(self):
+        self.session = memory_session(PlayerLookup, IngestManifest)
+        populate_player_lu(self.session)
+        self.lookup = pd.read_sql(
+            "SELECT * FROM player_lookup", self.session.connection()
+        )
+        dbPerson._CROSSWALKS.clear()
+
+    def test_translate(self):
+        crosswalk = load_crosswalk(self.session)
+        self.assertEqual(len(crosswalk), len(self.lookup))
+        self.assertEqual(crosswalk["key_mlbam"].dtype, np.int32)
+
+        # Unknown ids and NaN translate to the missing value of the target
+        mlbam = np.r_[self.lookup["key_mlbam"].to_numpy()[::-1], 1, np.nan]
+        retro = crosswalk.translate(mlbam, "key_mlbam", "key_retro")
+        self.assertEqual(
+            list(retro[:-2]), list(self.lookup["key_retro"].to_numpy()[::-1])
+        )
+        self.assertEqual(list(retro[-2:]), ["", ""])
+        np.testing.assert_array_equal(
+            crosswalk.translate(retro, "key_retro", "key_mlbam")[:-2], mlbam[:-2]
+        )
+        self.assertEqual(
+            crosswalk.translate(["nobody"], "key_bbref", "key_mlbam"), [-1]
+        )
+
+    def test_cached_for_other_processes(self):
+        crosswalk = load_crosswalk(self.session)
+        self.assertIs(load_crosswalk(self.session), crosswalk)
+
+        # A fresh process finds the crosswalk in the source cache
+        dbPerson._CROSSWALKS.clear()
+        self.session.query(PlayerLookup).delete()
+        checksum = self.session.query(IngestManifest.checksum).scalar()
+        self.assertIsNotNone(get_cache().get(CROSSWALK_CACHE_KEY.format(checksum)))
+        cached = load_crosswalk(self.session)
+        self.assertEqual(cached.columns, crosswalk.columns)
+        for name in cached.columns:
+            np.testing.assert_array_equal(cached[name], crosswalk[name])
+        self.session.rollback()
+        self.assertIsNot(load_crosswalk(self.session, refresh=True), cached)
+
+    def test_duplicates(self):
+        crosswalk = IdCrosswalk.from_frame(
+            pd.DataFrame({"a": [3, 1, 3], "b": ["x", "y", "z"]})
+        )
+        self.assertEqual(
+            list(crosswalk.translate([3, 2, 1], "a", "b")), ["x", "", "y"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -13,9 +13,12 @@ from sqlalchemy import create_engine, distinct, func
 from sqlalchemy.orm import sessionmaker
 
 from dormouse.tables.dbGame import (
+    GameInningRuns,
     GameLog,
+    LineupSlot,
     TeamRoster,
     TeamLineup,
+    get_line_score,
     populate_game_log,
     populate_team_roster,
 )
@@ -29,18 +32,19 @@ from dormouse.tables.dbPerson import (
 )
 
 from dormouse.tables.dbMeta import populate_team_data, Teams
+from dormouse.tests.helpers import remove_temp_dirs, temp_dir
+
+
+def tearDownModule():
+    remove_temp_dirs()
 
 
 # @unittest.skip("")
 class TestPlayerBPopulation(unittest.TestCase):
     @classmethod
     def setUpClass(self):
-        try:
-            os.remove("test.db")
-        except:  # This is a hacky way to do this
-            pass
-
-        engine = create_engine("sqlite:///test.db", echo=False)
+        path = os.path.join(temp_dir(), "test.db")
+        engine = create_engine("sqlite:///" + path, echo=False)
         Session = sessionmaker(bind=engine)
         Session.configure(bind=engine)
         # Base = declarative_base()
@@ -93,17 +97,15 @@ class TestPlayerBPopulation(unittest.TestCase):
 class TestGameDBPopulate(unittest.TestCase):
     @classmethod
     def setUpClass(self):
-        try:
-            os.remove("test2.db")
-        except:  # This is a hacky way to do this
-            pass
-
-        engine = create_engine("sqlite:///test2.db", echo=False)
+        path = os.path.join(temp_dir(), "test2.db")
+        engine = create_engine("sqlite:///" + path, echo=False)
         Session = sessionmaker(bind=engine)
         Session.configure(bind=engine)
         # Base = declarative_base()
         GameLog.__table__.create(bind=engine, checkfirst=True)
+        GameInningRuns.__table__.create(bind=engine, checkfirst=True)
         TeamLineup.__table__.create(bind=engine, checkfirst=True)
+        LineupSlot.__table__.create(bind=engine, checkfirst=True)
         TeamRoster.__table__.create(bind=engine, checkfirst=True)
         self.session = Session()
         self.file_dir = os.path.realpath(__file__)
@@ -123,19 +125,20 @@ class TestGameDBPopulate(unittest.TestCase):
         pass
 
     def test_line_score_parse(self):
-        # TODO: Game log line score parsing
-        pass
+        game = pd.Series(
+            {"VisitingLineScore": "010000(10)00", "HomeLineScore": "00200010x"}
+        )
+        self.assertEqual(
+            get_line_score(game, "Visiting"), [0, 1, 0, 0, 0, 0, 10, 0, 0]
+        )
+        self.assertEqual(get_line_score(game), [0, 0, 2, 0, 0, 0, 1, 0])
 
 
 class TestMetaDBPopulate(unittest.TestCase):
     @classmethod
     def setUpClass(self):
-        try:
-            os.remove("test3.db")
-        except:  # This is a hacky way to do this
-            pass
-
-        engine = create_engine("sqlite:///test3.db", echo=False)
+        path = os.path.join(temp_dir(), "test3.db")
+        engine = create_engine("sqlite:///" + path, echo=False)
         Session = sessionmaker(bind=engine)
         Session.configure(bind=engine)
         Teams.__table__.create(bind=engine, checkfirst=True)
@@ -0,0 +1,56 @@
+import os
+import sys
+
+this_file = os.path.realpath(__file__)
+sys.path.insert(1, os.path.realpath(os.path.join(this_file, "../../..")))
+
+import unittest
+
+from dormouse.extras.engine import get_engine, restore_settings, saved_settings
+from dormouse.extras.scheduler import BuildTask, run_tasks
+from dormouse.tests.helpers import remove_temp_dirs, temp_dir
+
+# WAL, synchronous OFF and temp_store MEMORY
+BUILD = {"journal_mode": "wal", "synchronous": 0, "temp_store": 2}
+
+
+def tearDownModule():
+    remove_temp_dirs()
+
+
+def _pragmas(connection):
+    return {x: connection.exec_driver_sql(f"PRAGMA {x}").scalar() for x in BUILD}
+
+
+def _worker_pragmas(session):
+    return _pragmas(session.connection())
+
+
+class TestEngine(unittest.TestCase):
+    def setUp(self):
+        self.connection = "sqlite:///" + os.path.join(temp_dir(), "db.sqlite")
+
+    def _read(self, build=False):
+        engine = get_engine(self.connection, build=build)
+        try:
+            with engine.connect() as connection:
+                return _pragmas(connection)
+        finally:
+            engine.dispose()
+
+    def test_build_settings_are_restored(self):
+        normal = self._read()
+        settings = saved_settings(self.connection)
+        self.assertEqual(settings, {"journal_mode": "delete"})
+
+        self.assertEqual(self._read(build=True), BUILD)
+        # The build workers run with the same settings
+        results = run_tasks([BuildTask("a", _worker_pragmas)], self.connection)
+        self.assertEqual(results, {"a": BUILD})
+
+        restore_settings(self.connection, settings)
+        self.assertEqual(self._read(), normal)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,78 @@
+import os
+import sys
+
+this_file = os.path.realpath(__file__)
+sys.path.insert(1, os.path.realpath(os.path.join(this_file, "../../..")))
+
+import os
+import random
+import time
+import unittest
+
+from dormouse.extras.cache import SourceCache
+from dormouse.extras.fetch import TokenBucket, fetch_ordered
+from dormouse.tests.helpers import remove_temp_dirs, temp_dir
+
+
+def tearDownModule():
+    remove_temp_dirs()
+
+
+class TestFetchOrdered(unittest.TestCase):
+    def test_results_come_back_in_order(self):
+        def _slow_square(x):
+            time.sleep(random.uniform(0, 0.02))
+            if x == 5:
+                raise ValueError("no games")
+            return x * x
+
+        results = []
+        for item, future in fetch_ordered(_slow_square, range(20), workers=4):
+            try:
+                results.append((item, future.result()))
+            except ValueError:
+                results.append((item, None))
+
+        self.assertEqual([x[0] for x in results], list(range(20)))
+        self.assertEqual(results[3], (3, 9))
+        self.assertEqual(results[5], (5, None))
+
+    def test_token_bucket_limits_rate(self):
+        limiter = TokenBucket(rate=50.0)
+        t_start = time.monotonic()
+        list(fetch_ordered(lambda x: x, range(11), workers=4, limiter=limiter))
+        # The first request uses the initial token, the other 10 wait 1/50 s each
+        self.assertGreaterEqual(time.monotonic() - t_start, 0.19)
+
+
+class TestSourceCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = SourceCache(temp_dir(), max_bytes=250)
+
+    def test_content_addressed(self):
+        a = self.cache.put_bytes("a", b"x" * 100)
+        b = self.cache.put_bytes("b", b"x" * 100)
+        self.assertEqual(a, b)
+        self.assertEqual(self.cache.size(), 100)
+
+    def test_lru_eviction(self):
+        self.cache.put_bytes("a", b"a" * 100)
+        self.cache.put_bytes("b", b"b" * 100)
+        self.cache.get("a")
+        self.cache.put_bytes("c", b"c" * 100)
+        self.assertIsNone(self.cache.get("b"))
+        self.assertIsNotNone(self.cache.get("a"))
+        self.assertIsNotNone(self.cache.get("c"))
+        self.assertEqual(self.cache.size(), 200)
+
+    def test_offline(self):
+        self.cache.put_bytes("http://example.com/a.csv", b"1,2,3")
+        self.cache.offline = True
+        with open(self.cache.fetch("http://example.com/a.csv"), "rb") as f:
+            self.assertEqual(f.read(), b"1,2,3")
+        with self.assertRaises(FileNotFoundError):
+            self.cache.fetch("http://example.com/b.csv")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
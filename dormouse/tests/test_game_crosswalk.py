@@ -0,0 +1,106 @@
+import datetime
+import os
+import sys
+
+this_file = os.path.realpath(__file__)
+sys.path.insert(1, os.path.realpath(os.path.join(this_file, "../../..")))
+
+import unittest
+
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from dormouse.extras.bulk import bulk_load_df
+from dormouse.tables.dbGame import GameCrosswalk, GameLog, populate_game_crosswalk
+from dormouse.tables.dbMeta import (
+    IngestManifest,
+    Teams,
+    populate_team_data,
+    update_manifest,
+)
+from dormouse.tables.dbPerson import StatcastPitching
+
+DAYS = [datetime.datetime(2019, 4, 1), datetime.datetime(2019, 4, 2)]
+
+
+def _pitches(game_pk, day, home_team, n_pitches=5, game_type="R"):
+    return pd.DataFrame(
+        {
+            "UID": [f"{game_pk}-{i}" for i in range(n_pitches)],
+            "game_pk": game_pk,
+            "game_date": day,
+            "home_team": home_team,
+            "game_type": game_type,
+        }
+    )
+
+
+def _log(uid, day, home_team, series):
+    return {"UID": uid, "Date": day, "HomeTeam": home_team, "GameSeriesNumber": series}
+
+
+class TestGameCrosswalk(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://", echo=False)
+        for tbl in [StatcastPitching, GameLog, Teams, GameCrosswalk, IngestManifest]:
+            tbl.__table__.create(bind=engine)
+        self.session = sessionmaker(bind=engine)()
+        populate_team_data(self.session)
+
+        # A doubleheader in Los Angeles, a single game in New York, and a game in
+        # Seattle whose game log has not been published yet
+        pitches = pd.concat(
+            [
+                _pitches(565002, DAYS[0], "LAD"),
+                _pitches(565001, DAYS[0], "LAD"),
+                _pitches(565010, DAYS[0], "NYY"),
+                _pitches(565020, DAYS[1], "SEA"),
+            ]
+        )
+        bulk_load_df(self.session, StatcastPitching, pitches)
+        for day in DAYS:
+            update_manifest(self.session, "statcast", day.strftime("%Y-%m-%d"), 5, "a")
+        logs = [
+            _log("lan1", DAYS[0], "LAN", 1),
+            _log("lan2", DAYS[0], "LAN", 2),
+            _log("nya", DAYS[0], "NYA", 0),
+        ]
+        bulk_load_df(self.session, GameLog, pd.DataFrame(logs))
+        update_manifest(self.session, "gamelog", "2019", 3, "a")
+
+    def _crosswalk(self):
+        return dict(self.session.query(GameCrosswalk.game_pk, GameCrosswalk.game_uid))
+
+    def test_incremental_matching(self):
+        self.assertEqual(populate_game_crosswalk(self.session), 3)
+        self.assertEqual(
+            self._crosswalk(), {565001: "lan1", 565002: "lan2", 565010: "nya"}
+        )
+        row = self.session.get(GameCrosswalk, 565010)
+        self.assertEqual((row.home_team, row.game_number), ("NYA", 0))
+        # Nothing new
+        self.assertEqual(populate_game_crosswalk(self.session), 0)
+
+        # The Seattle game log arrives with a new version of the season
+        log = pd.DataFrame([_log("sea", DAYS[1], "SEA", 0)])
+        bulk_load_df(self.session, GameLog, log)
+        update_manifest(self.session, "gamelog", "2019", 4, "b")
+        self.assertEqual(populate_game_crosswalk(self.session), 1)
+        self.assertEqual(self._crosswalk()[565020], "sea")
+
+        self.assertEqual(populate_game_crosswalk(self.session, refresh=True), 4)
+
+    def test_spring_games_are_ignored(self):
+        # A split squad spring game in Los Angeles on the day of the doubleheader,
+        # which would otherwise be numbered as its first game
+        spring = _pitches(564990, DAYS[0], "LAD", game_type="S")
+        bulk_load_df(self.session, StatcastPitching, spring)
+        self.assertEqual(populate_game_crosswalk(self.session), 3)
+        self.assertEqual(
+            self._crosswalk(), {565001: "lan1", 565002: "lan2", 565010: "nya"}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
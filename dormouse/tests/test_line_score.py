@@ -0,0 +1,66 @@
+import os
+import sys
+
+this_file = os.path.realpath(__file__)
+sys.path.insert(1, os.path.realpath(os.path.join(this_file, "../../..")))
+
+import unittest
+
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from dormouse.extras.bulk import bulk_load_df
+from dormouse.tables.dbGame import (
+    GameInningRuns,
+    GameLog,
+    get_line_score,
+    inning_run_distribution,
+    inning_runs_frame,
+    populate_inning_runs,
+)
+
+GAMES = pd.DataFrame(
+    {
+        "UID": ["a", "b", "c"],
+        # Ten run inning, extra innings, a walk-off with the home ninth unplayed
+        "VisitingLineScore": ["010000(10)00", "00000000000", "000000001"],
+        "HomeLineScore": ["10000000x", "(12)0000000001", "00000000X"],
+    },
+    index=[3, 4, 5],
+)
+
+
+class TestLineScore(unittest.TestCase):
+    def test_frame_matches_rows(self):
+        runs = inning_runs_frame(GAMES, GAMES["UID"])
+        for _, game in GAMES.iterrows():
+            for side in ["Visiting", "Home"]:
+                innings = runs[
+                    (runs["game_uid"] == game["UID"]) & (runs["side"] == side)
+                ]
+                self.assertEqual(
+                    innings.sort_values("inning")["runs"].tolist(),
+                    get_line_score(game, side),
+                )
+        self.assertEqual(runs["inning"].max(), 11)
+        self.assertEqual(runs["runs"].max(), 12)
+        self.assertFalse(runs["UID"].duplicated().any())
+
+    def test_backfill_and_distribution(self):
+        engine = create_engine("sqlite://", echo=False)
+        for tbl in [GameLog, GameInningRuns]:
+            tbl.__table__.create(bind=engine)
+        session = sessionmaker(bind=engine)()
+        bulk_load_df(session, GameLog, GAMES)
+
+        self.assertEqual(populate_inning_runs(session), 56)
+        self.assertEqual(populate_inning_runs(session), 0)
+        dist = inning_run_distribution(session, side="Home")
+        first = dist[dist["inning"] == 1].set_index("runs")["n_innings"]
+        self.assertEqual(first.to_dict(), {0: 1, 1: 1, 12: 1})
+        self.assertEqual(inning_run_distribution(session)["n_innings"].sum(), 56)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,116 @@
+import datetime
+import os
+import sys
+
+this_file = os.path.realpath(__file__)
+sys.path.insert(1, os.path.realpath(os.path.join(this_file, "../../..")))
+
+import io
+import unittest
+import zipfile
+
+from sqlalchemy import create_engine, inspect
+
+from dormouse.extras.bulk import add_missing_columns
+from dormouse.extras.cache import get_cache
+from dormouse.extras.synthetic import game_log
+from dormouse.tables.dbGame import (
+    GAMELOG_URL,
+    GameInningRuns,
+    GameLog,
+    LineupSlot,
+    TeamLineup,
+    lineup_starts,
+    populate_game_log,
+    populate_lineup_slots,
+)
+from dormouse.tables.dbMeta import IngestManifest
+from dormouse.tests.helpers import (
+    memory_session,
+    remove_temp_dirs,
+    seed_offline_cache,
+)
+
+
+def setUpModule():
+    seed_offline_cache()
+
+
+def tearDownModule():
+    remove_temp_dirs()
+
+
+class TestLineupSlots(unittest.TestCase):
+    def setUp(self):
+        self.session = memory_session(
+            GameLog, GameInningRuns, TeamLineup, LineupSlot, IngestManifest
+        )
+        populate_game_log(2019, "rs", self.session)
+
+    def test_matches_game_log(self):
+        game = self.session.query(GameLog).first()
+        starts = lineup_starts(self.session, team=game.HomeTeam)
+        starts = starts[starts["game_uid"] == game.UID]
+        self.assertEqual(len(starts), 10)
+        self.assertEqual(
+            starts["player_id"].tolist(),
+            [game.Home_StartingPID]
+            + [getattr(game, f"Home_Batter{i}ID") for i in range(1, 10)],
+        )
+        self.assertEqual(starts["position"].tolist(), [1] + list(range(1, 10)))
+
+        # The ORM lineup reads every slot from its own fields
+        lineup = TeamLineup(game, "Home")
+        self.assertEqual(lineup.team, game.HomeTeam)
+        self.assertEqual(lineup.Batter3ID, game.Home_Batter3ID)
+        self.assertEqual(lineup.Batter6Pos, game.Home_Batter6Pos)
+        stored = self.session.query(TeamLineup).filter_by(team=game.HomeTeam).all()
+        self.assertGreater(len(stored), 0)
+
+        player = game.Home_Batter4ID
+        cleanup = lineup_starts(self.session, player_id=player, slot=4)
+        self.assertIn(game.UID, cleanup["game_uid"].tolist())
+        self.assertTrue((cleanup["player_id"] == player).all())
+
+    def test_backfill(self):
+        n_slots = self.session.query(LineupSlot).count()
+        self.session.query(LineupSlot).delete()
+        self.assertEqual(populate_lineup_slots(self.session), n_slots)
+        self.assertEqual(populate_lineup_slots(self.session), 0)
+
+    def test_blank_ids_are_skipped(self):
+        df = game_log(2018, n_games=4)
+        df.loc[0, "Home_Batter9ID"] = None
+        df.loc[1, "Visiting_StartingPID"] = None
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w") as archive:
+            archive.writestr("GL2018.TXT", df.to_csv(header=False, index=False))
+        get_cache().put_bytes(GAMELOG_URL.format(2018), buf.getvalue())
+        populate_game_log(2018, "rs", self.session)
+
+        slots = lineup_starts(self.session, end_date=datetime.datetime(2018, 12, 31))
+        self.assertEqual(len(slots), 4 * 2 * 10 - 2)
+        self.assertFalse(slots["player_id"].isin(["0", ""]).any())
+
+
+class TestAddMissingColumns(unittest.TestCase):
+    def test_team_lineups(self):
+        engine = create_engine("sqlite://", echo=False)
+        with engine.begin() as connection:
+            # team_lineups as it was created before team was a column
+            connection.exec_driver_sql(
+                "CREATE TABLE team_lineups (UID VARCHAR(32) PRIMARY KEY)"
+            )
+            self.assertIn(
+                "team_lineups.team", add_missing_columns(connection, [TeamLineup])
+            )
+            self.assertEqual(add_missing_columns(connection, [TeamLineup]), [])
+            columns = inspect(connection).get_columns("team_lineups")
+        self.assertEqual(
+            sorted(x["name"] for x in columns),
+            sorted(x.name for x in TeamLineup.__table__.columns),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,232 @@
+import datetime
+import os
+import sys
+
+this_file = os.path.realpath(__file__)
+sys.path.insert(1, os.path.realpath(os.path.join(this_file, "../../..")))
+
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from dormouse.extras.fetch import PartialFetchError
+from dormouse.tables.dbMeta import IngestManifest, manifest_partitions
+from dormouse.tables.dbPerson import (
+    PlayerGameStats,
+    StatcastPitching,
+    populate_player_game_stats,
+    populate_statcast,
+)
+from dormouse.tests.helpers import empty_cache, remove_temp_dirs
+from dormouse.tests.test_bulk_load import _fake_statcast
+
+
+def tearDownModule():
+    remove_temp_dirs()
+
+
+class TestIncrementalStatcast(unittest.TestCase):
+    def setUp(self):
+        empty_cache()
+        engine = create_engine("sqlite://", echo=False)
+        StatcastPitching.__table__.create(bind=engine, checkfirst=True)
+        IngestManifest.__table__.create(bind=engine, checkfirst=True)
+        self.session = sessionmaker(bind=engine)()
+        self.fetched = []
+
+    def _fetch(self, start_dt=None):
+        self.fetched.append(start_dt)
+        return _fake_statcast(start_dt)
+
+    @mock.patch("dormouse.extras.fetch.TokenBucket.acquire", lambda *x: None)
+    def test_only_missing_days_are_fetched(self):
+        date_begin = datetime.datetime(day=1, month=4, year=2019)
+        with mock.patch("dormouse.tables.dbPerson.statcast", self._fetch):
+            populate_statcast(
+                date_begin, datetime.datetime(day=3, month=4, year=2019), self.session
+            )
+            self.assertEqual(len(self.fetched), 3)
+            self.assertEqual(
+                sorted(manifest_partitions(self.session, "statcast")),
+                ["2019-04-01", "2019-04-02", "2019-04-03"],
+            )
+
+            with self.subTest("Rerunning the same range fetches nothing"):
+                self.fetched = []
+                n_rows = populate_statcast(
+                    date_begin,
+                    datetime.datetime(day=3, month=4, year=2019),
+                    self.session,
+                )
+                self.assertEqual((n_rows, self.fetched), (0, []))
+
+            with self.subTest("Extending the range fetches only the new day"):
+                n_rows = populate_statcast(
+                    date_begin,
+                    datetime.datetime(day=4, month=4, year=2019),
+                    self.session,
+                    bulk=True,
+                )
+                self.assertEqual(self.fetched, ["2019-04-04"])
+                self.assertEqual(n_rows, 50)
+
+            with self.subTest("Refresh re-fetches but skips unchanged days"):
+                self.fetched = []
+                n_rows = populate_statcast(
+                    date_begin,
+                    datetime.datetime(day=4, month=4, year=2019),
+                    self.session,
+                    refresh=True,
+                )
+                self.assertEqual((n_rows, len(self.fetched)), (0, 4))
+
+    def test_cached_days_are_not_throttled(self):
+        acquired = []
+        with mock.patch(
+            "dormouse.extras.fetch.TokenBucket.acquire", lambda *x: acquired.append(1)
+        ):
+            with mock.patch("dormouse.tables.dbPerson.statcast", self._fetch):
+                populate_statcast(
+                    datetime.datetime(day=1, month=4, year=2019),
+                    datetime.datetime(day=2, month=4, year=2019),
+                    self.session,
+                )
+            self.assertEqual(len(acquired), 2)
+
+            # Rebuilding from the source cache never waits for the limiter
+            acquired.clear()
+            self.session.query(IngestManifest).delete()
+            self.session.query(StatcastPitching).delete()
+            self.session.commit()
+            populate_statcast(
+                datetime.datetime(day=1, month=4, year=2019),
+                datetime.datetime(day=2, month=4, year=2019),
+                self.session,
+            )
+            self.assertEqual(acquired, [])
+
+    @mock.patch("dormouse.extras.fetch.TokenBucket.acquire", lambda *x: None)
+    @mock.patch("dormouse.extras.fetch.time.sleep", lambda x: None)
+    def test_failed_days_are_retried_next_run(self):
+        def _drop_connection(start_dt=None):
+            if start_dt == "2019-04-02":
+                raise ConnectionError("dropped")
+            return self._fetch(start_dt)
+
+        with mock.patch("dormouse.tables.dbPerson.statcast", _drop_connection):
+            with self.assertRaises(PartialFetchError) as err:
+                populate_statcast(
+                    datetime.datetime(day=1, month=4, year=2019),
+                    datetime.datetime(day=3, month=4, year=2019),
+                    self.session,
+                    retries=2,
+                )
+        self.assertEqual(err.exception.partitions, ["2019-04-02"])
+        # Every other day is still loaded
+        self.assertEqual(self.fetched, ["2019-04-01", "2019-04-03"])
+        self.assertEqual(
+            sorted(manifest_partitions(self.session, "statcast")),
+            ["2019-04-01", "2019-04-03"],
+        )
+
+        self.fetched = []
+        with mock.patch("dormouse.tables.dbPerson.statcast", self._fetch):
+            populate_statcast(
+                datetime.datetime(day=1, month=4, year=2019),
+                datetime.datetime(day=3, month=4, year=2019),
+                self.session,
+            )
+        self.assertEqual(self.fetched, ["2019-04-02"])
+
+    @mock.patch("dormouse.extras.fetch.TokenBucket.acquire", lambda *x: None)
+    def test_seeded_from_existing_table(self):
+        with mock.patch("dormouse.tables.dbPerson.statcast", _fake_statcast):
+            populate_statcast(
+                datetime.datetime(day=1, month=4, year=2019),
+                datetime.datetime(day=2, month=4, year=2019),
+                self.session,
+            )
+        # Simulate a database built before the manifest existed
+        self.session.query(IngestManifest).delete()
+        self.session.commit()
+
+        with mock.patch("dormouse.tables.dbPerson.statcast", self._fetch):
+            populate_statcast(
+                datetime.datetime(day=1, month=4, year=2019),
+                datetime.datetime(day=3, month=4, year=2019),
+                self.session,
+            )
+        self.assertEqual(self.fetched, ["2019-04-03"])
+
+    @mock.patch("dormouse.extras.fetch.TokenBucket.acquire", lambda *x: None)
+    def test_seeded_days_with_pitches_only(self):
+        for day in [1, 3]:
+            with mock.patch("dormouse.tables.dbPerson.statcast", _fake_statcast):
+                populate_statcast(
+                    datetime.datetime(day=day, month=4, year=2019),
+                    datetime.datetime(day=day, month=4, year=2019),
+                    self.session,
+                )
+        self.session.query(IngestManifest).delete()
+        self.session.commit()
+
+        # The day missing between the first and last pitch is still fetched
+        with mock.patch("dormouse.tables.dbPerson.statcast", self._fetch):
+            populate_statcast(
+                datetime.datetime(day=1, month=4, year=2019),
+                datetime.datetime(day=3, month=4, year=2019),
+                self.session,
+            )
+        self.assertEqual(self.fetched, ["2019-04-02"])
+
+
+class TestChunkedRetrosplits(unittest.TestCase):
+    url = (
+        "https://raw.githubusercontent.com/chadwickbureau/retrosplits/master/"
+        "daybyday/playing-{}.csv"
+    )
+
+    def setUp(self):
+        cache = empty_cache(offline=True)
+        for season, n_games in [(2018, 30), (2019, 25)]:
+            dates = [f"{season}-04-{x % 28 + 1:02d}" for x in range(n_games)]
+            df = pd.DataFrame(
+                {
+                    "game.key": [f"ANA{season}04{x:02d}0" for x in range(n_games)],
+                    "game.date": dates,
+                    "appear.date": dates,
+                    "person.key": ["troum001"] * n_games,
+                    "B_PA": range(n_games),
+                    "B_H": [None] * n_games,
+                }
+            )
+            cache.put_bytes(self.url.format(season), df.to_csv(index=False).encode())
+
+        engine = create_engine("sqlite://", echo=False)
+        PlayerGameStats.__table__.create(bind=engine, checkfirst=True)
+        IngestManifest.__table__.create(bind=engine, checkfirst=True)
+        self.session = sessionmaker(bind=engine)()
+
+    @mock.patch("dormouse.extras.pybb.RETRO_CHUNK_ROWS", 7)
+    def test_seasons_are_loaded_in_chunks(self):
+        n_rows = populate_player_game_stats(2018, 2019, self.session)
+        self.assertEqual(n_rows, 55)
+        self.assertEqual(
+            self.session.query(PlayerGameStats)
+            .filter(PlayerGameStats.B_PA == 29)
+            .one()
+            .game_date,
+            datetime.datetime(2018, 4, 2),
+        )
+        self.assertEqual(
+            manifest_partitions(self.session, "retrosplits").keys(), {"2018", "2019"}
+        )
+        self.assertEqual(populate_player_game_stats(2018, 2019, self.session), 0)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
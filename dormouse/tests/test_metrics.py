@@ -0,0 +1,63 @@
+import os
+import sys
+
+this_file = os.path.realpath(__file__)
+sys.path.insert(1, os.path.realpath(os.path.join(this_file, "../../..")))
+
+import time
+import unittest
+
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from dormouse.extras.bulk import merge_df
+from dormouse.extras.fetch import fetch_ordered
+from dormouse.extras.metrics import count, stage, summarize, timed
+from dormouse.tables.dbMeta import Teams
+
+
+class TestStageMetrics(unittest.TestCase):
+    def test_counters_and_phases(self):
+        with stage("test") as metrics:
+            count(rows_parsed=10)
+            count(rows_parsed=5, bytes_downloaded=100)
+            with timed("transform"):
+                time.sleep(0.01)
+        stats = metrics.to_dict()
+        self.assertEqual((stats["rows_parsed"], stats["bytes_downloaded"]), (15, 100))
+        self.assertGreater(stats["seconds"]["transform"], 0.0)
+        self.assertGreaterEqual(stats["wall_time"], stats["seconds"]["transform"])
+
+        # Outside of a stage nothing is recorded
+        count(rows_parsed=1)
+        self.assertEqual(metrics.counters["rows_parsed"], 15)
+
+    def test_fetch_threads_report_to_the_stage(self):
+        def _fetch(x):
+            count(bytes_downloaded=x)
+            return x
+
+        with stage("fetch") as metrics:
+            for _, result in fetch_ordered(_fetch, range(10), workers=4):
+                result.result()
+        self.assertEqual(metrics.counters["bytes_downloaded"], 45)
+
+    def test_merge_counts_inserted_and_skipped(self):
+        engine = create_engine("sqlite://", echo=False)
+        Teams.__table__.create(bind=engine)
+        session = sessionmaker(bind=engine)()
+        df = pd.DataFrame({"UID": ["a", "b"], "name": ["A", "B"]})
+
+        with stage("first") as first:
+            merge_df(session, Teams, df)
+        with stage("second") as second:
+            merge_df(session, Teams, pd.concat([df, df.assign(UID="c")]))
+
+        totals = summarize([first.to_dict(), second.to_dict()])
+        self.assertEqual((totals["rows_inserted"], totals["rows_skipped"]), (3, 3))
+        self.assertGreater(totals["seconds"]["flush"], 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,93 @@
+import datetime
+import os
+import sys
+
+this_file = os.path.realpath(__file__)
+sys.path.insert(1, os.path.realpath(os.path.join(this_file, "../../..")))
+
+import unittest
+
+import pandas as pd
+
+from dormouse.tables.dbMeta import IngestManifest
+from dormouse.tables.dbPerson import (
+    StatcastPitching,
+    export_statcast,
+    populate_statcast,
+    read_statcast,
+)
+from dormouse.tests.helpers import (
+    memory_session,
+    remove_temp_dirs,
+    seed_offline_cache,
+    temp_dir,
+)
+
+DAYS = [datetime.datetime(2019, 4, 30), datetime.datetime(2019, 5, 1)]
+
+
+def setUpModule():
+    seed_offline_cache(statcast_days=DAYS, pitches_per_day=300)
+
+
+def tearDownModule():
+    remove_temp_dirs()
+
+
+class TestStatcastMirror(unittest.TestCase):
+    def setUp(self):
+        self.session = memory_session(StatcastPitching, IngestManifest)
+        self.root = temp_dir()
+
+    def test_days_are_mirrored_as_they_load(self):
+        populate_statcast(
+            DAYS[0], DAYS[-1], self.session, bulk=True, rate=None, parquet_dir=self.root
+        )
+        for path in [
+            "game_year=2019/month=4/2019-04-30.parquet",
+            "game_year=2019/month=5/2019-05-01.parquet",
+        ]:
+            self.assertTrue(os.path.isfile(os.path.join(self.root, path)))
+
+        df = read_statcast(self.root)
+        self.assertEqual(len(df), self.session.query(StatcastPitching).count())
+        self.assertEqual(set(df["game_year"]), {2019})
+
+    def test_projection_and_filters(self):
+        populate_statcast(
+            DAYS[0], DAYS[-1], self.session, bulk=True, rate=None, parquet_dir=self.root
+        )
+        pitcher = self.session.query(StatcastPitching.pitcher).first()[0]
+        df = read_statcast(
+            self.root,
+            columns=["UID", "pitcher", "release_speed"],
+            pitcher=pitcher,
+            start_dt=DAYS[1],
+            end_date=DAYS[1],
+        )
+        expected = (
+            self.session.query(StatcastPitching.UID)
+            .filter(
+                StatcastPitching.pitcher == pitcher,
+                StatcastPitching.game_date >= DAYS[1],
+            )
+            .all()
+        )
+        self.assertEqual(list(df.columns), ["UID", "pitcher", "release_speed"])
+        self.assertEqual(set(df["UID"]), set(x[0] for x in expected))
+
+    def test_export_backfills_the_mirror(self):
+        populate_statcast(DAYS[0], DAYS[-1], self.session, bulk=True, rate=None)
+        self.assertEqual(len(read_statcast(self.root)), 0)
+
+        n_rows = export_statcast(self.session, self.root)
+        self.assertEqual(n_rows, self.session.query(StatcastPitching).count())
+        df = read_statcast(self.root, columns=["game_date"])
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df["game_date"]))
+        self.assertEqual(len(df), n_rows)
+        # Closed months are only exported once
+        self.assertEqual(export_statcast(self.session, self.root), 0)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,174 @@
+import datetime
+import os
+import sys
+
+this_file = os.path.realpath(__file__)
+sys.path.insert(1, os.path.realpath(os.path.join(this_file, "../../..")))
+
+import unittest
+
+from sqlalchemy import Column, DateTime, Integer, String, create_engine, text
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from dormouse.extras.partitions import (
+    create_partitioned_table,
+    ensure_partitions,
+    keep_rows_outside,
+    partition_info,
+    partition_name,
+    partition_ranges,
+    staging_table,
+    swap_partition,
+)
+from dormouse.tables.dbMeta import IngestManifest
+from dormouse.tables.dbPerson import StatcastPitching, replace_statcast_season
+from dormouse.tests.helpers import postgres_engine
+
+
+class _Pitches(declarative_base()):
+    __tablename__ = "dormouse_test_pitches"
+    UID = Column(String(50), primary_key=True)
+    game_date = Column(DateTime)
+    value = Column(Integer)
+
+
+class TestPartitionRanges(unittest.TestCase):
+    def test_ranges(self):
+        start = datetime.datetime(2019, 3, 28)
+        end = datetime.datetime(2020, 1, 2)
+        years = partition_ranges(start, end, "year")
+        self.assertEqual(
+            years,
+            [
+                (datetime.datetime(2019, 1, 1), datetime.datetime(2020, 1, 1)),
+                (datetime.datetime(2020, 1, 1), datetime.datetime(2021, 1, 1)),
+            ],
+        )
+        months = partition_ranges(start, end, "month")
+        self.assertEqual(len(months), 11)
+        self.assertEqual(months[0][0], datetime.datetime(2019, 3, 1))
+        self.assertEqual(months[-2][1], datetime.datetime(2020, 1, 1))
+        # Every partition starts where the last one ended
+        for a, b in zip(months, months[1:]):
+            self.assertEqual(a[1], b[0])
+
+        self.assertEqual(
+            partition_name(StatcastPitching, years[0][0], "year"),
+            "statcast_pitching_y2019",
+        )
+        self.assertEqual(
+            partition_name(StatcastPitching, months[1][0], "month"),
+            "statcast_pitching_y2019m04",
+        )
+
+
+class TestUnpartitioned(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://", echo=False)
+        for tbl in [StatcastPitching, IngestManifest]:
+            tbl.__table__.create(bind=engine)
+        self.session = sessionmaker(bind=engine)()
+
+    def test_sqlite(self):
+        connection = self.session.connection()
+        self.assertIsNone(partition_info(connection, StatcastPitching))
+        day = datetime.datetime(2019, 4, 1)
+        self.assertEqual(ensure_partitions(connection, StatcastPitching, day, day), [])
+        with self.assertRaises(ValueError):
+            create_partitioned_table(connection, StatcastPitching, "game_date")
+        with self.assertRaises(ValueError):
+            replace_statcast_season(self.session, 2019)
+
+
+class TestPartitionedPostgres(unittest.TestCase):
+    """
+    Runs against the database named by DORMOUSE_TEST_POSTGRES, inside a
+    transaction that is rolled back
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = postgres_engine()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.dispose()
+
+    def setUp(self):
+        self.connection = self.engine.connect()
+        self.addCleanup(self.connection.close)
+        self.connection.begin()
+        self.addCleanup(self.connection.rollback)
+        create_partitioned_table(self.connection, _Pitches, "game_date", "year")
+        self.info = partition_info(self.connection, _Pitches)
+
+    def _insert(self, table, rows):
+        self.connection.execute(
+            text(f"INSERT INTO {table} VALUES (:UID, :game_date, :value)"), rows
+        )
+
+    def _rows(self):
+        query = "SELECT * FROM dormouse_test_pitches ORDER BY game_date"
+        return [tuple(x) for x in self.connection.execute(text(query))]
+
+    def test_ensure_partitions(self):
+        self.assertEqual(self.info, ("game_date", "year"))
+        start = datetime.datetime(2019, 3, 28)
+        end = datetime.datetime(2020, 1, 2)
+        names = ["dormouse_test_pitches_y2019", "dormouse_test_pitches_y2020"]
+        for _ in range(2):
+            # The second time they are already there
+            created = ensure_partitions(self.connection, _Pitches, start, end)
+            self.assertEqual(created, names)
+        self._insert(
+            "dormouse_test_pitches",
+            [
+                {"UID": "a", "game_date": start, "value": 1},
+                {"UID": "b", "game_date": end, "value": 2},
+            ],
+        )
+        counts = {
+            x: self.connection.execute(text(f"SELECT count(*) FROM {x}")).scalar()
+            for x in names
+        }
+        self.assertEqual(counts, dict(zip(names, [1, 1])))
+
+    def test_swap_partition(self):
+        start = datetime.datetime(2019, 1, 1)
+        ensure_partitions(self.connection, _Pitches, start, start, self.info)
+        first = datetime.datetime(2019, 3, 1)
+        last = datetime.datetime(2019, 11, 30)
+        winter = datetime.datetime(2019, 12, 20)
+        self._insert(
+            "dormouse_test_pitches",
+            [
+                {"UID": "old", "game_date": datetime.datetime(2019, 4, 1), "value": 1},
+                {"UID": "winter", "game_date": winter, "value": 2},
+            ],
+        )
+
+        staging = staging_table(self.connection, _Pitches, start, self.info)
+        new = {"UID": "new", "game_date": datetime.datetime(2019, 4, 1), "value": 3}
+        self._insert(staging.name, [new])
+        kept = keep_rows_outside(
+            self.connection, _Pitches, staging, start, first, last, self.info
+        )
+        self.assertEqual(kept, 1)
+        swap_partition(self.connection, _Pitches, staging, start, self.info)
+
+        self.assertEqual(self._rows(), [tuple(new.values()), ("winter", winter, 2)])
+        # The swapped in table is the partition, under its usual name
+        self.assertEqual(
+            ensure_partitions(self.connection, _Pitches, start, start, self.info),
+            ["dormouse_test_pitches_y2019"],
+        )
+        self.assertEqual(
+            self.connection.execute(
+                text("SELECT to_regclass('dormouse_test_pitches_y2019_staging')")
+            ).scalar(),
+            None,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
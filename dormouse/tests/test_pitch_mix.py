@@ -0,0 +1,80 @@
+import datetime
+import os
+import sys
+
+this_file = os.path.realpath(__file__)
+sys.path.insert(1, os.path.realpath(os.path.join(this_file, "../../..")))
+
+import unittest
+
+import pandas as pd
+
+from dormouse.tables.dbMeta import IngestManifest
+from dormouse.tables.dbPerson import (
+    PITCH_MIX_KEYS,
+    PitchMix,
+    StatcastPitching,
+    pitch_mix_lookup,
+    populate_pitch_mix,
+    populate_statcast,
+)
+from dormouse.tests.helpers import (
+    memory_session,
+    remove_temp_dirs,
+    seed_offline_cache,
+)
+
+DAYS = [datetime.datetime(2019, 4, 1), datetime.datetime(2019, 4, 2)]
+
+
+def setUpModule():
+    seed_offline_cache(statcast_days=DAYS, pitches_per_day=400)
+
+
+def tearDownModule():
+    remove_temp_dirs()
+
+
+class TestPitchMix(unittest.TestCase):
+    def setUp(self):
+        self.session = memory_session(StatcastPitching, PitchMix, IngestManifest)
+
+    def _mix(self):
+        return (
+            pd.read_sql("SELECT * FROM pitch_mix", self.session.connection())
+            .sort_values("UID")
+            .reset_index(drop=True)
+        )
+
+    def test_distributions(self):
+        populate_statcast(DAYS[0], DAYS[-1], self.session, bulk=True, rate=None)
+        n_rows = populate_pitch_mix(self.session)
+        mix = self._mix()
+        self.assertEqual(n_rows, len(mix))
+        self.assertEqual(mix["n_pitches"].sum(), 800)
+        totals = mix.groupby(PITCH_MIX_KEYS)["frequency"].sum()
+        self.assertTrue(((totals - 1).abs() < 1e-9).all())
+
+        row = mix.iloc[0]
+        key = tuple(row[x] for x in PITCH_MIX_KEYS)
+        pitch_types, frequencies = pitch_mix_lookup(self.session, season=2019)[key]
+        self.assertIn(row["pitch_type"], list(pitch_types))
+        self.assertAlmostEqual(frequencies.sum(), 1.0)
+
+    def test_incremental_update_matches_rebuild(self):
+        populate_statcast(DAYS[0], DAYS[0], self.session, bulk=True, rate=None)
+        populate_pitch_mix(self.session)
+        populate_statcast(DAYS[1], DAYS[1], self.session, bulk=True, rate=None)
+        n_rows = populate_pitch_mix(self.session)
+        incremental = self._mix()
+        self.assertLess(n_rows, len(incremental))
+
+        populate_pitch_mix(self.session, refresh=True)
+        rebuilt = self._mix()
+        pd.testing.assert_frame_equal(incremental, rebuilt)
+        # Nothing new, nothing to do
+        self.assertEqual(populate_pitch_mix(self.session), 0)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,100 @@
+import datetime
+import os
+import sys
+
+this_file = os.path.realpath(__file__)
+sys.path.insert(1, os.path.realpath(os.path.join(this_file, "../../..")))
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from dormouse.extras.pitchstore import PitchStore
+from dormouse.tables.dbMeta import IngestManifest
+from dormouse.tables.dbPerson import (
+    PITCH_STORE_COLUMNS,
+    StatcastPitching,
+    load_pitch_store,
+    populate_statcast,
+)
+from dormouse.tests.helpers import (
+    memory_session,
+    remove_temp_dirs,
+    seed_offline_cache,
+    temp_dir,
+)
+
+DAYS = [datetime.datetime(2019, 4, 1), datetime.datetime(2019, 4, 2)]
+
+
+class TestPitchStore(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        seed_offline_cache(statcast_days=DAYS, pitches_per_day=500)
+
+        cls.session = memory_session(StatcastPitching, IngestManifest)
+        populate_statcast(DAYS[0], DAYS[-1], cls.session, bulk=True, rate=None)
+        cls.store = load_pitch_store(cls.session)
+        cls.frame = pd.read_sql(
+            "SELECT * FROM statcast_pitching", cls.session.connection()
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        remove_temp_dirs()
+
+    def test_dtypes(self):
+        store = self.store
+        self.assertEqual(len(store), len(self.frame))
+        self.assertEqual(store.columns, PITCH_STORE_COLUMNS)
+        for name in ["balls", "strikes", "outs_when_up"]:
+            self.assertEqual(store[name].dtype, np.int8)
+        for name in ["plate_x", "plate_z", "release_speed"]:
+            self.assertEqual(store[name].dtype, np.float32)
+        self.assertEqual(store["pitch_type"].dtype, np.int8)
+        self.assertEqual(
+            sorted(store.decode("pitch_type")), sorted(self.frame["pitch_type"])
+        )
+        self.assertLess(
+            store.nbytes, self.frame[PITCH_STORE_COLUMNS].memory_usage(deep=True).sum()
+        )
+
+    def test_slices(self):
+        store = self.store
+        pitcher = int(self.frame["pitcher"].iloc[0])
+        batter = int(self.frame["batter"].iloc[0])
+        game_pk = int(self.frame["game_pk"].iloc[0])
+        counts = [
+            (store.by_pitcher(pitcher), self.frame["pitcher"] == pitcher),
+            (store.by_batter(batter), self.frame["batter"] == batter),
+            (store.by_game(game_pk), self.frame["game_pk"] == game_pk),
+        ]
+        for rows, expected in counts:
+            self.assertEqual(len(rows), expected.sum())
+        # Pitchers are sorted, so their rows are views of the store
+        self.assertTrue(
+            np.shares_memory(store.by_pitcher(pitcher)["plate_x"], store["plate_x"])
+        )
+        self.assertEqual(len(store.by_pitcher(-1)), 0)
+
+        ff = store["pitch_type"] == store.code("pitch_type", "FF")
+        self.assertEqual(ff.sum(), (self.frame["pitch_type"] == "FF").sum())
+
+    def test_save_load(self):
+        path = os.path.join(temp_dir(), "pitches.npz")
+        self.store.save(path)
+        store = PitchStore.load(path)
+        self.assertEqual(store.columns, self.store.columns)
+        for name in store.columns:
+            np.testing.assert_array_equal(store[name], self.store[name])
+            self.assertEqual(store[name].dtype, self.store[name].dtype)
+        np.testing.assert_array_equal(
+            store.decode("events"), self.store.decode("events")
+        )
+        frame = store.to_frame()
+        self.assertIsInstance(frame["description"].dtype, pd.CategoricalDtype)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,153 @@
+import datetime
+import os
+import sys
+
+this_file = os.path.realpath(__file__)
+sys.path.insert(1, os.path.realpath(os.path.join(this_file, "../../..")))
+
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from dormouse.extras.bulk import bulk_load_df
+from dormouse.tables.dbMeta import IngestManifest, update_manifest
+from dormouse.tables.dbPerson import (
+    FORM_STATS,
+    PlayerForm,
+    PlayerGameStats,
+    player_form_as_of,
+    player_form_frame,
+    populate_player_form,
+    populate_player_game_stats,
+)
+from dormouse.tests.helpers import (
+    MIDSEASON,
+    SeasonInProgress,
+    memory_session,
+    remove_temp_dirs,
+    seed_offline_cache,
+)
+
+
+def setUpModule():
+    seed_offline_cache(retrosplits_rows=3000)
+
+
+def tearDownModule():
+    remove_temp_dirs()
+
+
+class TestPlayerForm(unittest.TestCase):
+    def setUp(self):
+        self.session = memory_session(PlayerGameStats, PlayerForm, IngestManifest)
+        populate_player_game_stats(2019, 2019, self.session)
+        self.games = pd.read_sql(
+            "SELECT * FROM single_game_player_stats",
+            self.session.connection(),
+            parse_dates=["game_date", "appear_date"],
+        )
+
+    def _form(self):
+        return (
+            pd.read_sql(
+                "SELECT * FROM player_form",
+                self.session.connection(),
+                parse_dates=["asof_date"],
+            )
+            .sort_values("UID")
+            .reset_index(drop=True)
+        )
+
+    def test_windows(self):
+        games = pd.DataFrame(
+            {
+                "person_key": "abc",
+                "game_date": pd.to_datetime(
+                    ["2019-04-01", "2019-04-03", "2019-04-09", "2019-04-10"]
+                ),
+                "P_GS": [1, 0, 1, 1],
+            }
+        )
+        for x in FORM_STATS:
+            if x != "P_GS":
+                games[x] = 1
+        form = player_form_frame(
+            games, {"7d": ("days", 7), "2gs": ("starts", 2), "3g": ("games", 3)}
+        ).set_index(["form_window", "asof_date"])
+        self.assertEqual(form.loc[("7d", pd.Timestamp("2019-04-09")), "B_H"], 2)
+        self.assertEqual(form.loc[("7d", pd.Timestamp("2019-04-10")), "B_H"], 2)
+        self.assertEqual(form.loc[("2gs", pd.Timestamp("2019-04-10")), "P_GS"], 2)
+        self.assertNotIn(("2gs", pd.Timestamp("2019-04-03")), form.index)
+        self.assertEqual(form.loc[("3g", pd.Timestamp("2019-04-10")), "n_games"], 3)
+
+    @mock.patch("dormouse.tables.dbPerson.datetime", SeasonInProgress)
+    def test_new_days_append_tails(self):
+        self.session.query(PlayerGameStats).filter(
+            PlayerGameStats.game_date >= MIDSEASON
+        ).delete()
+        populate_player_form(2019, 2019, self.session)
+        n_first = len(self._form())
+
+        bulk_load_df(
+            self.session,
+            PlayerGameStats,
+            self.games[self.games["game_date"] >= MIDSEASON],
+        )
+        n_rows = populate_player_form(2019, 2019, self.session)
+        incremental = self._form()
+        self.assertEqual(len(incremental), n_first + n_rows)
+
+        populate_player_form(2019, 2019, self.session, refresh=True)
+        pd.testing.assert_frame_equal(incremental, self._form())
+        self.assertEqual(populate_player_form(2019, 2019, self.session), 0)
+
+        person = self.games["person_key"].iloc[0]
+        games = self.games[
+            (self.games["person_key"] == person)
+            & (self.games["game_date"] < datetime.datetime(2019, 10, 1))
+        ]
+        row = player_form_as_of(
+            self.session, person, datetime.datetime(2019, 10, 1), "30d"
+        )
+        last = games["game_date"].max()
+        window = games[games["game_date"] > last - pd.Timedelta(days=30)]
+        self.assertEqual(row.asof_date, last)
+        self.assertEqual(row.B_PA, window["B_PA"].sum())
+
+    def test_season_without_retrosplits_manifest(self):
+        # single_game_player_stats loaded without a manifest entry, e.g. by hand
+        self.session.query(IngestManifest).filter(
+            IngestManifest.source == "retrosplits"
+        ).delete()
+        n_rows = populate_player_form(2019, 2019, self.session)
+        self.assertGreater(n_rows, 0)
+        self.assertEqual(n_rows, len(self._form()))
+        # Computed once, then skipped
+        self.assertEqual(populate_player_form(2019, 2019, self.session), 0)
+
+    def test_corrected_past_season_is_rebuilt(self):
+        populate_player_form(2019, 2019, self.session)
+        before = self._form()
+
+        game = self.games.sort_values("game_date").iloc[0]
+        self.session.query(PlayerGameStats).filter(
+            PlayerGameStats.UID == game["UID"]
+        ).update({PlayerGameStats.B_H: PlayerGameStats.B_H + 5})
+        update_manifest(self.session, "retrosplits", "2019", None, "corrected")
+        populate_player_form(2019, 2019, self.session)
+        after = self._form()
+
+        self.assertEqual(len(after), len(before))
+        rows = (
+            (after["person_key"] == game["person_key"])
+            & (after["asof_date"] == game["game_date"])
+        )
+        self.assertTrue(rows.any())
+        pd.testing.assert_series_equal(
+            after.loc[rows, "B_H"], before.loc[rows, "B_H"] + 5
+        )
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,164 @@
+import os
+import sys
+
+this_file = os.path.realpath(__file__)
+sys.path.insert(1, os.path.realpath(os.path.join(this_file, "../../..")))
+
+import threading
+import time
+import unittest
+
+from dormouse.extras.scheduler import BuildTask, run_tasks
+from dormouse.tests.helpers import remove_temp_dirs, temp_dir
+
+
+
+def tearDownModule():
+    remove_temp_dirs()
+
+
+_LOCK = threading.Lock()
+_EVENTS = []
+
+
+def _record(session, name, seconds=0.0):
+    with _LOCK:
+        _EVENTS.append(("start", name))
+    time.sleep(seconds)
+    with _LOCK:
+        _EVENTS.append(("end", name))
+    return 1
+
+
+def _fail(session):
+    raise RuntimeError("boom")
+
+
+_FLAKY = {"calls": 0}
+
+
+def _flaky(session, n_failures):
+    _FLAKY["calls"] += 1
+    if _FLAKY["calls"] <= n_failures:
+        raise ConnectionError("dropped")
+    return 2
+
+
+def _flaky_record(session, n_failures):
+    with _LOCK:
+        _EVENTS.append(("attempt", "flaky"))
+    return _flaky(session, n_failures)
+
+
+def _write(session):
+    session.connection().exec_driver_sql("CREATE TABLE unit (x INTEGER)")
+    session.connection().exec_driver_sql("INSERT INTO unit VALUES (1)")
+    return 1
+
+
+class TestScheduler(unittest.TestCase):
+    def setUp(self):
+        _EVENTS.clear()
+        self.path = os.path.join(temp_dir(), "db.sqlite")
+        self.connection = "sqlite:///" + self.path
+
+    def test_dependencies_finish_first(self):
+        tasks = [
+            BuildTask("derived", _record, args=("derived",), deps=["a", "b"]),
+            BuildTask("a", _record, args=("a", 0.05)),
+            BuildTask("b", _record, args=("b", 0.05)),
+        ]
+        results = run_tasks(tasks, self.connection, jobs=3)
+        self.assertEqual(results, {"a": 1, "b": 1, "derived": 1})
+        self.assertEqual(_EVENTS[-2:], [("start", "derived"), ("end", "derived")])
+        # The independent units ran at the same time
+        self.assertEqual({x for x in _EVENTS[:2]}, {("start", "a"), ("start", "b")})
+
+    def test_failure_stops_new_tasks(self):
+        tasks = [
+            BuildTask("bad", _fail),
+            BuildTask("after", _record, args=("after",), deps=["bad"]),
+        ]
+        with self.assertRaises(RuntimeError):
+            run_tasks(tasks, self.connection, jobs=2)
+        self.assertEqual(_EVENTS, [])
+
+    def test_failed_units_are_retried(self):
+        _FLAKY["calls"] = 0
+        errors = []
+        tasks = [
+            BuildTask("flaky", _flaky, args=(2,)),
+            BuildTask("after", _record, args=("after",), deps=["flaky"]),
+        ]
+        results = run_tasks(
+            tasks,
+            self.connection,
+            retries=2,
+            backoff=0.01,
+            on_error=lambda *x: errors.append(x[2:]),
+        )
+        self.assertEqual(results, {"flaky": 2, "after": 1})
+        self.assertEqual(errors, [(1, False), (2, False)])
+
+    def test_retries_wait_without_a_worker(self):
+        _FLAKY["calls"] = 0
+        tasks = [
+            BuildTask("flaky", _flaky_record, args=(1,)),
+            BuildTask("a", _record, args=("a",)),
+            BuildTask("b", _record, args=("b",), deps=["a"]),
+        ]
+        results = run_tasks(tasks, self.connection, jobs=1, retries=1, backoff=0.5)
+        self.assertEqual(results, {"flaky": 2, "a": 1, "b": 1})
+        # b became ready during the backoff and ran on the only worker
+        self.assertEqual(
+            _EVENTS,
+            [
+                ("attempt", "flaky"),
+                ("start", "a"),
+                ("end", "a"),
+                ("start", "b"),
+                ("end", "b"),
+                ("attempt", "flaky"),
+            ],
+        )
+
+    def test_process_workers_close_their_connections(self):
+        results = run_tasks([BuildTask("a", _write)], self.connection, processes=True)
+        self.assertEqual(results, {"a": 1})
+        # SQLite removes the write-ahead log when the last connection is closed
+        self.assertFalse(os.path.exists(self.path + "-wal"))
+
+    def test_independent_units_survive_a_failure(self):
+        tasks = [
+            BuildTask("bad", _fail),
+            BuildTask("after", _record, args=("after",), deps=["bad"]),
+            BuildTask("other", _record, args=("other",)),
+        ]
+        with self.assertRaises(RuntimeError):
+            run_tasks(tasks, self.connection, jobs=2, retries=1, backoff=0.01)
+        self.assertEqual(_EVENTS, [("start", "other"), ("end", "other")])
+
+    def test_done_units_are_not_rerun(self):
+        tasks = [
+            BuildTask("a", _record, args=("a",)),
+            BuildTask("b", _record, args=("b",), deps=["a"]),
+        ]
+        results = run_tasks(tasks, self.connection, done={"a"})
+        self.assertEqual(results, {"a": 0, "b": 1})
+        self.assertEqual(_EVENTS, [("start", "b"), ("end", "b")])
+
+    def test_invalid_graphs(self):
+        with self.assertRaises(ValueError):
+            run_tasks([BuildTask("a", _record, deps=["missing"])], self.connection)
+        with self.assertRaises(ValueError):
+            run_tasks(
+                [
+                    BuildTask("a", _record, deps=["b"]),
+                    BuildTask("b", _record, deps=["a"]),
+                ],
+                self.connection,
+            )
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
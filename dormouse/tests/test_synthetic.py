@@ -0,0 +1,111 @@
+import datetime
+import os
+import sys
+
+this_file = os.path.realpath(__file__)
+sys.path.insert(1, os.path.realpath(os.path.join(this_file, "../../..")))
+
+import unittest
+
+
+from dormouse.extras.synthetic import game_log, retrosplits
+from dormouse.tables.dbGame import (
+    GAMELOG_COLUMNS,
+    GameInningRuns,
+    GameLog,
+    LineupSlot,
+    TeamLineup,
+    TeamRoster,
+    populate_game_log,
+    populate_team_roster,
+)
+from dormouse.tables.dbMeta import IngestManifest
+from dormouse.tables.dbPerson import (
+    PlayerGameStats,
+    PlayerLookup,
+    StatcastPitching,
+    populate_player_game_stats,
+    populate_player_lu,
+    populate_statcast,
+)
+from dormouse.tests.helpers import (
+    memory_session,
+    remove_temp_dirs,
+    seed_offline_cache,
+)
+
+DAYS = [datetime.datetime(2019, 4, 1), datetime.datetime(2019, 4, 2)]
+
+
+def setUpModule():
+    seed_offline_cache(
+        games_per_season=90,
+        players_per_team=10,
+        retrosplits_rows=2000,
+        register_players=1000,
+        statcast_days=DAYS,
+        pitches_per_day=600,
+    )
+
+
+def tearDownModule():
+    remove_temp_dirs()
+
+
+class TestSyntheticSources(unittest.TestCase):
+    """
+    Every populate function can ingest the synthetic sources without the network
+    """
+
+    def setUp(self):
+        self.session = memory_session(
+            GameLog,
+            GameInningRuns,
+            LineupSlot,
+            TeamLineup,
+            TeamRoster,
+            PlayerGameStats,
+            PlayerLookup,
+            StatcastPitching,
+            IngestManifest,
+        )
+
+    def test_shapes(self):
+        self.assertEqual(list(game_log(2019, n_games=30).columns), GAMELOG_COLUMNS)
+        df = retrosplits(2019, n_rows=500)
+        self.assertFalse(df.duplicated(["game.key", "person.key"]).any())
+
+    def test_game_log(self):
+        self.assertEqual(populate_game_log(2019, "rs", self.session), 90)
+        self.assertEqual(self.session.query(TeamLineup).count(), 180)
+        # The starting pitcher and nine batters a side
+        self.assertEqual(self.session.query(LineupSlot).count(), 90 * 2 * 10)
+        # Line scores keep their leading zeros
+        self.assertEqual(len(self.session.query(GameLog).first().HomeLineScore), 9)
+        # Nine innings a side
+        self.assertEqual(self.session.query(GameInningRuns).count(), 90 * 2 * 9)
+
+    def test_rosters(self):
+        self.assertEqual(populate_team_roster(2019, self.session), 300)
+
+    def test_retrosplits(self):
+        self.assertEqual(populate_player_game_stats(2019, 2019, self.session), 2000)
+
+    def test_register(self):
+        n_rows = populate_player_lu(self.session)
+        self.assertGreater(n_rows, 0)
+        self.assertEqual(self.session.query(PlayerLookup).count(), n_rows)
+
+    def test_statcast(self):
+        for bulk in [False, True]:
+            with self.subTest(bulk=bulk):
+                self.session.query(StatcastPitching).delete()
+                self.session.query(IngestManifest).delete()
+                n_rows = populate_statcast(
+                    DAYS[0], DAYS[-1], self.session, bulk=bulk, rate=None
+                )
+                self.assertEqual(n_rows, 1200)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,110 @@
+import os
+import sys
+
+this_file = os.path.realpath(__file__)
+sys.path.insert(1, os.path.realpath(os.path.join(this_file, "../../..")))
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from dormouse.tables.dbGame import GameLog, TeamLineup, TeamRoster
+from dormouse.tables.dbMeta import Teams
+from dormouse.tables.dbPerson import PlayerGameStats, StatcastPitching
+
+
+class TestVectorizedUIDs(unittest.TestCase):
+    """
+    The vectorized UIDs must be byte-identical to the per-row ORM UIDs
+    """
+
+    def setUp(self):
+        self.rng = np.random.default_rng(7)
+
+    def _assert_same(self, objs, uids):
+        self.assertEqual([x.UID for x in objs], uids.tolist())
+
+    def test_statcast(self):
+        n = 200
+        # Statcast frames always carry string columns, which keeps iterrows
+        # from upcasting the integer keys to floats
+        df = pd.DataFrame(
+            {
+                "pitch_type": self.rng.choice(["FF", "SL"], n),
+                "game_pk": self.rng.integers(500000, 600000, n),
+                "pitcher": self.rng.integers(400000, 700000, n),
+                "at_bat_number": self.rng.integers(1, 80, n),
+                "pitch_number": self.rng.integers(1, 10, n),
+                "release_speed": np.r_[
+                    self.rng.uniform(70, 102, n - 3), [0.0, 100.0, 1e16]
+                ],
+            }
+        )
+        objs = [StatcastPitching(row) for _, row in df.iterrows()]
+        self._assert_same(objs, StatcastPitching.get_uids(df))
+
+    def test_game_log_and_lineups(self):
+        n = 50
+        df = pd.DataFrame(
+            {
+                "Date": pd.date_range("2019-03-28", periods=n, freq="D"),
+                "GameSeriesNumber": self.rng.integers(0, 3, n),
+                "HomeTeam": self.rng.choice(["NYA", "BOS", "SLN"], n),
+                "VisitingTeam": self.rng.choice(["CHN", "SEA", "TOR"], n),
+                "ParkID": ["NYC16"] * n,
+            }
+        )
+        for side in ["Home", "Visiting"]:
+            df[f"{side}_StartingPID"] = "pitcher01"
+            for i in range(1, 10):
+                df[f"{side}_Batter{i}ID"] = f"batter{i:02d}"
+                df[f"{side}_Batter{i}Pos"] = i
+
+        games = [GameLog(row) for _, row in df.iterrows()]
+        self._assert_same(games, GameLog.get_uids(df))
+        for side in ["Home", "Visiting"]:
+            self._assert_same(
+                [TeamLineup(x, side) for x in games],
+                TeamLineup.get_uids(df, side),
+            )
+
+    def test_roster(self):
+        df = pd.DataFrame(
+            {
+                "rs_id": ["abrej003", "smitw.01", "doej001"],
+                "name_first": ["Jose", "Will", np.nan],
+                "name_last": ["Abreu", "Smith Jr.", "Doe"],
+                "bats": ["R", "L", "B"],
+                "throws": ["R", "L", "R"],
+                "team": ["CHA", "LAN", "SEA"],
+                "position": ["1B", "C", "P"],
+            }
+        )
+        df["year"] = 2019
+        objs = [TeamRoster(row) for _, row in df.iterrows()]
+        self._assert_same(objs, TeamRoster.get_uids(df))
+
+    def test_teams(self):
+        df = pd.DataFrame(
+            {
+                "name": ["St. Louis Cardinals", "Tampa Bay Rays"],
+                "league": ["NL", "AL"],
+            }
+        )
+        objs = [Teams(row) for _, row in df.iterrows()]
+        self._assert_same(objs, Teams.get_uids(df))
+
+    def test_player_game_stats(self):
+        df = pd.DataFrame(
+            {
+                "game_key": ["ANA201904040", "BOS201904090"],
+                "person_key": ["troum001", "bettm001"],
+            }
+        )
+        objs = [PlayerGameStats(row) for _, row in df.iterrows()]
+        self._assert_same(objs, PlayerGameStats.get_uids(df))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
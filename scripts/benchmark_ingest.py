@@ -0,0 +1,320 @@
+"""
+Ingest microbenchmarks. Every populate_* function is run against a fresh database
+with synthetic source data served from an offline cache, and the rows/s, peak
+memory and per-phase timings are printed and saved as JSON so runs can be compared.
+"""
+import os
+import sys
+
+this_file = os.path.realpath(__file__)
+sys.path.insert(1, os.path.realpath(os.path.join(this_file, "../..")))
+
+import json
+import platform
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import sessionmaker
+
+from dormouse.extras.cache import configure_cache
+from dormouse.extras.engine import get_engine
+from dormouse.extras.metrics import stage
+from dormouse.extras.synthetic import seed_cache
+from dormouse.tables.dbGame import (
+    GameCrosswalk,
+    GameInningRuns,
+    GameLog,
+    LineupSlot,
+    TeamLineup,
+    TeamRoster,
+    populate_game_crosswalk,
+    populate_game_log,
+    populate_inning_runs,
+    populate_lineup_slots,
+    populate_team_roster,
+)
+from dormouse.tables.dbMeta import (
+    BuildJournal,
+    IngestManifest,
+    Teams,
+    populate_team_data,
+)
+from dormouse.tables.dbPerson import (
+    AsOfDatePlayerGameStats,
+    PitchMix,
+    PlayerForm,
+    PlayerGameStats,
+    PlayerLookup,
+    StatcastPitching,
+    populate_as_of_date_stats,
+    populate_pitch_mix,
+    populate_player_form,
+    populate_player_game_stats,
+    populate_player_lu,
+    populate_statcast,
+)
+
+TABLES = [
+    StatcastPitching,
+    PitchMix,
+    PlayerLookup,
+    PlayerGameStats,
+    AsOfDatePlayerGameStats,
+    PlayerForm,
+    GameLog,
+    GameInningRuns,
+    GameCrosswalk,
+    TeamRoster,
+    Teams,
+    TeamLineup,
+    LineupSlot,
+    IngestManifest,
+    BuildJournal,
+]
+
+
+def benchmarks(args) -> dict:
+    """
+    {name: func(session)} of every benchmarked populate function
+    """
+    days = [args.statcast_start + timedelta(days=i) for i in range(args.days)]
+    seasons = (args.season, args.season)
+    return {
+        "lookup": lambda s: populate_player_lu(s),
+        "teams": lambda s: populate_team_data(s),
+        "gamelog": lambda s: populate_game_log(args.season, "rs", s),
+        "rosters": lambda s: populate_team_roster(args.season, s),
+        "retrosplits": lambda s: populate_player_game_stats(*seasons, s),
+        "statcast": lambda s: populate_statcast(days[0], days[-1], s, rate=None),
+        "statcast_bulk": lambda s: populate_statcast(
+            days[0], days[-1], s, bulk=True, rate=None
+        ),
+        "pitch_mix": lambda s: populate_pitch_mix(s),
+        "as_of_stats": lambda s: populate_as_of_date_stats(*seasons, s),
+        "player_form": lambda s: populate_player_form(*seasons, s),
+        "inning_runs": lambda s: populate_inning_runs(s),
+        "game_crosswalk": lambda s: populate_game_crosswalk(s),
+        "lineup_slots": lambda s: populate_lineup_slots(s),
+    }
+
+
+def prerequisites(args) -> dict:
+    """
+    {name: [func(session)]} of the loads a benchmark reads from, run before it and
+    left out of its measurements
+    """
+    days = [args.statcast_start + timedelta(days=i) for i in range(args.days)]
+
+    def statcast(s):
+        populate_statcast(days[0], days[-1], s, bulk=True, rate=None)
+
+    def retrosplits(s):
+        populate_player_game_stats(args.season, args.season, s)
+
+    def gamelog(s):
+        populate_game_log(args.season, "rs", s)
+
+    def emptied(tbl):
+        # The game log load fills tbl as well, emptied to time the backfill alone
+        return lambda s: s.query(tbl).delete()
+
+    return {
+        "pitch_mix": [statcast],
+        "as_of_stats": [retrosplits],
+        "player_form": [retrosplits],
+        "inning_runs": [gamelog, emptied(GameInningRuns)],
+        "game_crosswalk": [populate_team_data, gamelog, statcast],
+        "lineup_slots": [gamelog, emptied(LineupSlot)],
+    }
+
+
+def _fresh_engine(connection):
+    # Measured with the same settings as a build
+    engine = get_engine(connection, build=True)
+    for tbl in TABLES:
+        tbl.__table__.drop(bind=engine, checkfirst=True)
+        tbl.__table__.create(bind=engine)
+    return engine
+
+
+def run_benchmark(name, func, connection, trace_memory=True, setup=()) -> dict:
+    """
+    Runs a single populate function against a database that only holds the rows
+    loaded by setup
+    """
+    engine = _fresh_engine(connection)
+    session = sessionmaker(bind=engine)()
+    for load in setup:
+        load(session)
+    session.commit()
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        with stage(name) as metrics:
+            func(session)
+            session.commit()
+    finally:
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        tracemalloc.stop()
+        session.close()
+        engine.dispose()
+
+    stats = metrics.to_dict()
+    # Rows written to every table, e.g. game logs and their lineups
+    rate = stats["rows_inserted"] / max(stats["wall_time"], 1e-9)
+    stats["rows_per_second"] = round(rate, 1)
+    stats["peak_memory_mb"] = None if peak is None else round(peak / 1024 ** 2, 1)
+    return stats
+
+
+def _main(args):
+    cache_dir = tempfile.mkdtemp(prefix="dormouse-bench-")
+    cache = configure_cache(cache_dir, max_bytes=None)
+    print(f"Generating synthetic sources in {cache_dir}")
+    seed_cache(
+        cache,
+        args.season,
+        args.season,
+        games_per_season=args.games,
+        retrosplits_rows=args.retrosplits_rows,
+        register_players=args.players,
+        statcast_days=[
+            args.statcast_start + timedelta(days=i) for i in range(args.days)
+        ],
+        pitches_per_day=args.pitches,
+    )
+    cache.offline = True
+
+    backends = {"sqlite": "sqlite:///" + os.path.join(cache_dir, "bench.sqlite")}
+    if args.postgres:
+        backends["postgresql"] = args.postgres
+
+    selected = args.only.split(",") if args.only else None
+    results = []
+    setups = prerequisites(args)
+    for backend, connection in backends.items():
+        for name, func in benchmarks(args).items():
+            if selected and name not in selected:
+                continue
+            stats = run_benchmark(
+                name, func, connection, not args.skip_memory, setups.get(name, ())
+            )
+            stats["backend"] = backend
+            results.append(stats)
+            phases = " ".join(f"{k}={v:.2f}s" for k, v in stats["seconds"].items())
+            print(
+                f"{backend:<10} {name:<14} {stats['rows_inserted']:>9} rows "
+                f"{stats['rows_per_second']:>10.0f} rows/s "
+                f"peak {stats['peak_memory_mb']} MB  {phases}"
+            )
+
+    summary = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {
+            "season": args.season,
+            "games": args.games,
+            "retrosplits_rows": args.retrosplits_rows,
+            "players": args.players,
+            "days": args.days,
+            "pitches": args.pitches,
+            "trace_memory": not args.skip_memory,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(summary, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark the ingest path with synthetic data"
+    )
+
+    parser.add_argument(
+        "--postgres",
+        metavar="postgres",
+        type=str,
+        help="Connection string of a local PostgreSQL database to benchmark as well. "
+        "Every benchmarked table in it is dropped",
+        default=None,
+    )
+
+    parser.add_argument(
+        "--season",
+        metavar="season",
+        type=int,
+        help="The synthetic season",
+        default=2019,
+    )
+
+    parser.add_argument(
+        "--games",
+        metavar="games",
+        type=int,
+        help="Game logs in the season",
+        default=2430,
+    )
+
+    parser.add_argument(
+        "--retrosplits-rows",
+        metavar="retrosplits_rows",
+        type=int,
+        help="Player games in the retrosplits season",
+        default=60000,
+    )
+
+    parser.add_argument(
+        "--players",
+        metavar="players",
+        type=int,
+        help="People in the synthetic register",
+        default=20000,
+    )
+
+    parser.add_argument(
+        "--days",
+        metavar="days",
+        type=int,
+        help="Number of statcast days",
+        default=7,
+    )
+
+    parser.add_argument(
+        "--pitches",
+        metavar="pitches",
+        type=int,
+        help="Pitches per statcast day",
+        default=4000,
+    )
+
+    parser.add_argument(
+        "--only",
+        metavar="only",
+        type=str,
+        help="Comma separated benchmarks to run, e.g. gamelog,statcast_bulk",
+        default=None,
+    )
+
+    parser.add_argument(
+        "--skip-memory",
+        action="store_true",
+        help="Don't trace peak memory, tracing slows down allocation heavy code",
+    )
+
+    parser.add_argument(
+        "--output",
+        metavar="output",
+        type=str,
+        help="Where to write the JSON results",
+        default="benchmark.json",
+    )
+
+    args = parser.parse_args()
+    args.statcast_start = datetime(args.season, 4, 1)
+    _main(args)
@@ -19,4 +19,5 @@ setup(
         "sqlalchemy",
         "beautifulsoup4",
     ],
+    extras_require={"parquet": ["pyarrow"]},
 )